@@ -0,0 +1,389 @@
+"""
+Benchmark suite for the hot paths of python-pptx-interface. Records run time and peak memory of each benchmark,
+writes the results as json and compares them with a stored baseline to flag regressions.
+Peak memory is measured with tracemalloc (python allocations only - memory allocated inside lxml is not included).
+
+Usage (from repository root):
+    python -m benchmarks.benchmark_pptx_tools --output bench.json
+    python -m benchmarks.benchmark_pptx_tools --save-baseline benchmarks/baseline.json
+    python -m benchmarks.benchmark_pptx_tools --baseline benchmarks/baseline.json --tolerance 0.25
+@author: Nathanael Jöhrmann
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.position import PPTXPosition
+from pptx_tools.style_sheets import table_no_header
+from pptx_tools.templates import TemplateExample
+
+# name -> function doing the (untimed) setup and returning the callable to benchmark
+BENCHMARKS: Dict[str, Callable[[], Callable[[], None]]] = {}
+# benchmarks only run without --quick
+SLOW_BENCHMARKS = set()
+
+
+def benchmark(name: str, slow: bool = False):
+    """Decorator to register a benchmark."""
+    def decorator(function):
+        BENCHMARKS[name] = function
+        if slow:
+            SLOW_BENCHMARKS.add(name)
+        return function
+    return decorator
+
+
+def _table_data(rows: int, cols: int):
+    return [[f"{row}.{col}" for col in range(cols)] for row in range(rows)]
+
+
+def _png_bytes() -> bytes:
+    import matplotlib.pyplot as plt
+    figure = plt.figure(figsize=(4, 3), dpi=100)
+    figure.gca().plot([0, 1, 2], [0, 1, 0])
+    with io.BytesIO() as output:
+        figure.savefig(output, format="png")
+        plt.close(figure)
+        return output.getvalue()
+
+
+@benchmark("template_example")
+def bench_template_example():
+    return TemplateExample
+
+
+@benchmark("add_slide_x50")
+def bench_add_slide():
+    creator = PPTXCreator(TemplateExample())
+
+    def run():
+        for index in range(50):
+            creator.add_slide(f"slide {index}")
+    return run
+
+
+def _bench_add_table(rows: int, cols: int):
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("add_table")
+    table_data = _table_data(rows, cols)
+    return lambda: creator.add_table(slide, table_data, table_style=table_no_header())
+
+
+benchmark("add_table_10x10")(lambda: _bench_add_table(10, 10))
+benchmark("add_table_100x10")(lambda: _bench_add_table(100, 10))
+benchmark("add_table_500x30", slow=True)(lambda: _bench_add_table(500, 30))
+
+
+@benchmark("table_auto_size_500x10")
+def bench_table_auto_size():
+    creator = PPTXCreator(TemplateExample())
+    table = creator.add_table(creator.add_slide("auto_size"), _table_data(500, 10)).table
+    table_style = table_no_header()
+    table_style.auto_size = True
+    return lambda: table_style.write_table(table)
+
+
+
+@benchmark("add_paginated_table_5000x5", slow=True)
+def bench_add_paginated_table():
+    creator = PPTXCreator(TemplateExample())
+    table_style = table_no_header()
+    table_style.font_style = PPTXFontStyle().set(size=10)
+    return lambda: creator.add_paginated_table("paginated", iter(_table_data(5000, 5)), table_style=table_style)
+
+
+def _bench_add_chart(max_points):
+    import numpy as np
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("add_chart")
+    x = np.linspace(0, 100, 100000)
+    y = np.column_stack([np.sin(x), np.cos(x)])
+    return lambda: creator.add_chart(slide, y, x, max_points=max_points)
+
+
+benchmark("add_chart_100k_lttb")(lambda: _bench_add_chart(1000))
+benchmark("add_chart_100k_full", slow=True)(lambda: _bench_add_chart(None))
+
+
+@benchmark("write_table_100x10")
+def bench_write_table():
+    creator = PPTXCreator(TemplateExample())
+    table = creator.add_table(creator.add_slide("write_table"), _table_data(100, 10)).table
+    table_style = table_no_header()
+    table_style.font_style = PPTXFontStyle().set(bold=True, size=10, color_rgb=(50, 50, 50))
+    table_style.width = 10
+    return lambda: table_style.write_table(table)
+
+
+@benchmark("font_write_shape_x200")
+def bench_font_write_shape():
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("font_write_shape")
+    shapes = [creator.add_text_box(slide, f"text box {index}") for index in range(200)]
+    font_style = PPTXFontStyle().set(bold=True, italic=True, size=12, color_rgb=(10, 20, 30))
+
+    def run():
+        for shape in shapes:
+            font_style.write_shape(shape)
+    return run
+
+
+@benchmark("add_image_repeated_x50")
+def bench_add_image():
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("add_image")
+    png = _png_bytes()
+
+    def run():
+        for index in range(50):
+            creator.add_image(io.BytesIO(png), slide, PPTXPosition(0.01 * index, 0.2))
+    return run
+
+
+@benchmark("add_media_file_x10_save")
+def bench_add_media_file():
+    import os
+    from PIL import Image
+    from pptx_tools.media import MediaFile
+    directory = os.path.join(tempfile.gettempdir(), "pptx_tools_benchmark_scans")  # reused by all runs
+    os.makedirs(directory, exist_ok=True)
+    filenames = [os.path.join(directory, f"scan{index}.tiff") for index in range(10)]
+    for filename in filenames:  # uncompressed 6 MB scans
+        if not os.path.isfile(filename):
+            Image.frombytes("RGB", (1600, 1250), os.urandom(1600 * 1250 * 3)).save(filename, format="TIFF")
+
+    def run():
+        creator = PPTXCreator(TemplateExample())
+        for filename in filenames:
+            creator.add_image(MediaFile(filename), creator.add_slide(filename))
+        creator.save(os.path.join(directory, "scans.pptx"), overwrite=True)
+    return run
+
+
+@benchmark("add_matplotlib_figure_x5")
+def bench_add_matplotlib_figure():
+    import matplotlib.pyplot as plt
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("add_matplotlib_figure")
+    figure = plt.figure(figsize=(4, 3), dpi=100)
+    figure.gca().plot(range(1000))
+
+    def run():
+        for index in range(5):
+            creator.add_matplotlib_figure(figure, slide, PPTXPosition(0.1 * index, 0.2))
+    return run
+
+
+@benchmark("add_latex_formula_x3")
+def bench_add_latex_formula():
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("add_latex_formula")
+
+    def run():
+        for index in range(3):
+            creator.add_latex_formula(fr"\sum_{{i=0}}^{{{index}}} x_i^2", slide, PPTXPosition(0.1 * index, 0.2))
+    return run
+
+
+@benchmark("add_content_slide_200_slides")
+def bench_add_content_slide():
+    creator = PPTXCreator(TemplateExample())
+    for index in range(200):
+        creator.add_slide(f"slide {index}")
+    return creator.add_content_slide
+
+
+@benchmark("save_100_slides")
+def bench_save():
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("save")
+    creator.add_table(slide, _table_data(20, 5))
+    creator.add_image(io.BytesIO(_png_bytes()), slide)
+    for index in range(99):
+        creator.add_slide(f"slide {index}")
+    filename = str(Path(tempfile.gettempdir()) / "pptx_tools_benchmark_save.pptx")  # reused by all runs
+    return lambda: creator.save(filename, overwrite=True)
+
+
+@benchmark("fork_30_slides")
+def bench_fork():
+    creator = PPTXCreator(TemplateExample())
+    for index in range(30):
+        slide = creator.add_slide(f"slide {index}")
+        creator.add_table(slide, _table_data(10, 5))
+        creator.add_image(io.BytesIO(_png_bytes()), slide)
+    return creator.fork
+
+
+@benchmark("replace_text_500_slides")
+def bench_replace_text():
+    creator = PPTXCreator(TemplateExample())
+    for index in range(500):
+        slide = creator.add_slide(f"ACME slide {index}")
+        creator.add_table(slide, [["ACME Corp.", f"{index}"]] + _table_data(5, 2))
+    return lambda: creator.replace_text(r"ACME( Corp\.)?", "ACME")  # same number of matches in every run
+
+
+@benchmark("extract_text_200_slides")
+def bench_extract_text():
+    from pptx_tools.text_search import iter_deck_text
+    creator = PPTXCreator(TemplateExample())
+    for index in range(200):
+        creator.add_table(creator.add_slide(f"slide {index}"), _table_data(10, 5))
+    with io.BytesIO() as file:
+        creator.prs.save(file)
+        blob = file.getvalue()
+    return lambda: sum(1 for _ in iter_deck_text(io.BytesIO(blob)))
+
+
+@benchmark("diff_decks_200_slides")
+def bench_diff_decks():
+    from pptx_tools.deck_diff import diff_decks
+    blobs = []
+    for changed_title in ["slide 100", "changed slide"]:
+        creator = PPTXCreator(TemplateExample())
+        for index in range(200):
+            slide = creator.add_slide(changed_title if index == 100 else f"slide {index}")
+            creator.add_table(slide, _table_data(10, 5))
+        with io.BytesIO() as file:
+            creator.prs.save(file)
+            blobs.append(file.getvalue())
+    return lambda: diff_decks(io.BytesIO(blobs[0]), io.BytesIO(blobs[1]))
+
+
+def _build_benchmark_slide(creator, slide, rows, png):
+    creator.add_table(slide, rows)
+    creator.add_image(io.BytesIO(png), slide)
+
+
+@benchmark("cached_slides_100")
+def bench_cached_slides():
+    from pptx_tools.build_cache import SlideBuildCache
+    cache = SlideBuildCache()
+    png = _png_bytes()
+
+    def run():
+        creator = PPTXCreator(TemplateExample(), build_cache=cache)
+        for index in range(100):
+            creator.add_cached_slide(f"slide {index}", _build_benchmark_slide, _table_data(20, 5), png)
+    run()  # fill cache
+    return run
+
+
+@benchmark("mail_merge_100_records")
+def bench_mail_merge():
+    from pptx_tools.mail_merge import MergeTemplate
+    creator = PPTXCreator(TemplateExample())
+    for index in range(20):
+        slide = creator.add_slide(f"{{{{name}}}} - slide {index}")
+        creator.add_table(slide, [["name", "value"], ["{{name}}", "{{value}}"]] + _table_data(10, 2))
+    with io.BytesIO() as template_file:
+        creator.prs.save(template_file)
+        template = MergeTemplate(template_file)
+    records = [{"name": f"name {index}", "value": index} for index in range(100)]
+
+    def run():
+        for record in records:
+            template.render(record, io.BytesIO())
+    return run
+
+
+@benchmark("streaming_creator_200_slides")
+def bench_streaming_creator():
+    from pptx_tools.streaming_creator import StreamingPPTXCreator
+    png = _png_bytes()
+
+    def run():
+        with StreamingPPTXCreator(io.BytesIO(), TemplateExample()) as creator:
+            for index in range(200):
+                slide = creator.add_slide(f"slide {index}")
+                _build_benchmark_slide(creator, slide, _table_data(20, 5), png)
+    return run
+
+
+def run_benchmark(setup: Callable[[], Callable[[], None]], repeat: int) -> dict:
+    """Time repeat runs (each with a fresh setup) and measure peak memory of one additional run."""
+    times = []
+    for _ in range(repeat):
+        function = setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    function = setup()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_min": min(times), "time_median": statistics.median(times), "peak_memory": peak_memory}
+
+
+def run_benchmarks(repeat: int = 3, quick: bool = False, pattern: Optional[str] = None) -> dict:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if (quick and name in SLOW_BENCHMARKS) or (pattern and pattern not in name):
+            continue
+        results[name] = run_benchmark(setup, repeat)
+        print(f"{name:35s} {results[name]['time_min'] * 1000:10.1f} ms {results[name]['peak_memory'] / 2 ** 20:8.1f} MiB")
+    return {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float = 0.25,
+                          memory_tolerance: Optional[float] = None) -> list:
+    """
+    Returns a list of regression messages for all benchmarks slower (or using more memory) than baseline
+    by more than the given relative tolerance. Benchmarks missing in baseline are ignored.
+    """
+    if memory_tolerance is None:
+        memory_tolerance = tolerance
+    regressions = []
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        if result["time_min"] > reference["time_min"] * (1 + tolerance):
+            regressions.append(f"{name}: time {result['time_min']:.4f} s > baseline {reference['time_min']:.4f} s")
+        if result["peak_memory"] > reference["peak_memory"] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak memory {result['peak_memory']} B > "
+                               f"baseline {reference['peak_memory']} B")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="skip slow benchmarks")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks containing this string")
+    parser.add_argument("--output", help="write results as json to this file")
+    parser.add_argument("--save-baseline", help="write results as new baseline json file")
+    parser.add_argument("--baseline", help="compare results with this baseline json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.quick, args.pattern)
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            Path(filename).write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+This module provides an asyncio facade for PPTXCreator (e.g. to generate presentations inside an async web server).
+
+    async with await AsyncPPTXCreator.create(TemplateExample()) as creator:
+        slide = await creator.add_slide("results")
+        await creator.add_matplotlib_figure(figure, slide)
+        await creator.save("results.pptx")
+
+- python-pptx is not thread safe: all work on the presentation runs in order in one worker thread per creator.
+- CPU heavy rendering (matplotlib figures, latex formulas) runs in a shared, bounded render executor and
+  blocking file export (PDF/PNG via PowerPoint) in a shared, bounded io executor. Rendering happens before the
+  presentation is touched, so many figures (of one or several creators) can be rendered concurrently. matplotlib
+  figures are not thread safe: adding the same figure several times renders it one call after the other.
+- max_concurrency limits the number of offloaded jobs of one creator in flight at the same time.
+- Cancelling a call drops its job if it has not started yet; a job that already started is completed.
+@author: Nathanael Jöhrmann
+"""
+import _ctypes
+import asyncio
+import contextvars
+import functools
+import io
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, TypeVar, Union
+
+from pptx.shapes.autoshape import Shape
+from pptx.shapes.picture import Picture
+from pptx.slide import Slide, SlideLayout
+
+from pptx_tools import utils
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.position import PPTXPosition
+from pptx_tools.table_style import PPTXTableStyle
+from pptx_tools.templates import AbstractTemplate
+
+T = TypeVar('T')
+
+RENDER_WORKERS = os.cpu_count() or 1
+IO_WORKERS = 4
+
+_render_executor: Optional[Executor] = None
+_io_executor: Optional[Executor] = None
+_figure_locks: 'weakref.WeakKeyDictionary[Figure, threading.Lock]' = weakref.WeakKeyDictionary()
+_figure_locks_lock = threading.Lock()
+
+
+def default_render_executor() -> Executor:
+    """Shared executor (RENDER_WORKERS threads) for CPU heavy rendering, created on first use."""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(RENDER_WORKERS, thread_name_prefix="pptx_render")
+    return _render_executor
+
+
+def default_io_executor() -> Executor:
+    """Shared executor (IO_WORKERS threads) for blocking export/file operations, created on first use."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="pptx_io")
+    return _io_executor
+
+
+def _figure_lock(fig: 'Figure') -> threading.Lock:
+    """Lock of fig (matplotlib figures are not thread safe - a figure is rendered by one thread at a time)."""
+    with _figure_locks_lock:
+        lock = _figure_locks.get(fig)
+        if lock is None:
+            lock = _figure_locks[fig] = threading.Lock()
+        return lock
+
+
+def _figure_to_png(fig: 'Figure') -> bytes:
+    with _figure_lock(fig), io.BytesIO() as output:
+        fig.savefig(output, format="png")
+        return output.getvalue()
+
+
+def _latex_formula_to_png(formula: str, dpi: int, font_size: int, color: str, alpha: float, kwargs: dict) -> bytes:
+    return _figure_to_png(PPTXCreator.latex_formula_figure(formula, dpi, font_size, color, alpha, **kwargs))
+
+
+def _export_blob(blob: bytes, export: Callable[[str], bool]) -> bool:
+    """
+    Write blob to a temporary *.pptx file and call export(pptx_filename) (see utils.save_as_pdf).
+    PowerPoint is accessed via COM, which has to be initialized in every worker thread.
+    """
+    com_initialized = False
+    if utils.has_comptypes:
+        import comtypes
+        comtypes.CoInitialize()
+        com_initialized = True
+    try:
+        with utils.TemporaryPPTXFile() as f:
+            f.write(blob)
+            f.flush()
+            try:
+                return export(f.name)
+            except _ctypes.COMError as e:
+                print(e)
+                print("Couldn't export file due to communication error with PowerPoint.")
+                return False
+    finally:
+        if com_initialized:
+            comtypes.CoUninitialize()
+
+
+def _create_creator(template: Union[AbstractTemplate, Callable[[], AbstractTemplate], None]) -> PPTXCreator:
+    return PPTXCreator(template() if callable(template) else template)
+
+
+class AsyncPPTXCreator:
+    """
+    Async facade for PPTXCreator. All methods of PPTXCreator not wrapped here can be used via run(), e.g.
+    await creator.run(PPTXCreator.move_slide, slide, 0). The wrapped PPTXCreator is available as .creator,
+    but should only be used directly while no coroutine of this AsyncPPTXCreator is running.
+    """
+
+    def __init__(self, creator: Optional[PPTXCreator] = None, max_concurrency: Optional[int] = None,
+                 render_executor: Optional[Executor] = None, io_executor: Optional[Executor] = None):
+        self.creator = creator if creator is not None else PPTXCreator()
+        self.max_concurrency = max_concurrency
+        self.render_executor = render_executor
+        self.io_executor = io_executor
+        # one thread per creator -> all changes to the presentation happen in order and never concurrently
+        self._presentation_executor = ThreadPoolExecutor(1, thread_name_prefix="pptx_presentation")
+        self._semaphore: Optional[asyncio.Semaphore] = None  # created in the running event loop
+
+    @classmethod
+    async def create(cls, template: Union[AbstractTemplate, Callable[[], AbstractTemplate], None] = None,
+                     max_concurrency: Optional[int] = None, render_executor: Optional[Executor] = None,
+                     io_executor: Optional[Executor] = None) -> 'AsyncPPTXCreator':
+        """
+        Create a new AsyncPPTXCreator. template is a template, a template class or a factory returning a template,
+        e.g. AsyncPPTXCreator.create(TemplateExample). Creating the template (loading the template file) from a class
+        or factory and creating the PPTXCreator run in the io executor.
+        """
+        loop = asyncio.get_running_loop()
+        creator = await loop.run_in_executor(io_executor or default_io_executor(), _create_creator, template)
+        return cls(creator, max_concurrency, render_executor, io_executor)
+
+    async def __aenter__(self) -> 'AsyncPPTXCreator':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Stop the presentation worker thread (queued jobs are cancelled). Shared executors are not affected."""
+        self._presentation_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _offload(self, executor: Executor, function: Callable[..., T], *args) -> T:
+        # run in the context of the calling task (e.g. an enabled instrumentation.PPTXInstrumentation)
+        function = functools.partial(contextvars.copy_context().run, function)
+        if self.max_concurrency is None:
+            return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    async def _render(self, function: Callable[..., T], *args) -> T:
+        return await self._offload(self.render_executor or default_render_executor(), function, *args)
+
+    async def _export(self, function: Callable[..., T], *args) -> T:
+        return await self._offload(self.io_executor or default_io_executor(), function, *args)
+
+    async def run(self, function: Callable[..., T], *args, **kwargs) -> T:
+        """Run function(self.creator, *args, **kwargs) in the presentation worker thread."""
+        return await self._offload(self._presentation_executor,
+                                   functools.partial(function, self.creator, *args, **kwargs))
+
+    async def add_title_slide(self, title: str, layout: SlideLayout = None) -> Slide:
+        return await self.run(PPTXCreator.add_title_slide, title, layout)
+
+    async def add_slide(self, title: str, layout: SlideLayout = None) -> Slide:
+        return await self.run(PPTXCreator.add_slide, title, layout)
+
+    async def add_image(self, file: Union[str, io.BytesIO], slide: Slide, position: PPTXPosition = None,
+                        zoom: float = 1.0, **kwargs) -> Picture:
+        return await self.run(PPTXCreator.add_image, file, slide, position, zoom, **kwargs)
+
+    async def add_matplotlib_figure(self, fig: 'Figure', slide: Slide, position: PPTXPosition = None,
+                                    zoom: float = 1.0, **kwargs) -> Picture:
+        """
+        Render fig in the render executor and add it to slide. fig must not be changed until the returned
+        coroutine is finished.
+        """
+        png = await self._render(_figure_to_png, fig)
+        return await self.add_image(io.BytesIO(png), slide, position, zoom, **kwargs)
+
+    async def add_latex_formula(self, formula: str, slide: Slide, position: PPTXPosition = None, dpi: int = 150,
+                                font_size: int = 18, color: str = "black", alpha: float = 0.0,
+                                **kwargs) -> Picture:
+        png = await self._render(_latex_formula_to_png, formula, dpi, font_size, color, alpha, kwargs)
+        return await self.add_image(io.BytesIO(png), slide, position)
+
+    async def add_text_box(self, slide, text: str, position: PPTXPosition = None,
+                           font: PPTXFontStyle = None) -> Shape:
+        return await self.run(PPTXCreator.add_text_box, slide, text, position, font)
+
+    async def add_table(self, slide: Slide, table_data: Iterable[Iterable[any]], position: PPTXPosition = None,
+                        table_style: PPTXTableStyle = None, **kwargs) -> Shape:
+        return await self.run(PPTXCreator.add_table, slide, table_data, position, table_style, **kwargs)
+
+    async def save(self, filename: Union[str, "LocalPath"], overwrite=False, compact: bool = False,
+                   max_dpi: Optional[float] = None, deterministic: bool = False) -> None:
+        """Save presentation under the given filename (see PPTXCreator.save; create_pdf -> use save_as_pdf)."""
+        await self.run(PPTXCreator.save, filename, overwrite=overwrite, compact=compact, max_dpi=max_dpi,
+                       deterministic=deterministic)
+
+    async def to_bytes(self, compact: bool = False, max_dpi: Optional[float] = None,
+                       deterministic: bool = False) -> bytes:
+        """
+        Returns the saved presentation (e.g. to send it as response of a web request).
+        compact, max_dpi and deterministic: see PPTXCreator.save.
+        """
+        return await self.run(self._to_bytes, compact, max_dpi, deterministic)
+
+    @staticmethod
+    def _to_bytes(creator: PPTXCreator, compact: bool = False, max_dpi: Optional[float] = None,
+                  deterministic: bool = False) -> bytes:
+        with io.BytesIO() as output:
+            creator.write(output, compact, max_dpi, deterministic)
+            return output.getvalue()
+
+    async def save_as_pdf(self, filename: str, overwrite=False) -> bool:
+        """
+        Save the presentation as pdf. Needs PowerPoint installed (see PPTXCreator.save_as_pdf).
+        Only serializing the presentation blocks the presentation worker; the export runs in the io executor.
+        """
+        blob = await self.to_bytes()
+        return await self._export(_export_blob, blob,
+                                  functools.partial(utils.save_pptx_as_pdf, filename, overwrite=overwrite))
+
+    async def save_as_png(self, save_folder, overwrite_folder=False) -> bool:
+        """Saves the presentation as PNG's in the given folder. Needs PowerPoint installed."""
+        blob = await self.to_bytes()
+        return await self._export(_export_blob, blob,
+                                  functools.partial(utils.save_pptx_as_png, save_folder,
+                                                    overwrite_folder=overwrite_folder))
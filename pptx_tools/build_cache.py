@@ -0,0 +1,265 @@
+"""
+This module provides a slide build cache (used by PPTXCreator.add_cached_slide()), e.g. for decks that are rebuilt
+nightly although most of their input data did not change.
+
+    creator = PPTXCreator(TemplateExample(), build_cache=SlideBuildCache("build_cache"))
+    for client in clients:
+        creator.add_cached_slide(client.name, build_client_slide, client.data, figure_key)
+    creator.save("report.pptx", deterministic=True)
+    print(creator.build_cache.report())
+
+Every slide is keyed on a hash of its inputs: title, slide layout (incl. slide master), slide size, the build function
+(byte code, default arguments and closure values; wrapped function and arguments of functools.partial) and all
+further arguments (data, styles, positions, figure keys ...). On a cache hit the stored slide XML and its images are
+added without calling the build function (e.g. matplotlib figures are not rendered again - pass the data/parameters
+of a figure as key instead of the figure itself). On a miss the slide is built and stored. Slides with other related parts (charts, media, notes ...) are built every time (not cacheable).
+
+Arguments are hashed by value: None, bool, int, float, str, bytes, enums, lists/tuples/sets/dicts, numpy arrays and
+objects with __dict__ or __slots__ (e.g. style sheets and PPTXPosition). The cache is stored in a directory (one
+json file per slide, images by content hash) or in memory.
+@author: Nathanael Jöhrmann
+"""
+import enum
+import functools
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+from typing import Callable, Dict, Optional
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT, RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.package import _Relationship
+from pptx.oxml import parse_xml
+from pptx.parts.image import ImagePart
+from pptx.slide import Slide, SlideLayout
+
+
+CACHE_FORMAT = 1  # part of every key - increase, if the stored format changes
+MAX_DEPTH = 20  # max. nesting of hashed arguments (protects against cyclic objects)
+_FUNCTION_TYPES = (types.FunctionType, types.MethodType, types.BuiltinFunctionType, functools.partial)
+_EMPTY_CELL = "<empty closure cell>"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# input hashing
+# ----------------------------------------------------------------------------------------------------------------------
+def _update(sha: 'hashlib._Hash', value, depth: int = 0) -> None:
+    if depth > MAX_DEPTH:
+        raise TypeError("Build cache arguments are nested too deep (cyclic object?) - pass a key instead.")
+    np = sys.modules.get("numpy")  # not imported here: numpy values exist only, if numpy was imported by the caller
+    if value is None or isinstance(value, (bool, int, float, complex, str, enum.Enum)):
+        sha.update(f"{type(value).__qualname__}:{value!r};".encode())
+    elif isinstance(value, (bytes, bytearray)):
+        sha.update(f"bytes:{len(value)}:".encode())
+        sha.update(value)
+    elif np is not None and isinstance(value, np.ndarray):
+        sha.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        sha.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+    elif np is not None and isinstance(value, np.generic):
+        _update(sha, value.item(), depth)
+    elif isinstance(value, (list, tuple)):
+        sha.update(f"{type(value).__qualname__}:{len(value)}[".encode())
+        for item in value:
+            _update(sha, item, depth + 1)
+        sha.update(b"]")
+    elif isinstance(value, (set, frozenset)):
+        _update(sha, sorted(_item_hash(item, depth + 1) for item in value), depth + 1)
+    elif isinstance(value, dict):
+        _update(sha, sorted((_item_hash(key, depth + 1), _item_hash(item, depth + 1)) for key, item in value.items()),
+                depth + 1)
+    elif isinstance(value, _FUNCTION_TYPES):
+        sha.update(b"function:")
+        _update(sha, _function_key(value), depth + 1)
+    elif hasattr(value, "__dict__") or hasattr(value, "__slots__"):
+        if type(value).__module__.startswith("pptx."):
+            raise TypeError(f"Can not hash python-pptx object {type(value).__qualname__} - pass a key instead.")
+        attributes = dict(vars(value)) if hasattr(value, "__dict__") else {}
+        for name in getattr(type(value), "__slots__", ()):
+            if hasattr(value, name):
+                attributes[name] = getattr(value, name)
+        sha.update(f"{type(value).__module__}.{type(value).__qualname__}".encode())
+        _update(sha, {name: item for name, item in attributes.items() if not callable(item)}, depth + 1)
+    else:
+        raise TypeError(f"Can not hash build cache argument of type {type(value).__qualname__} - pass a key instead.")
+
+
+def _item_hash(value, depth: int) -> str:
+    """Hash of a single item (e.g. of a set or dict, to sort them independent of order)."""
+    sha = hashlib.sha256()
+    _update(sha, value, depth)
+    return sha.hexdigest()
+
+
+def input_hash(*values) -> str:
+    """Hash (sha256) of values by value (see module docstring)."""
+    return _item_hash(values, 0)
+
+
+def _code_key(code) -> tuple:
+    """Byte code, names and constants (nested functions included) - no memory addresses."""
+    consts = tuple(_code_key(const) if hasattr(const, "co_code") else repr(const) for const in code.co_consts)
+    return code.co_code, code.co_names, consts
+
+
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:  # empty cell
+        return _EMPTY_CELL
+
+
+def _function_key(function: Callable) -> tuple:
+    """
+    Key of a build function by value: byte code, default arguments and values of closure variables (functions),
+    wrapped function and arguments (functools.partial), function and instance (bound methods).
+    """
+    if isinstance(function, functools.partial):
+        return "partial", _function_key(function.func), function.args, function.keywords
+    if isinstance(function, types.MethodType):
+        return "method", _function_key(function.__func__), function.__self__
+    if isinstance(function, types.BuiltinFunctionType):
+        return "builtin", function.__module__, function.__qualname__
+    if isinstance(function, types.FunctionType):
+        closure = tuple(_cell_contents(cell) for cell in function.__closure__ or ())
+        return (function.__module__, function.__qualname__, _code_key(function.__code__), function.__defaults__,
+                function.__kwdefaults__, closure)
+    raise TypeError(f"Can not key build function of type {type(function).__qualname__} - use a function, method or "
+                    f"functools.partial.")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# cache
+# ----------------------------------------------------------------------------------------------------------------------
+class SlideBuildCache:
+    """Stores slide XML and images keyed on the inputs of the slide (see module docstring)."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """:param directory: cache directory (created if needed); None -> in-memory cache"""
+        self.directory = directory
+        self._memory: Dict[str, bytes] = {}
+        if directory is not None:
+            os.makedirs(os.path.join(directory, "media"), exist_ok=True)
+        self._layout_hashes: Dict[int, tuple] = {}  # id(layout part) -> (layout part, hash)
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.build_time = 0.0  # time spent building slides (misses and not cacheable slides)
+        self.restore_time = 0.0  # time spent adding cached slides
+        self.saved_time = 0.0  # build time (when stored) of all cached slides
+
+    # -- storage -------------------------------------------------------------------------------------------------------
+    def _read(self, name: str) -> Optional[bytes]:
+        if self.directory is None:
+            return self._memory.get(name)
+        try:
+            with open(os.path.join(self.directory, name), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, name: str, blob: bytes) -> None:
+        if self.directory is None:
+            self._memory[name] = blob
+            return
+        path = os.path.join(self.directory, name)
+        if name.startswith("media") and os.path.exists(path):  # content addressed
+            return
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(handle, "wb") as file:
+            file.write(blob)
+        os.replace(temp_path, path)  # atomic: parallel builds might use the same cache
+
+    # -- keys ----------------------------------------------------------------------------------------------------------
+    def _layout_hash(self, layout: SlideLayout) -> str:
+        part, layout_hash = self._layout_hashes.get(id(layout.part), (None, None))
+        if part is not layout.part:
+            sha = hashlib.sha256(etree.tostring(layout._element))
+            sha.update(etree.tostring(layout.slide_master._element))
+            layout_hash = sha.hexdigest()
+            self._layout_hashes[id(layout.part)] = (layout.part, layout_hash)
+        return layout_hash
+
+    def key(self, creator: 'PPTXCreator', title: str, layout: SlideLayout, build: Callable, args: tuple,
+            version=None) -> str:
+        return input_hash(CACHE_FORMAT, title, self._layout_hash(layout), int(creator.prs.slide_width),
+                          int(creator.prs.slide_height), _function_key(build), version, args)
+
+    # -- slides --------------------------------------------------------------------------------------------------------
+    def _store(self, key: str, slide: Slide, build_time: float) -> bool:
+        relationships = []
+        for r_id, rel in slide.part.rels.items():
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                continue
+            if rel.is_external:
+                relationships.append([r_id, rel.reltype, "external", rel.target_ref])
+            elif rel.reltype == RT.IMAGE and isinstance(rel.target_part, ImagePart):
+                sha1 = rel.target_part.sha1
+                self._write(os.path.join("media", sha1), rel.target_part.blob)
+                relationships.append([r_id, rel.reltype, "image", sha1])
+            else:
+                return False  # charts, media, notes slides ... are not cacheable
+        entry = {"xml": etree.tostring(slide._element, encoding="unicode"), "relationships": relationships,
+                 "build_time": build_time}
+        self._write(f"{key}.json", json.dumps(entry).encode("utf-8"))
+        return True
+
+    def _restore(self, entry: dict, slide: Slide) -> None:
+        part = slide.part
+        for r_id, reltype, kind, target in entry["relationships"]:
+            if kind == "external":
+                target_mode, target_part = RTM.EXTERNAL, target
+            else:
+                target_mode = RTM.INTERNAL
+                target_part = part.package.get_or_add_image_part(io.BytesIO(self._read(os.path.join("media", target))))
+            part.rels._rels[r_id] = _Relationship(part.rels._base_uri, r_id, reltype, target_mode, target_part)
+        element = slide._element
+        cached = parse_xml(entry["xml"].encode("utf-8"))
+        for child in list(element):
+            element.remove(child)
+        element.attrib.clear()
+        element.attrib.update(cached.attrib)
+        element.extend(list(cached))
+
+    def add_slide(self, creator: 'PPTXCreator', title: str, build: Callable, args: tuple,
+                  layout: Optional[SlideLayout] = None, version=None) -> Slide:
+        """Add a slide from cache or build it with build(creator, slide, *args) (see PPTXCreator.add_cached_slide)."""
+        layout = layout or creator.default_layout
+        start = time.perf_counter()
+        key = self.key(creator, title, layout, build, args, version)
+        blob = self._read(f"{key}.json")
+        slide = creator.add_slide(title, layout)
+        if blob is not None:
+            entry = json.loads(blob)
+            self._restore(entry, slide)
+            self.hits += 1
+            self.saved_time += entry["build_time"]
+            self.restore_time += time.perf_counter() - start
+            return slide
+
+        build(creator, slide, *args)
+        build_time = time.perf_counter() - start
+        self.build_time += build_time
+        if self._store(key, slide, build_time):
+            self.misses += 1
+        else:
+            self.uncacheable += 1
+        return slide
+
+    def report(self) -> dict:
+        """Cache statistics: hits, misses, not cacheable slides, hit rate, times [s] and estimated speedup."""
+        slides = self.hits + self.misses + self.uncacheable
+        total_time = self.build_time + self.restore_time
+        return {"slides": slides,
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": self.hits / slides if slides else 0.0,
+                "build_time": self.build_time,
+                "restore_time": self.restore_time,
+                "saved_time": self.saved_time,
+                "speedup": (total_time - self.restore_time + self.saved_time) / total_time if total_time else 1.0}
@@ -0,0 +1,351 @@
+"""
+This module provides native (editable) PowerPoint charts from numpy arrays or pandas objects (used by
+PPTXCreator.add_chart()), as an alternative to matplotlib figures embedded as PNG.
+
+- Series with more than max_points points are downsampled for display with LTTB (largest triangle three buckets),
+  which keeps the visual shape (peaks, steps) of a series with a small fraction of its points.
+- Chart XML is created by python-pptx for a one-point-per-series skeleton; the point caches are then written in
+  bulk (one string parsed per cache) instead of one element per point.
+- The embedded workbook (needed to edit the chart data in PowerPoint) is a minimal xlsx file written in blocks of
+  rows by this module - python-pptx would need xlsxwriter and write it cell by cell.
+Chart and workbook contain the displayed (downsampled) data. Non-finite values (nan, inf) are left out (gaps).
+@author: Nathanael Jöhrmann
+"""
+import importlib.util
+import io
+import zipfile
+from typing import Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# numpy is slow to import -> only imported when a chart is added
+has_numpy = importlib.util.find_spec("numpy") is not None
+
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.oxml.xmlchemy import BaseOxmlElement
+from pptx.parts.chart import ChartPart
+from pptx.shapes.graphfrm import GraphicFrame
+from pptx.slide import Slide
+from pptx.util import Inches
+
+from pptx_tools.zip_package import DEFAULT_DATE_TIME
+
+DEFAULT_MAX_POINTS = 1000  # max. displayed points per series (None: no downsampling)
+DEFAULT_CHART_WIDTH = Inches(6)
+DEFAULT_CHART_HEIGHT = Inches(4.5)
+XLSX_ROWS_PER_BLOCK = 10000  # rows written to the embedded workbook at once
+
+_XY_CHART_TYPES = {chart_type for chart_type in XL_CHART_TYPE if chart_type.name.startswith("XY_SCATTER")}
+_SHEET = "Sheet1"
+
+
+def _c(tag: str) -> str:
+    return qn(f"c:{tag}")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# downsampling
+# ----------------------------------------------------------------------------------------------------------------------
+def lttb_indices(x: Sequence[float], y: Sequence[float], threshold: int) -> 'np.ndarray':
+    """
+    Indices of the points selected by LTTB (largest triangle three buckets) to display the series (x, y) with
+    threshold points. First and last point are always selected. x should be sorted.
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Downsampling needs module numpy to be installed.")
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # bucket i (of threshold - 2 buckets) holds points edges[i]:edges[i + 1]; first and last point are extra
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(int) + 1
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])
+
+    result = np.empty(threshold, dtype=int)
+    result[0], result[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        # doubled triangle areas (selected point, candidate, mean of next bucket)
+        areas = np.abs((x[selected] - next_x) * (y[start:stop] - y[selected])
+                       - (x[selected] - x[start:stop]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        result[bucket + 1] = selected
+    return result
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# input data
+# ----------------------------------------------------------------------------------------------------------------------
+def _series_data(y, x=None, series_names: Optional[Sequence[str]] = None) -> Tuple['np.ndarray', List[str], any]:
+    """
+    Returns values (points x series), series names and x values for y (1d/2d array, pandas Series/DataFrame
+    or dict name -> values). x defaults to the pandas index or 0 ... n-1.
+    """
+    import numpy as np
+    names = None
+    if hasattr(y, "columns") and hasattr(y, "to_numpy"):  # pandas DataFrame
+        names = [f"{column}" for column in y.columns]
+        if x is None:
+            x = y.index.to_numpy()
+        values = y.to_numpy(dtype=float)
+    elif hasattr(y, "index") and hasattr(y, "to_numpy"):  # pandas Series
+        names = None if y.name is None else [f"{y.name}"]
+        if x is None:
+            x = y.index.to_numpy()
+        values = y.to_numpy(dtype=float)[:, np.newaxis]
+    elif isinstance(y, dict):
+        names = [f"{name}" for name in y]
+        values = np.column_stack([np.asarray(column, dtype=float) for column in y.values()])
+    else:
+        values = np.asarray(y, dtype=float)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+    if values.ndim != 2:
+        raise ValueError("y has to be one- or two-dimensional (points x series).")
+
+    if series_names is not None:
+        names = [f"{name}" for name in series_names]
+    if names is None:
+        names = [f"Series {index + 1}" for index in range(values.shape[1])]
+    if len(names) != values.shape[1]:
+        raise ValueError(f"Got {len(names)} series names for {values.shape[1]} series.")
+
+    if x is None:
+        x = np.arange(len(values))
+    x = np.asarray(x)
+    if len(x) != len(values):
+        raise ValueError(f"x has {len(x)} values, but y has {len(values)} points.")
+    return values, names, x
+
+
+def _displayed_indices(x: 'np.ndarray', y: 'np.ndarray', max_points: Optional[int]) -> 'np.ndarray':
+    """Indices of the displayed points of series (x, y): finite points, downsampled to max_points (LTTB)."""
+    import numpy as np
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if max_points is None:
+        return finite
+    return finite[lttb_indices(x[finite], y[finite], max_points)]
+
+
+def _category_indices(values: 'np.ndarray', max_points: Optional[int]) -> 'np.ndarray':
+    """Indices of displayed categories: union of LTTB points of all series."""
+    import numpy as np
+    if max_points is None or len(values) <= max_points:
+        return np.arange(len(values))
+    positions = np.arange(len(values), dtype=float)
+    selected = []
+    for column in values.T:
+        finite = np.flatnonzero(np.isfinite(column))
+        selected.append(finite[lttb_indices(positions[finite], column[finite], max_points)])
+    return np.unique(np.concatenate(selected))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# bulk writers
+# ----------------------------------------------------------------------------------------------------------------------
+def _number_strings(values: 'np.ndarray') -> List[Optional[str]]:
+    """Shortest round trip strings of values; None for non-finite values."""
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    strings = list(map(repr, values.tolist()))  # faster than numpy's astype(str)
+    if not finite.all():
+        strings = [string if is_finite else None for string, is_finite in zip(strings, finite.tolist())]
+    return strings
+
+
+def _cell_strings(values) -> Tuple[List[Optional[str]], bool]:
+    """Returns xml escaped strings of values and whether the values are numbers."""
+    import numpy as np
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return _number_strings(values), True
+    return [escape(f"{value}") for value in values.tolist()], False
+
+
+def _column_name(index: int) -> str:
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA' ..."""
+    result = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        result = chr(65 + remainder) + result
+    return result
+
+
+def _range_ref(col: int, first_row: int, last_row: int) -> str:
+    column = _column_name(col)
+    return f"{_SHEET}!${column}${first_row}:${column}${max(first_row, last_row)}"
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>')
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>')
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    f'<sheets><sheet name="{_SHEET}" sheetId="1" r:id="rId1"/></sheets></workbook>')
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '</Relationships>')
+
+
+def xlsx_blob(columns: Sequence[Tuple[str, Sequence[Optional[str]], bool]]) -> bytes:
+    """
+    Returns a minimal xlsx file with one sheet. columns: (header, xml escaped cell strings, is_number) per column;
+    headers are written to row 1, cells from row 2 on (None -> empty cell). Rows are written in blocks.
+    """
+    rows = max((len(cells) for _, cells, _ in columns), default=0)
+    letters = [_column_name(index) for index in range(len(columns))]
+    output = io.BytesIO()
+    # not compressed - the workbook is compressed when the presentation is saved; fixed timestamps (deterministic)
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as xlsx:
+        for name, text in (("[Content_Types].xml", _XLSX_CONTENT_TYPES), ("_rels/.rels", _XLSX_RELS),
+                           ("xl/workbook.xml", _XLSX_WORKBOOK), ("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)):
+            xlsx.writestr(zipfile.ZipInfo(name, DEFAULT_DATE_TIME), text)
+        with xlsx.open(zipfile.ZipInfo("xl/worksheets/sheet1.xml", DEFAULT_DATE_TIME), "w") as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            header = "".join(f'<c r="{letter}1" t="inlineStr"><is><t>{escape(name)}</t></is></c>'
+                             for letter, (name, _, _) in zip(letters, columns))
+            sheet.write(f'<row r="1">{header}</row>'.encode())
+            for start in range(0, rows, XLSX_ROWS_PER_BLOCK):
+                row_numbers = range(start + 2, min(rows, start + XLSX_ROWS_PER_BLOCK) + 2)
+                column_cells = []
+                for letter, (_, cells, is_number) in zip(letters, columns):
+                    template = '<c r="%s%d"><v>%s</v></c>' if is_number else \
+                        '<c r="%s%d" t="inlineStr"><is><t>%s</t></is></c>'
+                    block = [template % (letter, row, cell) if cell is not None else ""
+                             for row, cell in zip(row_numbers, cells[start:start + XLSX_ROWS_PER_BLOCK])]
+                    column_cells.append(block + [""] * (len(row_numbers) - len(block)))
+                sheet.write("".join([f'<row r="{row}">{"".join(cells)}</row>'
+                                     for row, cells in zip(row_numbers, zip(*column_cells))]).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    return output.getvalue()
+
+
+def _replace_cache(ref: BaseOxmlElement, formula: str, cells: Sequence[Optional[str]]) -> None:
+    """Set formula of a c:numRef/c:strRef and replace its cache with cells (None -> no point)."""
+    ref.find(_c("f")).text = formula
+    old_cache = ref[1]
+    format_code = old_cache.find(_c("formatCode"))
+    points = "".join(f'<c:pt idx="{index}"><c:v>{cell}</c:v></c:pt>'
+                     for index, cell in enumerate(cells) if cell is not None)
+    format_xml = "" if format_code is None else f"<c:formatCode>{escape(format_code.text or '')}</c:formatCode>"
+    tag = old_cache.tag.rsplit("}", 1)[-1]
+    new_cache = parse_xml(f'<c:{tag} {nsdecls("c")}>{format_xml}<c:ptCount val="{len(cells)}"/>{points}</c:{tag}>')
+    ref.replace(old_cache, new_cache)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# charts
+# ----------------------------------------------------------------------------------------------------------------------
+def _xy_chart(chart_type, values: 'np.ndarray', names: List[str], x: 'np.ndarray',
+              max_points: Optional[int]) -> Tuple[BaseOxmlElement, bytes]:
+    """Chart XML and workbook of a XY chart; series i uses workbook columns 2i (x) and 2i + 1 (y)."""
+    if x.dtype.kind not in "biuf":
+        raise ValueError("XY charts need numeric x values (use a category chart type for other x values).")
+    x = x.astype(float)
+    all_x_cells = None  # formatted once for all series showing all points
+    chart_data = XyChartData()
+    series_data = []
+    for name, column in zip(names, values.T):
+        indices = _displayed_indices(x, column, max_points)
+        if len(indices) == len(x):
+            if all_x_cells is None:
+                all_x_cells = _number_strings(x)
+            x_cells = all_x_cells
+        else:
+            x_cells = _number_strings(x[indices])
+        series_data.append((x_cells, _number_strings(column[indices])))
+        chart_data.add_series(name).add_data_point(0, 0)
+    chart = parse_xml(chart_data.xml_bytes(chart_type))
+
+    columns = []
+    for index, (ser, name, (x_cells, y_cells)) in enumerate(zip(chart.iter(_c("ser")), names, series_data)):
+        ser.find(_c("tx")).find(_c("strRef")).find(_c("f")).text = f"{_SHEET}!${_column_name(2 * index + 1)}$1"
+        _replace_cache(ser.find(_c("xVal"))[0], _range_ref(2 * index, 2, len(x_cells) + 1), x_cells)
+        _replace_cache(ser.find(_c("yVal"))[0], _range_ref(2 * index + 1, 2, len(y_cells) + 1), y_cells)
+        columns.extend([("x", x_cells, True), (name, y_cells, True)])
+    return chart, xlsx_blob(columns)
+
+
+def _category_chart(chart_type, values: 'np.ndarray', names: List[str], x: 'np.ndarray',
+                    max_points: Optional[int]) -> Tuple[BaseOxmlElement, bytes]:
+    """Chart XML and workbook of a category chart; categories in workbook column 0, series i in column i + 1."""
+    indices = _category_indices(values, max_points)
+    categories, categories_are_numbers = _cell_strings(x[indices])
+    chart_data = CategoryChartData()
+    chart_data.categories = [x[indices[0]].item() if categories_are_numbers else categories[0]] if len(x) else []
+    for name in names:
+        chart_data.add_series(name, [0] * len(chart_data.categories))
+    chart = parse_xml(chart_data.xml_bytes(chart_type))
+
+    columns = [("", categories, categories_are_numbers)]
+    last_row = len(indices) + 1
+    for index, (ser, name, column) in enumerate(zip(chart.iter(_c("ser")), names, values.T)):
+        cells = _number_strings(column[indices])
+        ser.find(_c("tx")).find(_c("strRef")).find(_c("f")).text = f"{_SHEET}!${_column_name(index + 1)}$1"
+        _replace_cache(ser.find(_c("cat"))[0], _range_ref(0, 2, last_row), categories)
+        _replace_cache(ser.find(_c("val"))[0], _range_ref(index + 1, 2, last_row), cells)
+        columns.append((name, cells, True))
+    return chart, xlsx_blob(columns)
+
+
+def add_chart(slide: Slide, y, x=None, left: int = 0, top: int = 0, width: int = DEFAULT_CHART_WIDTH,
+              height: int = DEFAULT_CHART_HEIGHT, chart_type: XL_CHART_TYPE = XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS,
+              series_names: Optional[Iterable[str]] = None, title: Optional[str] = None,
+              max_points: Optional[int] = DEFAULT_MAX_POINTS) -> GraphicFrame:
+    """
+    Add a native chart of y (1d/2d array with one series per column, pandas Series/DataFrame or dict name -> values)
+    over x (default: pandas index or 0 ... n-1) to slide. x are the x values of XY (scatter) chart types, and the
+    categories of other chart types. Series are downsampled to max_points points (LTTB) for display.
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Adding a chart needs module numpy to be installed.")
+    if chart_type in (XL_CHART_TYPE.BUBBLE, XL_CHART_TYPE.BUBBLE_THREE_D_EFFECT):
+        raise ValueError("Bubble charts are not supported.")
+    values, names, x = _series_data(y, x, None if series_names is None else list(series_names))
+    if chart_type in _XY_CHART_TYPES:
+        chart_element, workbook = _xy_chart(chart_type, values, names, x, max_points)
+    else:
+        chart_element, workbook = _category_chart(chart_type, values, names, x, max_points)
+
+    package = slide.part.package
+    chart_part = ChartPart(package.next_partname(ChartPart.partname_template), CT.DML_CHART, package, chart_element)
+    chart_part.chart_workbook.update_from_xlsx_blob(workbook)
+    r_id = slide.part.relate_to(chart_part, RT.CHART)
+    graphic_frame = slide.shapes._add_chart_graphicFrame(r_id, left, top, width, height)
+    shape = slide.shapes._shape_factory(graphic_frame)
+    if title is not None:
+        shape.chart.has_title = True
+        shape.chart.chart_title.text_frame.text = title
+    return shape
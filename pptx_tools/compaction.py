@@ -0,0 +1,144 @@
+"""
+This module provides a compaction pass for *.pptx files (used by PPTXCreator.save(compact=True), but also usable on
+existing files). It removes duplicate media (identical content), drops parts that are not reachable via any
+relationship and optionally downsamples images to a maximum resolution at their (largest) displayed size.
+The package is streamed part by part from the source zip into the destination zip.
+@author: Nathanael Jöhrmann
+"""
+import posixpath
+import zipfile
+from typing import Dict, IO, Optional, Union
+
+from lxml import etree
+
+from pptx_tools import media
+from pptx_tools.zip_package import RELATIONSHIPS_NS, hash_part, iter_image_sizes, rels_name, rels_source, \
+    resolve_target
+
+_CHUNK_SIZE = 2 ** 20
+_CONTENT_TYPES = "[Content_Types].xml"
+_CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_DOWNSAMPLE_FORMATS = (".png", ".jpg", ".jpeg")  # formats that are re-encoded without changing the part name
+
+
+def _relative_target(source: str, target: str) -> str:
+    return posixpath.relpath(target, posixpath.dirname(source) or ".")
+
+
+def _copy_part(source_zip: zipfile.ZipFile, destination_zip: zipfile.ZipFile, name: str) -> None:
+    with source_zip.open(name) as source, destination_zip.open(name, "w") as destination:
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            destination.write(chunk)
+
+
+def compact_pptx(source: Union[str, IO[bytes]], destination: Union[str, IO[bytes]],
+                 max_dpi: Optional[float] = None, jpeg_quality: int = 85) -> dict:
+    """
+    Write a compacted copy of the *.pptx file source to destination (filenames or binary file objects):
+        - media parts with identical content are merged (relationships are redirected to the first part)
+        - parts not reachable from the package relationships are dropped (including their rels)
+        - if max_dpi is given, PNG/JPEG images with a higher resolution at their largest displayed size are
+          downsampled (see media.downsample_image); the displayed size of cropped pictures is scaled to the
+          uncropped image, images also used as shape, background or table cell fill are left unchanged
+    Returns statistics: merged duplicates, removed parts, downsampled images and total compressed sizes.
+    """
+    with zipfile.ZipFile(source) as source_zip:
+        infos = {info.filename: info for info in source_zip.infolist() if not info.is_dir()}
+        rels_trees = {}
+        for name in infos:
+            if name.endswith(".rels"):
+                with source_zip.open(name) as file:
+                    rels_trees[name] = etree.parse(file)
+
+        # -- merge duplicate media: redirect all relationships to the first part with identical content --
+        canonical_media: Dict[str, str] = {}  # sha1 -> part name
+        duplicates: Dict[str, str] = {}  # duplicate part name -> canonical part name
+        for name in infos:
+            if name.startswith("ppt/media/"):
+                canonical = canonical_media.setdefault(hash_part(source_zip, name), name)
+                if canonical != name:
+                    duplicates[name] = canonical
+
+        relationships: Dict[str, list] = {}  # source part -> [(relationship element, resolved target)]
+        for name, tree in rels_trees.items():
+            part_name = rels_source(name)
+            relationships[part_name] = []
+            for relationship in tree.getroot().iterchildren(f"{{{RELATIONSHIPS_NS}}}Relationship"):
+                if relationship.get("TargetMode") == "External":
+                    continue
+                target = resolve_target(part_name, relationship.get("Target"))
+                if target in duplicates:
+                    target = duplicates[target]
+                    relationship.set("Target", _relative_target(part_name, target))
+                relationships[part_name].append((relationship, target))
+
+        # -- find all parts reachable from the package relationships (_rels/.rels) --
+        reachable = set()
+        to_visit = [""]
+        while to_visit:
+            part_name = to_visit.pop()
+            for _, target in relationships.get(part_name, []):
+                if target not in reachable and target in infos:
+                    reachable.add(target)
+                    to_visit.append(target)
+        kept_rels = {rels_name(part_name) if part_name else "_rels/.rels" for part_name in reachable | {""}}
+        removed_parts = sorted(name for name in infos if name != _CONTENT_TYPES and name not in reachable
+                               and name not in kept_rels)
+
+        # -- find largest displayed size of every image (images also used as fill are not downsampled) --
+        displayed_sizes: Dict[str, tuple] = {}
+        fill_images = set()
+        if max_dpi is not None:
+            for part_name in reachable:
+                if not part_name.endswith(".xml") or part_name.startswith("ppt/media/"):
+                    continue
+                targets = {relationship.get("Id"): target for relationship, target in relationships.get(part_name, [])}
+                for r_id, size in iter_image_sizes(source_zip, part_name):
+                    image_name = targets.get(r_id)
+                    if image_name is None:
+                        continue
+                    if size is None:
+                        fill_images.add(image_name)
+                    else:
+                        old_cx, old_cy = displayed_sizes.get(image_name, (0, 0))
+                        displayed_sizes[image_name] = (max(old_cx, size[0]), max(old_cy, size[1]))
+            for image_name in fill_images:
+                displayed_sizes.pop(image_name, None)
+
+        # -- write compacted package --
+        content_types = _compacted_content_types(source_zip, set(removed_parts))
+        downsampled_images = []
+        with zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as destination_zip:
+            destination_zip.writestr(_CONTENT_TYPES, content_types)
+            for name, info in infos.items():
+                if name == _CONTENT_TYPES or name in removed_parts:
+                    continue
+                if name in rels_trees:
+                    destination_zip.writestr(name, etree.tostring(rels_trees[name], xml_declaration=True,
+                                                                  encoding="UTF-8", standalone=True))
+                elif name in displayed_sizes and name.lower().endswith(_DOWNSAMPLE_FORMATS):
+                    blob = source_zip.read(name)
+                    size = media.target_pixel_size(blob, *displayed_sizes[name], max_dpi)
+                    if size is not None:
+                        blob = media.downsample_image(blob, size, jpeg_quality)
+                        downsampled_images.append({"part": name, "size": size})
+                    destination_zip.writestr(name, blob)
+                else:
+                    _copy_part(source_zip, destination_zip, name)
+            bytes_after = sum(info.compress_size for info in destination_zip.infolist())
+
+    return {"duplicates_merged": duplicates,
+            "removed_parts": removed_parts,
+            "downsampled_images": downsampled_images,
+            "bytes_before": sum(info.compress_size for info in infos.values()),
+            "bytes_after": bytes_after}
+
+
+def _compacted_content_types(source_zip: zipfile.ZipFile, removed_parts: set) -> bytes:
+    """Returns [Content_Types].xml without Override entries for removed parts."""
+    with source_zip.open(_CONTENT_TYPES) as file:
+        tree = etree.parse(file)
+    for override in list(tree.getroot().iterchildren(f"{{{_CONTENT_TYPES_NS}}}Override")):
+        if override.get("PartName").lstrip("/") in removed_parts:
+            tree.getroot().remove(override)
+    return etree.tostring(tree, xml_declaration=True, encoding="UTF-8", standalone=True)
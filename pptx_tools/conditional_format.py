@@ -0,0 +1,228 @@
+"""
+This module provides conditional formats for tables (used via PPTXTableStyle.conditional_formats).
+Conditions are evaluated vectorized (numpy) over the table values, and all fills/fonts are written in one batch
+directly to the table XML (a:tcPr and a:rPr), instead of creating a PPTXCellStyle for every single cell.
+@author: Nathanael Jöhrmann
+"""
+import importlib.util
+from abc import abstractmethod
+from typing import Optional, Sequence, Tuple, Union, Callable, Iterable
+
+# numpy is slow to import -> only imported when conditional formats are evaluated
+has_numpy = importlib.util.find_spec("numpy") is not None
+
+from pptx.dml.color import RGBColor
+from pptx.oxml.ns import qn
+from pptx.table import Table
+
+from pptx_tools.better_abc import ABCMeta, abstract_attribute
+from pptx_tools.fill_style import PPTXFillStyle, heat_map_fill_styles
+from pptx_tools.font_style import PPTXFontStyle
+
+
+class PPTXConditionalFormat(metaclass=ABCMeta):
+    """
+    Base class for conditional formats. Subclasses have to implement mask(), returning a boolean array
+    with the same shape as values. All cells with True are formatted with fill_style and/or font_style.
+    """
+
+    def __init__(self, fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        self.fill_style = fill_style
+        self.font_style = font_style
+
+    @abstractmethod
+    def mask(self, values: 'np.ndarray') -> 'np.ndarray':
+        pass
+
+    def fill_styles(self, values: 'np.ndarray') -> Union[PPTXFillStyle, 'np.ndarray', None]:
+        """Returns the fill style for all masked cells (or an object array with one fill style per cell)."""
+        return self.fill_style
+
+
+class ThresholdFormat(PPTXConditionalFormat):
+    """Format all cells with min_value <= value <= max_value (None means no limit)."""
+
+    def __init__(self, min_value: Optional[float] = None, max_value: Optional[float] = None,
+                 fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(fill_style, font_style)
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def mask(self, values):
+        import numpy as np
+        result = ~np.isnan(values)
+        if self.min_value is not None:
+            result &= values >= self.min_value
+        if self.max_value is not None:
+            result &= values <= self.max_value
+        return result
+
+
+class TopNFormat(PPTXConditionalFormat):
+    """Format the n largest (or smallest, if largest is False) values of the table."""
+
+    def __init__(self, n: int, largest: bool = True,
+                 fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(fill_style, font_style)
+        self.n = n
+        self.largest = largest
+
+    def mask(self, values):
+        import numpy as np
+        flat_values = values.ravel()
+        valid_indices = np.flatnonzero(~np.isnan(flat_values))
+        n = min(self.n, len(valid_indices))
+        result = np.zeros(flat_values.shape, dtype=bool)
+        if n > 0:
+            valid_values = flat_values[valid_indices] if self.largest else -flat_values[valid_indices]
+            result[valid_indices[np.argpartition(-valid_values, n - 1)[:n]]] = True
+        return result.reshape(values.shape)
+
+
+class AxisFormat(PPTXConditionalFormat):
+    """
+    Base class of RowFormat and ColumnFormat: format whole rows (_axis = 0) or columns (_axis = 1). selection is either
+    a sequence of indices, or a function taking the 2D values array and returning a boolean array with one entry per
+    row/column.
+    """
+
+    @abstract_attribute
+    def _axis(cls) -> int:
+        pass
+
+    def __init__(self, selection: Union[Sequence[int], Callable[['np.ndarray'], 'np.ndarray']],
+                 fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(fill_style, font_style)
+        self.selection = selection
+
+    def mask(self, values):
+        import numpy as np
+        if callable(self.selection):
+            selected = np.asarray(self.selection(values), dtype=bool)
+        else:
+            selected = np.zeros(values.shape[self._axis], dtype=bool)
+            selected[list(self.selection)] = True
+        if self._axis == 0:
+            return np.broadcast_to(selected[:, np.newaxis], values.shape)
+        return np.broadcast_to(selected[np.newaxis, :], values.shape)
+
+
+class RowFormat(AxisFormat):
+    """Format whole rows, e.g. RowFormat(lambda values: np.nansum(values, axis=1) > 10) (see AxisFormat)."""
+    _axis = 0
+
+    def __init__(self, rows: Union[Sequence[int], Callable[['np.ndarray'], 'np.ndarray']],
+                 fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(rows, fill_style, font_style)
+
+    @property
+    def rows(self) -> Union[Sequence[int], Callable[['np.ndarray'], 'np.ndarray']]:
+        return self.selection
+
+
+class ColumnFormat(AxisFormat):
+    """Format whole columns, e.g. ColumnFormat([0]) (see AxisFormat)."""
+    _axis = 1
+
+    def __init__(self, cols: Union[Sequence[int], Callable[['np.ndarray'], 'np.ndarray']],
+                 fill_style: Optional[PPTXFillStyle] = None, font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(cols, fill_style, font_style)
+
+    @property
+    def cols(self) -> Union[Sequence[int], Callable[['np.ndarray'], 'np.ndarray']]:
+        return self.selection
+
+
+class ColormapFormat(PPTXConditionalFormat):
+    """Color all numeric cells using a colormap (see fill_style.heat_map_fill_styles)."""
+
+    def __init__(self, color_stops: Sequence[Tuple[float, Union[RGBColor, Tuple[int, int, int]]]],
+                 v_min: Optional[float] = None, v_max: Optional[float] = None,
+                 font_style: Optional[PPTXFontStyle] = None):
+        super().__init__(None, font_style)
+        self.color_stops = color_stops
+        self.v_min = v_min
+        self.v_max = v_max
+
+    def mask(self, values):
+        import numpy as np
+        return ~np.isnan(values)
+
+    def fill_styles(self, values):
+        import numpy as np
+        if np.isnan(values).all():
+            return None
+        return np.array(heat_map_fill_styles(values, self.color_stops, self.v_min, self.v_max), dtype=object)
+
+
+def table_values(table: Table, table_data: Optional[Iterable[Iterable[any]]] = None) -> 'np.ndarray':
+    """
+    Returns a float array (rows x cols) with all table values. Entries that are not numeric are nan.
+    If table_data is not given, the values are read from the cell texts. table_data may be smaller than the table
+    (missing values are nan) - raises ValueError, if it has more rows or columns than the table.
+    """
+    import numpy as np
+    rows, cols = len(table.rows), len(table.columns)
+    if table_data is not None:
+        table_data = [list(row) for row in table_data]
+        if len(table_data) > rows or any(len(row) > cols for row in table_data):
+            raise ValueError(f"table_data ({len(table_data)} rows, max. {max(map(len, table_data), default=0)} "
+                             f"columns) does not fit into the table ({rows} rows, {cols} columns).")
+        try:
+            values = np.asarray(table_data, dtype=float)
+            if values.shape == (rows, cols):
+                return values
+        except (TypeError, ValueError):
+            pass
+    else:
+        t_tag = qn("a:t")
+        table_data = [["".join(t.text or "" for t in tc.iter(t_tag)) for tc in tr.tc_lst] for tr in table._tbl.tr_lst]
+
+    values = np.full((rows, cols), np.nan)
+    for ir, row in enumerate(table_data):
+        for ic, entry in enumerate(row):
+            try:
+                values[ir, ic] = float(entry)
+            except (TypeError, ValueError):
+                pass
+    return values
+
+
+def write_conditional_formats(table: Table, conditional_formats: Sequence[PPTXConditionalFormat],
+                              table_data: Optional[Iterable[Iterable[any]]] = None) -> None:
+    """
+    Evaluate all conditional_formats (later formats override earlier ones) and write the resulting fills and fonts
+    to the table. Every distinct style is created only once and copied to all cells using it.
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Conditional formats need module numpy to be installed.")
+
+    import numpy as np
+    values = table_values(table, table_data)
+    cell_fills = np.full(values.shape, None, dtype=object)
+    cell_fonts = np.full(values.shape, None, dtype=object)
+    for conditional_format in conditional_formats:
+        mask = conditional_format.mask(values)
+        fill_styles = conditional_format.fill_styles(values)
+        if fill_styles is not None:
+            cell_fills[mask] = fill_styles[mask] if isinstance(fill_styles, np.ndarray) else fill_styles
+        if conditional_format.font_style is not None:
+            cell_fonts[mask] = conditional_format.font_style
+
+    tc_elements = [tr.tc_lst for tr in table._tbl.tr_lst]
+    for fill_style, cells in _group_cells(cell_fills):
+        fill_style.write_fill_elements(tc_elements[ir][ic].get_or_add_tcPr() for ir, ic in cells)
+
+    r_tag = qn("a:r")
+    for font_style, cells in _group_cells(cell_fonts):
+        font_style.write_rPr_elements(r.get_or_add_rPr() for ir, ic in cells for r in tc_elements[ir][ic].iter(r_tag))
+
+
+def _group_cells(cell_styles: 'np.ndarray'):
+    """Yields (style, list of (row, col)) for all distinct styles in cell_styles."""
+    import numpy as np
+    groups = {}
+    for ir, ic in zip(*np.nonzero(np.not_equal(cell_styles, None))):
+        style = cell_styles[ir, ic]
+        groups.setdefault(id(style), (style, []))[1].append((ir, ic))
+    yield from groups.values()
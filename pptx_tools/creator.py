@@ -2,29 +2,32 @@
 This module provides an easier Interface to create *.pptx presentations using the module python-pptx.
 @author: Nathanael Jöhrmann
 """
+import importlib.util
 import io
+import mmap
 import os
 from pathlib import Path, PurePath
-from typing import Type, Optional, Iterable, Union
+from typing import IO, Callable, Type, Optional, Iterable, List, Union
 
-from pptx_tools import utils
+from pptx_tools import utils, media, build_cache, charts, compaction, snapshot, slide_import, table_pagination, \
+    text_metrics, text_replace, zip_package
+from pptx_tools.instrumentation import instrumented, count_slide, count_shape, count_picture, count_table, \
+    count_saved_bytes
 from pptx_tools.position import PPTXPosition
 from pptx_tools.table_style import PPTXTableStyle
 
-try:
-    from matplotlib.figure import Figure
-    import matplotlib.pyplot as plt
-
-    has_matplotlib = True
-except ImportError as e:
-    has_matplotlib = False
+# matplotlib is slow to import -> only imported when a formula is rendered
+has_matplotlib = importlib.util.find_spec("matplotlib") is not None
 
 import pptx
+from pptx.enum.chart import XL_CHART_TYPE
 from pptx.enum.text import MSO_AUTO_SIZE
 from pptx.presentation import Presentation
 from pptx.shapes.autoshape import Shape
+from pptx.shapes.graphfrm import GraphicFrame
 from pptx.shapes.picture import Picture
 from pptx.slide import Slide, SlideLayout
+from pptx.table import _Cell
 from pptx.text.text import _Run
 from pptx.util import Inches
 
@@ -43,8 +46,10 @@ class PPTXCreator:
     # disable typechecker, because None values are not allowed for attributes, but needed to create them in __init__
     # Correct values are set when calling self._create_presentation()
     # noinspection PyTypeChecker
-    def __init__(self, template: Optional[AbstractTemplate] = None):
+    def __init__(self, template: Optional[AbstractTemplate] = None,
+                 build_cache: Optional['build_cache.SlideBuildCache'] = None):
         self.slides: list = []
+        self.build_cache = build_cache
         self.template: Type[AbstractTemplate] = None
         self.prs: Presentation = None
         self.title_layout: SlideLayout = None
@@ -88,6 +93,7 @@ class PPTXCreator:
             layout = self.title_layout
         return self.add_slide(title, layout)
 
+    @instrumented("PPTXCreator.add_slide", count_slide)
     def add_slide(self, title: str, layout: SlideLayout = None) -> Slide:
         """Add a new slide to presentation. If no layout is given, default_layout is used."""
         if not layout:
@@ -98,27 +104,88 @@ class PPTXCreator:
         self.remove_unpopulated_shapes(slide)
         return slide
 
-    def add_image(self, file: Union[Path, io.BytesIO], slide: Slide,
+    def add_cached_slide(self, title: str, build: Callable, *args, layout: SlideLayout = None, version=None) -> Slide:
+        """
+        Add a new slide and fill it with build(self, slide, *args). If self.build_cache is set, a slide built before
+        with equal title, layout, build function and args (compared by value, e.g. data, styles, positions, figure keys)
+        is taken from the cache instead of calling build (see build_cache.py). Change version to invalidate cached
+        slides, e.g. after changing functions called by build.
+        """
+        if self.build_cache is None:
+            slide = self.add_slide(title, layout)
+            build(self, slide, *args)
+            return slide
+        return self.build_cache.add_slide(self, title, build, args, layout, version)
+
+    @instrumented("PPTXCreator.add_image", count_picture)
+    def add_image(self, file: Union[Path, io.BytesIO, bytes, memoryview, 'mmap.mmap', media.MediaFile], slide: Slide,
                   position: PPTXPosition = None,
                   zoom: float = 1.0,
+                  target_dpi: Optional[float] = None,
+                  jpeg_quality: int = 85,
                   **kwargs) -> Picture:
         """
         Add an image from disk or io.BytesIO() to slide, and position it via position.
         Optional parameter zoom sets image scaling in PowerPoint. Only used if width not in kwargs (default = 1.0).
+        If target_dpi is given, images with a higher resolution (at their displayed size) are downsampled before
+        embedding (JPEG is re-encoded with jpeg_quality, other formats as optimized PNG). The displayed size stays
+        the same.
+        Buffers (bytes, memoryview, mmap) are embedded without copy. Use media.MediaFile(path) for large images:
+        they are hashed in chunks and streamed from disk when the presentation is saved (see media.py).
         """
         # python-pptx (v0.6.18) can not handle Path object
         if isinstance(file, PurePath):
             file = str(file)
+        elif isinstance(file, (bytes, bytearray, memoryview, mmap.mmap)):
+            file = media.MediaFile(file)
+
+        if target_dpi is not None:
+            file = self._downsample_image(file, zoom, target_dpi, jpeg_quality, kwargs)
 
         if not position:
             position = self.default_position
         kwargs.update(position.dict())
 
-        pic = slide.shapes.add_picture(file, **kwargs)  # 0, 0)#, left, top)
+        if isinstance(file, media.MediaFile):
+            pic = media.add_picture(slide, file, **kwargs)
+        else:
+            pic = slide.shapes.add_picture(file, **kwargs)  # 0, 0)#, left, top)
         pic.width = round(pic.width * zoom)
         pic.height = round(pic.height * zoom)
         return pic
 
+    @staticmethod
+    def _downsample_image(file: Union[str, io.BytesIO, media.MediaFile], zoom: float, target_dpi: float,
+                          jpeg_quality: int, kwargs: dict) -> Union[io.BytesIO, media.MediaFile]:
+        """
+        Used by add_image() to downsample file to target_dpi at its displayed size.
+        Sets width and height in kwargs, to keep the displayed size of the original image.
+        """
+        if isinstance(file, str):
+            with open(file, "rb") as image_file:
+                blob = image_file.read()
+        elif isinstance(file, media.MediaFile):
+            blob = bytes(file.read())
+        else:
+            file.seek(0)
+            blob = file.read()
+
+        native_width, native_height = media.native_size(blob)
+        width, height = kwargs.get("width"), kwargs.get("height")
+        if width is None and height is None:
+            width, height = native_width, native_height
+        elif width is None:
+            width = round(native_width * height / native_height)
+        elif height is None:
+            height = round(native_height * width / native_width)
+        kwargs["width"], kwargs["height"] = width, height
+
+        size = media.target_pixel_size(blob, round(width * zoom), round(height * zoom), target_dpi)
+        if size is None:
+            return file if isinstance(file, media.MediaFile) else io.BytesIO(blob)
+        return io.BytesIO(media.downsample_image(blob, size, jpeg_quality))
+
+    @instrumented("PPTXCreator.add_matplotlib_figure")
     def add_matplotlib_figure(self, fig: 'Figure', slide: Slide,
                               position: PPTXPosition = None,
                               zoom: float = 1.0,
@@ -136,29 +203,65 @@ class PPTXCreator:
             pic = self.add_image(output, slide, position, zoom, **kwargs)  # 0, 0)#, left, top)
         return pic
 
+    @instrumented("PPTXCreator.add_latex_formula")
     def add_latex_formula(self, formula: str, slide: Slide, position: PPTXPosition = None, dpi: int = 150,
                           font_size: int = 18, color: str = "black", alpha: float = 0.0, **kwargs) -> Picture:
         """
         Add the given latex-like math-formula as an image to the presentation using matplotlib.
         """
+        figure = self.latex_formula_figure(formula, dpi, font_size, color, alpha, **kwargs)
+        return self.add_matplotlib_figure(figure, slide, position)
+
+    @staticmethod
+    def latex_formula_figure(formula: str, dpi: int = 150, font_size: int = 18, color: str = "black",
+                             alpha: float = 0.0, **kwargs) -> 'Figure':
+        """
+        Returns a matplotlib figure showing the given latex-like math-formula (used by add_latex_formula).
+        Uses matplotlib's object oriented API (no pyplot state), so it can also be called from worker threads.
+        """
         if not has_matplotlib:
             raise ModuleNotFoundError("Adding a latex-like formula needs module matplotlib to be installed.")
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
 
-        figure: plt.Figure = plt.figure(figsize=(20, 20), dpi=dpi)
+        figure = Figure(figsize=(20, 20), dpi=dpi)
+        FigureCanvasAgg(figure)
         figure.suptitle(fr"${formula}$", fontsize=font_size, color=color, **kwargs)
         tight_bbox = figure.get_tightbbox(figure.canvas.get_renderer())  # tight_layout = True
         # there seems to be no way to add the tight_bbox to existing figure ^^ -> create figure again
-        figure: plt.Figure = plt.figure(figsize=tight_bbox.size, dpi=dpi)
+        figure = Figure(figsize=tight_bbox.size, dpi=dpi)
+        FigureCanvasAgg(figure)
         figure.suptitle(fr"${formula}$", fontsize=font_size, color=color, **kwargs)
         figure.patch.set_alpha(alpha)
-        return self.add_matplotlib_figure(figure, slide, position)
+        return figure
+
+    @instrumented("PPTXCreator.add_chart", count_shape)
+    def add_chart(self, slide: Slide, y, x=None, position: PPTXPosition = None,
+                  chart_type: XL_CHART_TYPE = XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS,
+                  series_names: Optional[Iterable[str]] = None, title: Optional[str] = None,
+                  max_points: Optional[int] = charts.DEFAULT_MAX_POINTS,
+                  width: int = charts.DEFAULT_CHART_WIDTH, height: int = charts.DEFAULT_CHART_HEIGHT) -> GraphicFrame:
+        """
+        Add a native (editable) PowerPoint chart of y (1d/2d numpy array with one series per column, pandas
+        Series/DataFrame or dict name -> values) over x (default: pandas index or 0 ... n-1) to slide.
+        Series with more than max_points points are downsampled for display (LTTB); None disables downsampling.
+        See charts.py for details.
+        """
+        if position is None:
+            position = self.default_position
+        left, top = position.tuple()
+        return charts.add_chart(slide, y, x, int(left), int(top), width, height, chart_type, series_names, title,
+                                max_points)
 
+    @instrumented("PPTXCreator.add_text_box", count_shape)
     def add_text_box(self, slide, text: str, position: PPTXPosition = None, font: PPTXFontStyle = None) -> Shape:
         """
         Add a text box with given text using given position and paragraph.
         Uses self.default_position if no position is given.
+        The size of the text box is estimated from font metrics (see text_metrics.py); PowerPoint adjusts it
+        exactly when the file is opened (MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT).
         """
-        width = height = Inches(1)  # no auto-resizing of shape -> has to be done inside PowerPoint
+        width, height = text_metrics.text_box_size(text, font)
         if position is None:
             position = self.default_position
         result = slide.shapes.add_textbox(**position.dict(), width=width, height=height)
@@ -179,6 +282,7 @@ class PPTXCreator:
 
         return rows, cols
 
+    @instrumented("PPTXCreator.add_table", count_table)
     def add_table(self, slide: Slide, table_data: Iterable[Iterable[any]], position: PPTXPosition = None,
                   table_style: PPTXTableStyle = None, auto_merge: bool = False) -> Shape:
         """
@@ -193,18 +297,34 @@ class PPTXCreator:
         result = slide.shapes.add_table(rows, cols, int(left), top, width=Inches(cols), height=Inches(0.5 * rows))
 
         table = result.table
-        for ir, row in enumerate(table_data):
-            for ic, entry in enumerate(row):
-                table.cell(ir, ic).text = f"{entry}"
+        for tr, row in zip(table._tbl.tr_lst, table_data):  # table.cell() would search all rows for every cell
+            for tc, entry in zip(tr.tc_lst, row):
+                _Cell(tc, table).text = f"{entry}"
 
         if table_style:
-            table_style.write_shape(result)
+            table_style.write_shape(result, table_data)
 
         if auto_merge:
             pass  # todo: merge cells; replace text for merged cells with ""
 
         return result
 
+    @instrumented("PPTXCreator.add_paginated_table")
+    def add_paginated_table(self, title: str, table_data: Iterable[Iterable[any]], position: PPTXPosition = None,
+                            table_style: PPTXTableStyle = None, header_rows: int = 1,
+                            rows_per_slide: Optional[int] = None, max_height: Optional[int] = None,
+                            layout: SlideLayout = None) -> List[GraphicFrame]:
+        """
+        Add table_data as tables on as many new slides (with given title) as needed; the first header_rows rows are
+        repeated on every slide. table_data can be a (streaming) iterator - only the rows of one slide are kept in
+        memory. Rows per slide are estimated from font metrics, unless rows_per_slide is given.
+        max_height: max. table height [EMU]; default: slide height below position (minus a bottom margin)
+        Returns the table shapes. See table_pagination.py for details.
+        """
+        paginator = table_pagination.TablePaginator(self, title, position, table_style, header_rows,
+                                                    rows_per_slide, max_height, layout)
+        return paginator.add_rows(table_data)
+
     def move_slide(self, slide: Slide, new_index: int):
         """Move the given slide to position new_index."""
         _sldIdLst = self.prs.slides._sldIdLst
@@ -217,6 +337,14 @@ class PPTXCreator:
         if to_move is not None:
             _sldIdLst.insert(new_index, to_move)
 
+    def replace_text(self, pattern: str, repl: 'text_replace.Replacement', flags: int = 0,
+                     notes: bool = True, layouts: bool = True, masters: bool = True) -> int:
+        """
+        Replace all matches of the regular expression pattern in slides, tables, notes, slide layouts and slide masters
+        (matches may span several runs; each run keeps its formatting). Returns the number of replacements.
+        """
+        return text_replace.replace_text(self.prs, pattern, repl, flags, notes, layouts, masters)
+
     @staticmethod
     def remove_unpopulated_shapes(slide: Slide):
         """
@@ -238,6 +366,7 @@ class PPTXCreator:
         run.hyperlink._hlinkClick.rId = shape.click_action.hyperlink._hlink.rId
         shape.click_action.target_slide = None
 
+    @instrumented("PPTXCreator.add_content_slide")
     def add_content_slide(self, slide_index=1):
         """Add a content slide with hyperlinks to all other slides and puts it to position slide_index."""
         content_entries = [
@@ -257,25 +386,78 @@ class PPTXCreator:
 
         return result
 
-    def save(self, filename: Union[str, "LocalPath"], create_pdf: bool = False, overwrite=False):
+    def snapshot(self) -> 'snapshot.PPTXSnapshot':
+        """
+        Returns a snapshot of the current presentation state. Use PPTXSnapshot.fork() to create any number of
+        independent PPTXCreator instances from it (e.g. to build variants sharing the first slides).
+        """
+        return snapshot.PPTXSnapshot(self)
+
+    def fork(self) -> 'PPTXCreator':
+        """
+        Returns an independent copy of this PPTXCreator. Slide XML is copied in memory, while media, slide layouts,
+        slide masters and themes are shared (see snapshot.py).
+        """
+        return snapshot._copy_creator(self)
+
+    def import_slides(self, source: Union[str, io.BytesIO, Presentation, 'PPTXCreator'],
+                      slides: Optional[Iterable[Union[int, Slide]]] = None, index: Optional[int] = None) -> list:
+        """
+        Copy slides (default: all) from another *.pptx file, Presentation or PPTXCreator to the end of this
+        presentation (or to position index). Identical media and slide layouts are reused.
+        To merge many presentations use one slide_import.SlideImporter for all of them.
+        """
+        return slide_import.SlideImporter(self).import_slides(source, slides, index)
+
+    @instrumented("PPTXCreator.save", count_saved_bytes)
+    def save(self, filename: Union[str, "LocalPath"], create_pdf: bool = False, overwrite=False,
+             compact: bool = False, max_dpi: Optional[float] = None, deterministic: bool = False):
         """
         Save presentation under the given filename.
+        If compact is True, duplicate media and unreferenced parts are removed and images above max_dpi
+        (if given) are downsampled (see compaction.compact_pptx).
+        If deterministic is True, equal presentations are saved as byte-identical files: fixed zip entry order and
+        timestamps, modification date in core properties set to the build date (see zip_package.build_date_time).
         """
         if os.path.isfile(filename) and not overwrite:
             print(f"File {filename} already exists. Set overwrite=True, if you want to overwrite file.")
         else:
-            self.prs.save(filename)
+            self.write(filename, compact, max_dpi, deterministic)
 
         if create_pdf:
             filename = str(filename)  # enables to work with LocalPath-variable (which is not subscriptable)
             self.save_as_pdf(filename[:-4] + "pdf", overwrite)
 
+    def write(self, file: Union[str, "LocalPath", IO[bytes]], compact: bool = False, max_dpi: Optional[float] = None,
+              deterministic: bool = False) -> None:
+        """
+        Write the presentation to file (filename or binary file object, e.g. io.BytesIO), always overwriting it.
+        compact, max_dpi and deterministic: see save().
+        """
+        if not hasattr(file, "write"):
+            file = str(file)  # enables to work with LocalPath-variable
+        if not compact:
+            media.save_presentation(self.prs, file, deterministic)
+            return
+        if deterministic:
+            self.prs.core_properties.modified = zip_package.build_datetime()
+        with io.BytesIO() as buffer:
+            media.save_presentation(self.prs, buffer)
+            if deterministic:
+                with io.BytesIO() as compacted:
+                    compaction.compact_pptx(buffer, compacted, max_dpi=max_dpi)
+                    zip_package.deterministic_zip(compacted, file)
+            else:
+                compaction.compact_pptx(buffer, file, max_dpi=max_dpi)
+
+    @instrumented("PPTXCreator.save_as_pdf")
     def save_as_pdf(self, filename: str, overwrite=False) -> bool:
         """
         Save the presentation as pdf under the given filenmae. Needs PowerPoint installed.
         """
         return utils.save_as_pdf(self.prs, filename, overwrite)
 
+    @instrumented("PPTXCreator.save_as_png")
     def save_as_png(self, save_folder, overwrite_folder=False) -> bool:
         """
         Saves the presentation as PNG's in the given folder. Needs PowerPoint installed.
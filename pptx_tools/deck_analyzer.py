@@ -0,0 +1,128 @@
+"""
+This module provides a read-only analyzer for saved *.pptx files (in the spirit of templates.analyze_pptx). It reports
+compressed/uncompressed sizes per package part and per slide, duplicate media, unused slide layouts/masters, orphaned
+relationships and oversized images. The zip file is streamed part by part - no python-pptx objects are created.
+
+    python -m pptx_tools.deck_analyzer my.pptx > report.json
+@author: Nathanael Jöhrmann
+"""
+import json
+import sys
+import zipfile
+from typing import Dict, IO, List, Union
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.util import Emu
+
+from pptx_tools.zip_package import hash_part, iter_pictures, read_relationships, slide_names_in_order
+
+
+def _image_pixel_size(zip_file: zipfile.ZipFile, name: str):
+    try:
+        from PIL import Image  # Pillow is a dependency of python-pptx
+        with zip_file.open(name) as file, Image.open(file) as image:  # only reads image header
+            return image.size
+    except Exception:  # e.g. emf/wmf or unknown format
+        return None
+
+
+def analyze_deck(file: Union[str, IO[bytes]], max_dpi: float = 300) -> dict:
+    """
+    Analyze a saved *.pptx file (filename or binary file object) and return a json serializable report:
+        parts: compressed/uncompressed size per package part
+        slides: per slide part size, size of all referenced parts (media, charts ...) and pictures
+        duplicate_media: groups of media parts with identical content (sha1)
+        unused_layouts / unused_masters: slide layouts (masters) not used by any slide
+        missing_targets: relationships pointing to parts that do not exist
+        unreferenced_parts: parts not reachable via any relationship
+        oversized_images: pictures with an effective resolution above max_dpi
+    """
+    with zipfile.ZipFile(file) as zip_file:
+        infos = {info.filename: info for info in zip_file.infolist() if not info.is_dir()}
+        relationships = read_relationships(zip_file)
+
+        parts = {name: {"compressed": info.compress_size, "uncompressed": info.file_size}
+                 for name, info in infos.items()}
+
+        missing_targets = []
+        referenced = set()
+        for source, source_relationships in relationships.items():
+            for relationship in source_relationships:
+                referenced.add(relationship["target"])
+                if relationship["target"] not in infos:
+                    missing_targets.append({"source": source, **relationship})
+        unreferenced_parts = sorted(name for name in infos if name not in referenced and
+                                    not name.endswith(".rels") and name != "[Content_Types].xml")
+
+        media_hashes: Dict[str, List[str]] = {}
+        for name in infos:
+            if name.startswith("ppt/media/"):
+                media_hashes.setdefault(hash_part(zip_file, name), []).append(name)
+        duplicate_media = [{"sha1": sha1, "parts": names,
+                            "wasted_bytes": sum(infos[name].compress_size for name in names[1:])}
+                           for sha1, names in media_hashes.items() if len(names) > 1]
+
+        presentation_relationships = relationships.get("ppt/presentation.xml", [])
+        slide_names = slide_names_in_order(zip_file, presentation_relationships)
+        used_layouts = set()
+        slides = []
+        oversized_images = []
+        pixel_sizes = {}
+        for index, slide_name in enumerate(slide_names):
+            slide_relationships = {relationship["id"]: relationship
+                                   for relationship in relationships.get(slide_name, [])}
+            used_layouts.update(relationship["target"] for relationship in slide_relationships.values()
+                                if relationship["type"] == RT.SLIDE_LAYOUT)
+            related_parts = {relationship["target"] for relationship in slide_relationships.values()
+                             if relationship["type"] not in (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE)
+                             and relationship["target"] in infos}
+
+            pictures = []
+            for shape_name, r_id, cx, cy in iter_pictures(zip_file, slide_name):
+                image_name = slide_relationships.get(r_id, {}).get("target")
+                if image_name not in infos:
+                    continue
+                if image_name not in pixel_sizes:
+                    pixel_sizes[image_name] = _image_pixel_size(zip_file, image_name)
+                picture = {"shape": shape_name, "part": image_name, "pixels": pixel_sizes[image_name],
+                           "displayed_inches": (Emu(cx).inches, Emu(cy).inches), "dpi": None}
+                if picture["pixels"] is not None and cx > 0 and cy > 0:
+                    picture["dpi"] = max(picture["pixels"][0] / Emu(cx).inches, picture["pixels"][1] / Emu(cy).inches)
+                    if picture["dpi"] > max_dpi:
+                        oversized_images.append({"slide_index": index, "slide": slide_name, **picture})
+                pictures.append(picture)
+
+            slides.append({"index": index, "part": slide_name,
+                           "compressed": infos[slide_name].compress_size,
+                           "uncompressed": infos[slide_name].file_size,
+                           "related_parts": sorted(related_parts),
+                           "related_compressed": sum(infos[name].compress_size for name in related_parts),
+                           "related_uncompressed": sum(infos[name].file_size for name in related_parts),
+                           "pictures": pictures})
+
+        masters = [relationship["target"] for relationship in presentation_relationships
+                   if relationship["type"] == RT.SLIDE_MASTER]
+        layout_masters = {}  # layout part name -> master part name
+        for master in masters:
+            for relationship in relationships.get(master, []):
+                if relationship["type"] == RT.SLIDE_LAYOUT:
+                    layout_masters[relationship["target"]] = master
+        unused_layouts = sorted(layout for layout in layout_masters if layout not in used_layouts)
+        used_masters = {layout_masters.get(layout) for layout in used_layouts}
+        unused_masters = [master for master in masters if master not in used_masters]
+
+    return {"total_compressed": sum(part["compressed"] for part in parts.values()),
+            "total_uncompressed": sum(part["uncompressed"] for part in parts.values()),
+            "parts": parts,
+            "slides": slides,
+            "duplicate_media": duplicate_media,
+            "unused_layouts": unused_layouts,
+            "unused_masters": unused_masters,
+            "missing_targets": missing_targets,
+            "unreferenced_parts": unreferenced_parts,
+            "oversized_images": oversized_images}
+
+
+if __name__ == '__main__':
+    for filename in sys.argv[1:]:
+        print(json.dumps(analyze_deck(filename), indent=2))
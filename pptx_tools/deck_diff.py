@@ -0,0 +1,271 @@
+"""
+This module provides a structural diff of two saved *.pptx files (e.g. to compare regenerated reports with golden decks
+in regression tests). Byte comparison does not work for *.pptx files (zip timestamps, shape ids, rIds and media names
+change between builds), so every part is compared in a canonical form:
+    - relationship ids (r:id, r:embed ...) are replaced by their target (media/embedded files by their sha1)
+    - shape ids are renumbered in document order (connections and animation targets included)
+    - creationId/modId extensions are dropped and the XML is serialized with C14N (sorted attributes)
+Parts with equal CRC32 and size (zip central directory) are not read at all; a slide is only parsed if its XML, its
+relationships or one of its related parts changed. For changed slides the shapes are compared with text, position and
+style (element/attribute) deltas.
+
+    python -m pptx_tools.deck_diff golden.pptx regenerated.pptx > diff.json  # exit code 1 if decks differ
+@author: Nathanael Jöhrmann
+"""
+import hashlib
+import json
+import re
+import sys
+import zipfile
+from typing import Dict, IO, List, Optional, Pattern, Tuple, Union
+
+from lxml import etree
+from pptx.oxml.ns import qn
+
+from pptx_tools.zip_package import RELATIONSHIPS_NS, rels_name, rels_source, resolve_target, shape_text, \
+    slide_names_in_order
+
+DEFAULT_IGNORE_PARTS = re.compile(r"docProps/")  # document properties contain creation/modification dates
+HASHED_PARTS = re.compile(r"ppt/(media|embeddings)/")  # compared by content, not by name
+
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_SHAPE_TAGS = {qn("p:sp"), qn("p:pic"), qn("p:graphicFrame"), qn("p:grpSp"), qn("p:cxnSp")}
+_DROPPED_EXTENSIONS = {"creationId", "modId"}
+_C_NV_PR = qn("p:cNvPr")
+_SHAPE_ID_REFERENCES = {qn("a:stCxn"): "id", qn("a:endCxn"): "id", qn("p:spTgt"): "spid"}
+_XFRM_TAGS = (qn("a:xfrm"), qn("p:xfrm"))
+
+
+class _Deck:
+    """Zip file with cached relationships and content hashes."""
+
+    def __init__(self, zip_file: zipfile.ZipFile):
+        self.zip = zip_file
+        self.infos = {info.filename: info for info in zip_file.infolist() if not info.is_dir()}
+        self._hashes: Dict[str, str] = {}
+
+    def crc(self, name: str) -> Optional[Tuple[int, int]]:
+        info = self.infos.get(name)
+        return None if info is None else (info.CRC, info.file_size)
+
+    def sha1(self, name: str) -> str:
+        if name not in self._hashes:
+            self._hashes[name] = hashlib.sha1(self.zip.read(name)).hexdigest()
+        return self._hashes[name]
+
+    def relationships(self, name: str) -> List[Tuple[str, str, str, bool]]:
+        """Returns [(rId, type, target, is_external), ...] of part name."""
+        if rels_name(name) not in self.infos:
+            return []
+        root = etree.fromstring(self.zip.read(rels_name(name)))
+        result = []
+        for relationship in root.iterchildren(f"{{{RELATIONSHIPS_NS}}}Relationship"):
+            external = relationship.get("TargetMode") == "External"
+            target = relationship.get("Target") if external else resolve_target(name, relationship.get("Target"))
+            result.append((relationship.get("Id"), relationship.get("Type"), target, external))
+        return result
+
+    def r_id_usages(self, name: str) -> Dict[str, List[str]]:
+        """rId -> ['element path@attribute', ...] of all r:... attributes in the XML of part name."""
+        result: Dict[str, List[str]] = {}
+        if not name.endswith(".xml") or name not in self.infos:
+            return result
+        tree = etree.fromstring(self.zip.read(name)).getroottree()
+        for element in tree.iter(etree.Element):
+            for attribute, value in element.attrib.items():
+                if attribute.startswith(_R_NS):
+                    result.setdefault(value, []).append(f"{tree.getpath(element)}@{etree.QName(attribute).localname}")
+        return result
+
+    def target_key(self, target: str, external: bool) -> str:
+        if external:
+            return f"external:{target}"
+        if HASHED_PARTS.match(target) and target in self.infos:
+            return f"sha1:{self.sha1(target)}"
+        return target
+
+    def canonical(self, name: str) -> etree._Element:
+        """Canonical XML tree of part name (see module docstring)."""
+        root = etree.fromstring(self.zip.read(name))
+        targets = {r_id: self.target_key(target, external) for r_id, _, target, external in self.relationships(name)}
+        shape_ids = {}
+        for element in root.iter(_C_NV_PR):
+            shape_ids[element.get("id")] = str(len(shape_ids) + 1)
+        for element in list(root.iter(etree.Element)):
+            if etree.QName(element).localname in _DROPPED_EXTENSIONS:
+                element.getparent().remove(element)
+                continue
+            for attribute, value in element.attrib.items():
+                if attribute.startswith(_R_NS) and value in targets:
+                    element.set(attribute, targets[value])
+            if element.tag == _C_NV_PR:
+                element.set("id", shape_ids[element.get("id")])
+            elif element.tag in _SHAPE_ID_REFERENCES:
+                attribute = _SHAPE_ID_REFERENCES[element.tag]
+                element.set(attribute, shape_ids.get(element.get(attribute), element.get(attribute, "")))
+        return root
+
+
+def _hash(root: etree._Element) -> str:
+    return hashlib.sha1(etree.tostring(root, method="c14n")).hexdigest()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# shape deltas
+# ----------------------------------------------------------------------------------------------------------------------
+def _shapes(root: etree._Element) -> Dict[str, etree._Element]:
+    """Top level shapes of a slide by 'name' ('name #2' for the second shape with the same name ...)."""
+    sp_tree = root.find(f"{qn('p:cSld')}/{qn('p:spTree')}")
+    result = {}
+    for shape in sp_tree if sp_tree is not None else []:
+        if shape.tag not in _SHAPE_TAGS:
+            continue
+        c_nv_pr = next(shape.iter(_C_NV_PR), None)
+        name = key = "" if c_nv_pr is None else c_nv_pr.get("name", "")
+        occurrence = 1
+        while key in result:
+            occurrence += 1
+            key = f"{name} #{occurrence}"
+        result[key] = shape
+    return result
+
+
+def _position(shape: etree._Element) -> Dict[str, int]:
+    xfrm = next(shape.iter(*_XFRM_TAGS), None)
+    result = {}
+    for tag, names in ((qn("a:off"), ("x", "y")), (qn("a:ext"), ("cx", "cy"))):
+        element = None if xfrm is None else xfrm.find(tag)
+        for name in names:
+            result[name] = None if element is None else int(element.get(name))
+    return result
+
+
+def _style_items(shape: etree._Element) -> Dict[str, str]:
+    """'path@attribute' -> value for all elements of shape except text and position."""
+    tree = shape.getroottree()
+    prefix = len(tree.getpath(shape))
+    xfrm = next(shape.iter(*_XFRM_TAGS), None)
+    result = {}
+    for element in shape.iter(etree.Element):
+        if element.tag == qn("a:t") or (xfrm is not None and element.getparent() is xfrm):
+            continue
+        path = tree.getpath(element)[prefix:] or "."
+        result[path] = (element.text or "").strip()
+        for attribute, value in element.attrib.items():
+            result[f"{path}@{etree.QName(attribute).localname}"] = value
+    return result
+
+
+def _shape_delta(old: etree._Element, new: etree._Element) -> dict:
+    delta = {}
+    old_text, new_text = shape_text(old), shape_text(new)
+    if old_text != new_text:
+        delta["text"] = {"old": old_text, "new": new_text}
+    old_position, new_position = _position(old), _position(new)
+    position = {key: {"old": old_position[key], "new": new_position[key]}
+                for key in old_position if old_position[key] != new_position[key]}
+    if position:
+        delta["position"] = position
+    old_style, new_style = _style_items(old), _style_items(new)
+    style = [{"path": path, "old": old_style.get(path), "new": new_style.get(path)}
+             for path in sorted(old_style.keys() | new_style.keys()) if old_style.get(path) != new_style.get(path)]
+    if style:
+        delta["style"] = style
+    return delta
+
+
+def _slide_delta(old: etree._Element, new: etree._Element) -> List[dict]:
+    for root in (old, new):  # shapes are matched by name - shape ids would change after added/removed shapes
+        for c_nv_pr in root.iter(_C_NV_PR):
+            c_nv_pr.attrib.pop("id", None)
+    old_shapes, new_shapes = _shapes(old), _shapes(new)
+    result = []
+    for name in old_shapes:
+        if name not in new_shapes:
+            result.append({"shape": name, "status": "removed"})
+        elif _hash(old_shapes[name]) != _hash(new_shapes[name]):
+            result.append({"shape": name, "status": "changed", **_shape_delta(old_shapes[name], new_shapes[name])})
+    result.extend({"shape": name, "status": "added"} for name in new_shapes if name not in old_shapes)
+    return result
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# public interface
+# ----------------------------------------------------------------------------------------------------------------------
+def _slide_unchanged(old: _Deck, new: _Deck, old_name: str, new_name: str) -> bool:
+    """Short-circuit without parsing: equal slide XML, relationships and related parts (CRC32 and size)."""
+    if old_name != new_name or old.crc(old_name) != new.crc(new_name):
+        return False
+    if old.crc(rels_name(old_name)) != new.crc(rels_name(old_name)):
+        return False
+    return all(external or old.crc(target) == new.crc(target)
+               for _, _, target, external in old.relationships(old_name))
+
+
+def _slide_names(deck: _Deck) -> List[str]:
+    relationships = [{"id": r_id, "type": rel_type, "target": target}
+                     for r_id, rel_type, target, external in deck.relationships("ppt/presentation.xml") if not external]
+    return slide_names_in_order(deck.zip, relationships)
+
+
+def _part_key(deck: _Deck, name: str) -> str:
+    if name.endswith(".rels"):  # targets (media by content) and where they are used instead of XML and rIds
+        source = rels_source(name)
+        usages = deck.r_id_usages(source)
+        relationships = sorted((rel_type, deck.target_key(target, external), usages.get(r_id, []))
+                               for r_id, rel_type, target, external in deck.relationships(source))
+        return hashlib.sha1(json.dumps(relationships).encode()).hexdigest()
+    if name.endswith(".xml"):
+        return _hash(deck.canonical(name))
+    return deck.sha1(name)
+
+
+def diff_decks(old: Union[str, IO[bytes]], new: Union[str, IO[bytes]],
+               ignore_parts: Optional[Pattern] = DEFAULT_IGNORE_PARTS) -> dict:
+    """
+    Compare two *.pptx files (filenames or binary file objects) and return a json serializable report:
+        equal: True, if no differences were found
+        slides: changed, added or removed slides (index in presentation order) with their changed, added or removed
+            shapes; changed shapes list text, position [EMU] and style deltas ('path@attribute': old/new)
+        parts: added, removed and changed parts other than slides (e.g. slide layouts, masters, themes)
+    Media and embedded files are compared by content (renamed media are not reported); changed media of layouts,
+    masters ... are reported as changed relationships (*.rels) of the parts using them.
+    :param ignore_parts: regular expression (re.match) for part names to ignore (default: docProps/)
+    """
+    with zipfile.ZipFile(old) as old_zip, zipfile.ZipFile(new) as new_zip:
+        old_deck, new_deck = _Deck(old_zip), _Deck(new_zip)
+
+        slides = []
+        old_slides, new_slides = _slide_names(old_deck), _slide_names(new_deck)
+        for index in range(max(len(old_slides), len(new_slides))):
+            if index >= len(new_slides):
+                slides.append({"slide": index, "status": "removed"})
+            elif index >= len(old_slides):
+                slides.append({"slide": index, "status": "added"})
+            elif not _slide_unchanged(old_deck, new_deck, old_slides[index], new_slides[index]):
+                old_root = old_deck.canonical(old_slides[index])
+                new_root = new_deck.canonical(new_slides[index])
+                if _hash(old_root) != _hash(new_root):
+                    slides.append({"slide": index, "status": "changed", "shapes": _slide_delta(old_root, new_root)})
+
+        def other_parts(deck: _Deck, slide_names: List[str]) -> List[str]:
+            skipped = set(slide_names) | {rels_name(name) for name in slide_names}
+            return [name for name in deck.infos if name not in skipped and not HASHED_PARTS.match(name) and
+                    not (ignore_parts is not None and ignore_parts.match(name))]
+
+        old_parts, new_parts = other_parts(old_deck, old_slides), other_parts(new_deck, new_slides)
+        # rels are always compared: their related media might have changed (media are compared by content only)
+        changed_parts = [name for name in old_parts if name in new_deck.infos and
+                         (name.endswith(".rels") or old_deck.crc(name) != new_deck.crc(name)) and
+                         _part_key(old_deck, name) != _part_key(new_deck, name)]
+        parts = {"added": sorted(set(new_parts) - set(old_parts)),
+                 "removed": sorted(set(old_parts) - set(new_parts)),
+                 "changed": sorted(changed_parts)}
+
+    return {"equal": not slides and not any(parts.values()), "slides": slides, "parts": parts}
+
+
+if __name__ == '__main__':
+    report = diff_decks(sys.argv[1], sys.argv[2])
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["equal"] else 1)
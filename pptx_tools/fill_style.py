@@ -2,22 +2,36 @@
 This module provides a helper class to deal with fills (for shapes, table cells ...) in python-pptx.
 @author: Nathanael Jöhrmann
 """
+import copy
+import importlib.util
 from enum import Enum, auto
-from typing import Union, Optional, Tuple
+from typing import Union, Optional, Tuple, List, Sequence, Iterable
+
+# numpy is slow to import -> only imported when heat map fills are computed
+has_numpy = importlib.util.find_spec("numpy") is not None
 
 from pptx.dml.color import RGBColor
 from pptx.dml.fill import FillFormat
 from pptx.enum.dml import MSO_COLOR_TYPE as EnumValue
-from pptx.enum.dml import MSO_PATTERN_TYPE
+from pptx.enum.dml import MSO_PATTERN_TYPE, MSO_THEME_COLOR
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from lxml import etree
 
+from pptx_tools.instrumentation import instrumented
 from pptx_tools.utils import _DO_NOT_CHANGE
 
+# color of a gradient stop: RGBColor, (r, g, b) or theme color
+GradientColor = Union[RGBColor, Tuple[int, int, int], MSO_THEME_COLOR]
+
+_FILL_TAGS = tuple(qn(f"a:{tag}") for tag in ("noFill", "solidFill", "gradFill", "blipFill", "pattFill", "grpFill"))
+
 
 class FillType(Enum):
     NOFILL = auto()  # fill.background()
     SOLID = auto()  # fill.solid()
     PATTERNED = auto()  # # fill.patterned()
-    GRADIENT = auto()  # fill.gradient(); not implemented jet
+    GRADIENT = auto()  # fill.gradient()
 
 
 class PPTXFillStyle:
@@ -33,6 +47,10 @@ class PPTXFillStyle:
 
         self.pattern: Optional[MSO_PATTERN_TYPE] = None  # 0 ... 47
 
+        self._gradient_stops: Optional[List[Tuple[float, GradientColor]]] = None  # [(position 0.0 ... 1.0, color)]
+        self.gradient_angle: Optional[float] = None  # in degrees; 0 -> left to right; 90 -> bottom to top
+        self._gs_lst = None  # cached a:gsLst element created from self.gradient_stops
+
     @property
     def fore_color_rgb(self) -> Optional[RGBColor]:
         return self._fore_color_rgb
@@ -49,6 +67,18 @@ class PPTXFillStyle:
     def back_color_mso_theme(self) -> Optional[EnumValue]:
         return self._back_color_mso_theme
 
+    @property
+    def gradient_stops(self) -> Optional[List[Tuple[float, GradientColor]]]:
+        return self._gradient_stops
+
+    @gradient_stops.setter
+    def gradient_stops(self, value: Optional[Sequence[Tuple[float, GradientColor]]]):
+        if value is not None:
+            assert len(value) >= 2, "A gradient needs at least two stops."
+            value = [(position, RGBColor(*color) if isinstance(color, tuple) else color) for position, color in value]
+        self._gradient_stops = value
+        self._gs_lst = None
+
     @fore_color_rgb.setter
     def fore_color_rgb(self, value: Union[RGBColor, Tuple[any, any, any], None]):
         if value is not None:
@@ -84,7 +114,9 @@ class PPTXFillStyle:
             back_color_rgb: Union[RGBColor, Tuple[any, any, any], None] = _DO_NOT_CHANGE,
             back_color_mso_theme: Optional[EnumValue] = _DO_NOT_CHANGE,
             back_color_brightness: Optional[float] = _DO_NOT_CHANGE,
-            pattern: Optional[MSO_PATTERN_TYPE] = _DO_NOT_CHANGE
+            pattern: Optional[MSO_PATTERN_TYPE] = _DO_NOT_CHANGE,
+            gradient_stops: Optional[Sequence[Tuple[float, GradientColor]]] = _DO_NOT_CHANGE,
+            gradient_angle: Optional[float] = _DO_NOT_CHANGE
             ):
         """Convenience method to set several fill attributes together."""
         if fill_type is not _DO_NOT_CHANGE:
@@ -107,11 +139,40 @@ class PPTXFillStyle:
         if pattern is not _DO_NOT_CHANGE:
             self.pattern = pattern
 
+        if gradient_stops is not _DO_NOT_CHANGE:
+            self.gradient_stops = gradient_stops
+        if gradient_angle is not _DO_NOT_CHANGE:
+            self.gradient_angle = gradient_angle
+
+    @instrumented("PPTXFillStyle.write_fill")
     def write_fill(self, fill: FillFormat):
         """Write attributes to a FillFormat object."""
         if self.fill_type is not None:
             self._write_fill_type(fill)
 
+    @instrumented("PPTXFillStyle.write_fill_elements")
+    def write_fill_elements(self, fill_parents: Iterable) -> None:
+        """
+        Batched version of write_fill(). The fill is created only once and copied to all given fill parent elements
+        (a:tcPr, p:spPr, a:rPr ...) without creating FillFormat objects.
+        """
+        fill_element = self._create_fill_element()
+        if fill_element is None:
+            return
+        insert_method_name = f"_insert_{etree.QName(fill_element).localname}"
+        for fill_parent in fill_parents:
+            for old_fill_element in list(fill_parent.iterchildren(*_FILL_TAGS)):
+                fill_parent.remove(old_fill_element)
+            getattr(fill_parent, insert_method_name)(copy.deepcopy(fill_element))
+
+    def _create_fill_element(self):
+        """Returns a loose fill element (a:solidFill, a:gradFill ...) or None, if there is nothing to write."""
+        if self.fill_type is None:
+            return None
+        fill_parent = parse_xml(f'<a:tcPr {nsdecls("a")}/>')
+        self.write_fill(FillFormat.from_fill_parent(fill_parent))
+        return fill_parent.eg_fillProperties
+
     def _write_fore_color(self, fill: FillFormat):
         if self.fore_color_rgb is not None:
             fill.fore_color.rgb = self.fore_color_rgb
@@ -153,4 +214,58 @@ class PPTXFillStyle:
                 self._write_back_color(fill)
 
         elif self.fill_type == FillType.GRADIENT:
-            print("FillType.GRADIENT not implemented jet.")
+            fill.gradient()
+            if self.gradient_stops is not None:
+                self._write_gradient_stops(fill)
+            if self.gradient_angle is not None:
+                fill.gradient_angle = self.gradient_angle
+
+    def _write_gradient_stops(self, fill: FillFormat):
+        """Replace the a:gsLst of the gradient fill with a copy of the cached stop list."""
+        if self._gs_lst is None:
+            self._gs_lst = self._create_gs_lst()
+        grad_fill = fill._fill._gradFill
+        grad_fill.replace(grad_fill.get_or_add_gsLst(), copy.deepcopy(self._gs_lst))
+
+    def _create_gs_lst(self):
+        gs_xml = []
+        for position, color in self.gradient_stops:
+            if isinstance(color, RGBColor):
+                color_xml = f'<a:srgbClr val="{color}"/>'
+            else:
+                color_xml = f'<a:schemeClr val="{MSO_THEME_COLOR.to_xml(color)}"/>'
+            gs_xml.append(f'<a:gs pos="{round(position * 100000)}">{color_xml}</a:gs>')
+        return parse_xml(f'<a:gsLst {nsdecls("a")}>{"".join(gs_xml)}</a:gsLst>')
+
+
+def heat_map_fill_styles(values, color_stops: Sequence[Tuple[float, Union[RGBColor, Tuple[int, int, int]]]],
+                         v_min: Optional[float] = None, v_max: Optional[float] = None) -> list:
+    """
+    Map a (2D) array of values to solid PPTXFillStyles, e.g. to color the cells of a table as heat map.
+    Colors are linearly interpolated between color_stops [(position 0.0 ... 1.0, rgb_color), ...]; values are scaled
+    to 0.0 ... 1.0 using v_min and v_max (default: min and max of values). The color mapping is done vectorized and
+    cells with the same color share one PPTXFillStyle instance.
+    Returns nested lists with the same shape as values. Needs module numpy.
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Creating a heat map needs module numpy to be installed.")
+
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    v_min = np.nanmin(values) if v_min is None else v_min
+    v_max = np.nanmax(values) if v_max is None else v_max
+    scaled = (values - v_min) / (v_max - v_min) if v_max > v_min else np.zeros_like(values)
+    scaled = np.clip(np.nan_to_num(scaled), 0.0, 1.0)
+
+    positions = [position for position, _ in color_stops]
+    stop_colors = np.array([tuple(color) for _, color in color_stops], dtype=float)  # RGBColor is a tuple
+    rgb = np.stack([np.interp(scaled, positions, stop_colors[:, channel]) for channel in range(3)], axis=-1)
+    rgb = np.rint(rgb).astype(np.int64)
+    packed = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+    unique_colors, inverse = np.unique(packed, return_inverse=True)
+    fill_styles = [PPTXFillStyle() for _ in unique_colors]
+    for fill_style, color in zip(fill_styles, unique_colors.tolist()):
+        fill_style.set(fill_type=FillType.SOLID, fore_color_rgb=RGBColor(color >> 16, (color >> 8) & 255, color & 255))
+
+    return np.array(fill_styles, dtype=object)[inverse.reshape(packed.shape)].tolist()
@@ -2,19 +2,24 @@
 This module provides a helper class to deal with fonts in python-pptx.
 @author: Nathanael Jöhrmann
 """
-from typing import Union, Optional, Tuple
+import copy
+from typing import Union, Optional, Tuple, Iterable
 
 from pptx.dml.color import RGBColor
 from pptx.enum.lang import MSO_LANGUAGE_ID
 from pptx.enum.text import MSO_TEXT_UNDERLINE_TYPE
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
 from pptx.shapes.autoshape import Shape
 from pptx.text.text import Font
 from pptx.text.text import _Paragraph
 from pptx.text.text import _Run
 from pptx.util import Pt
+from lxml import etree
 
 from pptx_tools.enumerations import TEXT_CAPS_VALUES, TEXT_STRIKE_VALUES
 from pptx_tools.fill_style import PPTXFillStyle
+from pptx_tools.instrumentation import instrumented
 from pptx_tools.utils import _USE_DEFAULT, _DO_NOT_CHANGE
 
 
@@ -44,7 +49,7 @@ class PPTXFontStyle:
 
         # todo: color is ColorFormat object
         self._color_rgb: Optional[RGBColor] = None
-        # fil.fore_color changes paragraph color; also gradient or image might be useful (not implemented in FillStyle jet)
+        # fill.fore_color changes paragraph color; fill_style also supports gradients (image fill not implemented yet)
         self.fill_style: Optional[PPTXFillStyle] = None  # PPTXFillStyle()
 
         # experimental (not implemented in python-pptx):
@@ -100,6 +105,37 @@ class PPTXFontStyle:
         self._write_caps(font)
         self._write_strikethrough(font)
 
+    @instrumented("PPTXFontStyle.write_rPr_elements")
+    def write_rPr_elements(self, rPr_elements: Iterable) -> None:
+        """
+        Batched version of write_font(). The font is created only once and merged into all given
+        character property elements (a:rPr, a:defRPr, a:endParaRPr) without creating Font objects.
+        """
+        source = self._create_rPr()
+        source_fill = source.eg_fillProperties
+        insert_fill_method_name = None if source_fill is None else f"_insert_{etree.QName(source_fill).localname}"
+        use_default_attributes = [attribute for attribute, value in (("b", self.bold), ("i", self.italic),
+                                                                     ("u", self.underline), ("sz", self.size),
+                                                                     ("lang", self.language_id))
+                                  if value == _USE_DEFAULT]
+        for rPr in rPr_elements:
+            rPr.attrib.update(source.attrib)
+            for attribute in use_default_attributes:
+                rPr.attrib.pop(attribute, None)
+            if source.latin is not None or self.name == _USE_DEFAULT:
+                rPr._remove_latin()
+            if source.latin is not None:
+                rPr._insert_latin(copy.deepcopy(source.latin))
+            if source_fill is not None:
+                rPr._remove_eg_fillProperties()
+                getattr(rPr, insert_fill_method_name)(copy.deepcopy(source_fill))
+
+    def _create_rPr(self):
+        """Returns a loose a:rPr element with all attributes of this font style."""
+        rPr = parse_xml(f'<a:rPr {nsdecls("a")}/>')
+        self.write_font(Font(rPr))
+        return rPr
+
     def _write_caps(self, font: Font):
         if self.caps is None:
             return
@@ -121,6 +157,7 @@ class PPTXFontStyle:
             return None
         return new_value
 
+    @instrumented("PPTXFontStyle.write_shape")
     def write_shape(self, shape: Shape) -> None:
         """
         Write attributes to all paragraphs in given pptx.shapes.autoshape.Shape.
@@ -0,0 +1,235 @@
+"""
+This module provides optional profiling/instrumentation for PPTXCreator and the style write_* methods.
+Methods are only marked with @instrumented; timing wrappers are installed when a PPTXInstrumentation is enabled
+and removed again afterwards - so there is no overhead at all while instrumentation is disabled.
+
+    instrumentation = PPTXInstrumentation(trace_memory=True)
+    with instrumentation:
+        pp = PPTXCreator(TemplateExample())
+        ...
+        pp.save("my.pptx")
+    print(instrumentation.report_text())
+
+An enabled PPTXInstrumentation only records operations of its own context (thread or asyncio task, see contextvars):
+several decks can be instrumented at the same time in different threads/tasks, and decks built in other threads are
+not recorded. AsyncPPTXCreator runs its offloaded jobs in the context of the calling task. The timing wrappers are
+installed while at least one PPTXInstrumentation is enabled. Memory (trace_memory) is traced process wide.
+@author: Nathanael Jöhrmann
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional, List
+
+from pptx_tools import media
+
+# counter functions get (instrumentation, result, args, kwargs) of the instrumented call
+CounterFunction = Callable[['PPTXInstrumentation', any, tuple, dict], None]
+
+
+def instrumented(name: str, counter: Optional[CounterFunction] = None):
+    """Mark a method to be timed (and counted) while a PPTXInstrumentation is enabled. Does not wrap the method."""
+    def decorator(function):
+        function._instrumentation_name = name
+        function._instrumentation_counter = counter
+        return function
+    return decorator
+
+
+def _instrumented_classes() -> list:
+    # local import to prevent circle import error
+    from pptx_tools.creator import PPTXCreator
+    from pptx_tools.fill_style import PPTXFillStyle
+    from pptx_tools.font_style import PPTXFontStyle
+    from pptx_tools.paragraph_style import PPTXParagraphStyle
+    from pptx_tools.table_style import PPTXTableStyle, PPTXCellStyle
+    return [PPTXCreator, PPTXFillStyle, PPTXFontStyle, PPTXParagraphStyle, PPTXTableStyle, PPTXCellStyle]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# counter functions
+# ----------------------------------------------------------------------------------------------------------------------
+def count_slide(instrumentation: 'PPTXInstrumentation', slide, args, kwargs) -> None:
+    instrumentation.count("slides_added")
+    instrumentation.count("xml_elements_created", sum(1 for _ in slide._element.iter()))
+
+
+def count_shape(instrumentation: 'PPTXInstrumentation', shape, args, kwargs) -> None:
+    instrumentation.count("shapes_added")
+    instrumentation.count("xml_elements_created", sum(1 for _ in shape._element.iter()))
+
+
+def count_picture(instrumentation: 'PPTXInstrumentation', picture, args, kwargs) -> None:
+    count_shape(instrumentation, picture, args, kwargs)
+    instrumentation.count("media_bytes", media.part_size(picture.part.related_part(picture._element.blip_rId)))
+
+
+def count_table(instrumentation: 'PPTXInstrumentation', shape, args, kwargs) -> None:
+    count_shape(instrumentation, shape, args, kwargs)
+    instrumentation.count("cells_written", len(shape.table.rows) * len(shape.table.columns))
+
+
+def count_styled_cells(instrumentation: 'PPTXInstrumentation', result, args, kwargs) -> None:
+    table = kwargs["table"] if "table" in kwargs else args[1]
+    instrumentation.count("cells_styled", len(table.rows) * len(table.columns))
+
+
+def count_saved_bytes(instrumentation: 'PPTXInstrumentation', result, args, kwargs) -> None:
+    filename = kwargs.get("filename", args[1] if len(args) > 1 else None)
+    if filename is not None and os.path.isfile(filename):
+        instrumentation.count("saved_bytes", os.path.getsize(filename))
+
+
+# instrumentation enabled in the current context (thread / asyncio task)
+_current: 'contextvars.ContextVar[Optional[PPTXInstrumentation]]' = contextvars.ContextVar("pptx_instrumentation",
+                                                                                            default=None)
+_lock = threading.Lock()  # guards patching/unpatching and the reference counts below
+
+
+class _OperationStatistic:
+    __slots__ = ('calls', 'total_time', 'max_time', 'memory')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.memory = 0  # net allocated bytes (only with trace_memory)
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "total_time": self.total_time, "max_time": self.max_time, "memory": self.memory}
+
+
+class PPTXInstrumentation:
+    """
+    Collects per-operation timers and counters (slides/shapes added, cells written, media bytes,
+    xml elements created, saved bytes). Use as context manager or call enable()/disable().
+    Optional callback is called after every instrumented operation with an event dict
+    (name, duration, memory) - e.g. to feed a metrics system.
+    Times are inclusive (e.g. add_matplotlib_figure includes add_image).
+    """
+    _enabled_count = 0  # number of enabled instrumentations (methods are patched while > 0)
+    _tracing_count = 0  # number of enabled instrumentations with trace_memory
+    _started_tracemalloc = False  # tracemalloc was started by PPTXInstrumentation (and is stopped by it)
+    _patched_methods: List[tuple] = []  # (cls, attribute name, original function)
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None, trace_memory: bool = False):
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.operations: Dict[str, _OperationStatistic] = {}
+        self.counters: Dict[str, int] = {}
+        self.peak_memory: Optional[int] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        self.operations.clear()
+        self.counters.clear()
+        self.peak_memory = None
+
+    def enable(self) -> 'PPTXInstrumentation':
+        """Enable for the current context (thread or asyncio task). disable() has to be called in the same context."""
+        if _current.get() is not None:
+            raise RuntimeError("Another PPTXInstrumentation is already enabled in this context.")
+        with _lock:
+            if PPTXInstrumentation._enabled_count == 0:
+                PPTXInstrumentation._patch_methods()
+            PPTXInstrumentation._enabled_count += 1
+            if self.trace_memory:
+                if PPTXInstrumentation._tracing_count == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    PPTXInstrumentation._started_tracemalloc = True
+                PPTXInstrumentation._tracing_count += 1
+        self._token = _current.set(self)
+        return self
+
+    def disable(self) -> None:
+        if self._token is None:
+            return
+        _current.reset(self._token)
+        self._token = None
+        with _lock:
+            if self.trace_memory:
+                if tracemalloc.is_tracing():
+                    self.peak_memory = tracemalloc.get_traced_memory()[1]
+                PPTXInstrumentation._tracing_count -= 1
+                if PPTXInstrumentation._tracing_count == 0 and PPTXInstrumentation._started_tracemalloc:
+                    tracemalloc.stop()
+                    PPTXInstrumentation._started_tracemalloc = False
+            PPTXInstrumentation._enabled_count -= 1
+            if PPTXInstrumentation._enabled_count == 0:
+                for cls, attribute, function in PPTXInstrumentation._patched_methods:
+                    setattr(cls, attribute, function)
+                PPTXInstrumentation._patched_methods = []
+
+    def __enter__(self) -> 'PPTXInstrumentation':
+        return self.enable()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    @staticmethod
+    def _patch_methods() -> None:
+        for cls in _instrumented_classes():
+            for attribute, function in list(vars(cls).items()):
+                if getattr(function, "_instrumentation_name", None) is None:
+                    continue
+                PPTXInstrumentation._patched_methods.append((cls, attribute, function))
+                setattr(cls, attribute, PPTXInstrumentation._wrap(function))
+
+    @staticmethod
+    def _wrap(function):
+        name = function._instrumentation_name
+        counter = function._instrumentation_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            instrumentation = _current.get()
+            if instrumentation is None:  # not instrumented in this context
+                return function(*args, **kwargs)
+            trace_memory = instrumentation.trace_memory and tracemalloc.is_tracing()
+            memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            duration = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0] - memory_before if trace_memory else 0
+            instrumentation._record(name, duration, memory)
+            if counter is not None:
+                counter(instrumentation, result, args, kwargs)
+            return result
+        return wrapper
+
+    def _record(self, name: str, duration: float, memory: int) -> None:
+        statistic = self.operations.get(name)
+        if statistic is None:
+            statistic = self.operations[name] = _OperationStatistic()
+        statistic.calls += 1
+        statistic.total_time += duration
+        statistic.max_time = max(statistic.max_time, duration)
+        statistic.memory += memory
+        if self.callback is not None:
+            self.callback({"name": name, "duration": duration, "memory": memory})
+
+    def report(self) -> dict:
+        """Returns a machine readable report (operations sorted by total time)."""
+        operations = sorted(self.operations.items(), key=lambda item: item[1].total_time, reverse=True)
+        return {"operations": {name: statistic.as_dict() for name, statistic in operations},
+                "counters": dict(self.counters),
+                "peak_memory": self.peak_memory}
+
+    def report_text(self) -> str:
+        """Returns a human readable report."""
+        report = self.report()
+        lines = [f"{'operation':40s} {'calls':>7s} {'total [ms]':>11s} {'max [ms]':>10s} {'memory [kB]':>12s}"]
+        for name, statistic in report["operations"].items():
+            lines.append(f"{name:40s} {statistic['calls']:7d} {statistic['total_time'] * 1000:11.1f} "
+                         f"{statistic['max_time'] * 1000:10.1f} {statistic['memory'] / 1024:12.1f}")
+        for name, value in report["counters"].items():
+            lines.append(f"{name:40s} {value:7d}")
+        if report["peak_memory"] is not None:
+            lines.append(f"{'peak_memory [kB]':40s} {report['peak_memory'] / 1024:.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,139 @@
+"""
+This module provides a mail-merge engine: a template deck with {{field}} tokens (in text of slides, tables, notes,
+slide layouts and slide masters) is filled from many data records, one output deck per record.
+
+    merge_records("certificate.pptx", records, "out/certificate_{index}_{name}.pptx", workers=4)
+
+The template is parsed once (MergeTemplate). Tokens split into several runs (PowerPoint does this e.g. after spell
+checking) are moved into the run of their first character, then every affected part is serialized once and split at
+the tokens into a precompiled substitution index. Rendering a record only joins these byte chunks with the (escaped)
+values; all other zip entries are copied as stored in the template (no decompression/recompression). Records are
+rendered in a process pool and every deck is written directly to disk.
+@author: Nathanael Jöhrmann
+"""
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, IO, Iterable, List, Mapping, Optional, Set, Tuple, Union
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+from pptx_tools.text_replace import replace_in_element
+from pptx_tools.zip_package import TEXT_PARTS, ZipEntry, read_entries, write_zip
+
+FIELD_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][\w.\-]*)\s*\}\}")
+MERGE_PARTS = TEXT_PARTS  # parts searched for tokens
+
+_FIELD_PATTERN_BYTES = re.compile(FIELD_PATTERN.pattern.encode())
+_ESCAPE_ENTITIES = {'"': "&quot;", "'": "&apos;"}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# substitution index
+# ----------------------------------------------------------------------------------------------------------------------
+def _whole_match(match: 're.Match') -> str:
+    return match.group(0)
+
+
+def _compile_part(blob: bytes) -> Optional[List[Union[bytes, str]]]:
+    """
+    Returns the part as list of byte chunks (even positions) and field names (odd positions) or None, if the part
+    contains no tokens.
+    """
+    root = etree.fromstring(blob)
+    replace_in_element(root, FIELD_PATTERN, _whole_match)  # tokens split into several runs -> run of first character
+    xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    pieces = _FIELD_PATTERN_BYTES.split(xml)
+    if len(pieces) == 1:
+        return None
+    return [piece.decode() if i % 2 else piece for i, piece in enumerate(pieces)]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# public interface
+# ----------------------------------------------------------------------------------------------------------------------
+class MergeTemplate:
+    """Template deck parsed once into unchanged zip entries and a substitution index of the parts with tokens."""
+
+    def __init__(self, template: Union[str, IO[bytes]]):
+        """:param template: filename or binary file object of a *.pptx file with {{field}} tokens"""
+        self._entries: List[ZipEntry] = []  # entries of merged parts are replaced in render()
+        self.parts: Dict[str, List[Union[bytes, str]]] = {}  # substitution index: part name -> chunks/fields
+        for entry in read_entries(template):
+            chunks = _compile_part(entry.blob()) if MERGE_PARTS.match(entry.filename) else None
+            if chunks is not None:
+                self.parts[entry.filename] = chunks
+            self._entries.append(entry)
+
+    @property
+    def fields(self) -> Set[str]:
+        """Names of all fields used in the template."""
+        return {field for chunks in self.parts.values() for field in chunks[1::2]}
+
+    def _render_part(self, name: str, record: Mapping[str, any]) -> bytes:
+        chunks = self.parts[name]
+        result = chunks[:]
+        for i in range(1, len(chunks), 2):
+            try:
+                value = record[chunks[i]]
+            except KeyError:
+                raise KeyError(f"Field '{chunks[i]}' used in {name} is missing in record.") from None
+            result[i] = escape(f"{value}", _ESCAPE_ENTITIES).encode("utf-8")
+        return b"".join(result)
+
+    def render(self, record: Mapping[str, any], destination: Union[str, IO[bytes]]) -> None:
+        """Write the template with all {{field}} tokens replaced by record[field] to destination."""
+        entries = (ZipEntry.from_blob(entry.filename, entry.date_time, self._render_part(entry.filename, record))
+                   if entry.filename in self.parts else entry for entry in self._entries)
+        write_zip(destination, entries)
+
+
+_worker_template: Optional[MergeTemplate] = None
+
+
+def _init_worker(template: MergeTemplate) -> None:
+    global _worker_template
+    _worker_template = template
+
+
+def _render_job(job: Tuple[Mapping[str, any], str]) -> str:
+    record, filename = job
+    _worker_template.render(record, filename)
+    return filename
+
+
+def merge_records(template: Union[str, IO[bytes], MergeTemplate], records: Iterable[Mapping[str, any]],
+                  output: Union[str, Callable[[int, Mapping[str, any]], str]], workers: Optional[int] = None,
+                  max_pending: Optional[int] = None) -> List[str]:
+    """
+    Render one deck per record (see MergeTemplate.render) and return the filenames (in record order).
+    :param template: MergeTemplate or template *.pptx file
+    :param records: mappings field name -> value (e.g. rows of csv.DictReader); read lazily
+    :param output: filename pattern (formatted with index and the record fields, e.g. "out/{index}_{name}.pptx")
+        or function (index, record) -> filename
+    :param workers: number of processes (default: os.cpu_count()); 0 renders all records in this process
+    :param max_pending: max. number of records submitted but not yet written (default: 4 * workers)
+    """
+    if not isinstance(template, MergeTemplate):
+        template = MergeTemplate(template)
+    if isinstance(output, str):
+        pattern = output
+        output = lambda index, record: pattern.format(index=index, **record)
+    jobs = ((record, output(index, record)) for index, record in enumerate(records))
+
+    if workers == 0:
+        _init_worker(template)
+        return [_render_job(job) for job in jobs]
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(template,)) as executor:
+        futures, pending = [], set()
+        for job in jobs:
+            if len(pending) >= max_pending:
+                pending = wait(pending, return_when=FIRST_COMPLETED).not_done
+            future = executor.submit(_render_job, job)
+            futures.append(future)
+            pending.add(future)
+        return [future.result() for future in futures]
@@ -0,0 +1,286 @@
+"""
+This module provides helper functions to reduce the size of images embedded in a presentation
+(downsampling to the displayed size and re-encoding). Needs Pillow (a dependency of python-pptx).
+
+It also provides MediaFile for images that should not be copied into memory (used by PPTXCreator.add_image): images
+referenced by path are hashed in chunks and streamed from disk into the output zip when the presentation is saved
+(save_presentation); images in a buffer (bytes, memoryview, mmap) are used without copy. Peak memory for such an
+image is about CHUNK_SIZE instead of several times the image size.
+
+    creator.add_image(MediaFile("scan_0001.tiff"), slide)
+    with open("scans.bin", "rb") as file:
+        scans = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)  # not closed while used by the presentation
+    creator.add_image(memoryview(scans)[offset:offset + length], slide)
+    creator.save("scans.pptx")
+@author: Nathanael Jöhrmann
+"""
+import hashlib
+import io
+import os
+import zipfile
+from collections import OrderedDict
+from pathlib import PurePath
+from typing import IO, Iterator, Optional, Tuple, Union
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.package import Part
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import _ContentTypesItem
+from pptx.opc.spec import image_content_types
+from pptx.parts.image import Image, ImagePart
+from pptx.presentation import Presentation
+from pptx.shapes.picture import Picture
+from pptx.slide import Slide
+from pptx.util import Emu
+
+from pptx_tools import zip_package
+
+# (sha1 of original image, target size in pixel, jpeg_quality) -> re-encoded image
+_downsample_cache: 'OrderedDict[tuple, bytes]' = OrderedDict()
+DOWNSAMPLE_CACHE_SIZE = 64
+
+CHUNK_SIZE = 1 << 20  # bytes read/hashed/written at once by MediaFile
+PIL_EXTENSIONS = {"BMP": "bmp", "GIF": "gif", "JPEG": "jpg", "PNG": "png", "TIFF": "tiff", "WMF": "wmf"}
+
+
+def image_sha1(blob: bytes) -> str:
+    return hashlib.sha1(blob).hexdigest()
+
+
+def native_size(blob: bytes) -> Tuple[int, int]:
+    """Returns the size (in EMU) python-pptx uses for an image without explicit width/height."""
+    image = Image.from_blob(blob)
+    (width_px, height_px), (horizontal_dpi, vertical_dpi) = image.size, image.dpi
+    return round(914400 * width_px / horizontal_dpi), round(914400 * height_px / vertical_dpi)
+
+
+def target_pixel_size(blob: bytes, width: int, height: int, target_dpi: float) -> Optional[Tuple[int, int]]:
+    """
+    Returns the pixel size needed to show the image with target_dpi at the given displayed size (EMU),
+    or None if the image resolution is already at or below target_dpi.
+    """
+    width_px, height_px = Image.from_blob(blob).size
+    target_width = max(1, round(Emu(width).inches * target_dpi))
+    target_height = max(1, round(Emu(height).inches * target_dpi))
+    if target_width >= width_px and target_height >= height_px:
+        return None
+    return min(target_width, width_px), min(target_height, height_px)
+
+
+def downsample_image(blob: bytes, size: Tuple[int, int], jpeg_quality: int = 85) -> bytes:
+    """
+    Resample image to size (pixel) and re-encode it: JPEG stays JPEG (with jpeg_quality), everything else is saved as
+    optimized PNG. Results are cached by (sha1, size, jpeg_quality), so repeated images are only resampled once.
+    """
+    key = (image_sha1(blob), tuple(size), jpeg_quality)
+    if key in _downsample_cache:
+        _downsample_cache.move_to_end(key)
+        return _downsample_cache[key]
+
+    from PIL import Image as PILImage
+    with PILImage.open(io.BytesIO(blob)) as image:
+        is_jpeg = image.format == "JPEG"
+        if not is_jpeg and image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA")
+        resized = image.resize(size, PILImage.LANCZOS)
+        with io.BytesIO() as output:
+            if is_jpeg:
+                resized.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+            else:
+                resized.save(output, format="PNG", optimize=True)
+            result = output.getvalue()
+
+    _downsample_cache[key] = result
+    if len(_downsample_cache) > DOWNSAMPLE_CACHE_SIZE:
+        _downsample_cache.popitem(last=False)
+    return result
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# images without copy (MediaFile)
+# ----------------------------------------------------------------------------------------------------------------------
+class _BufferFile(io.RawIOBase):
+    """Read-only file object for a buffer (only the requested bytes are copied, e.g. for Pillow to read a header)."""
+
+    def __init__(self, buffer: memoryview):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        data = self._buffer[self._position:self._position + len(target)]
+        target[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._buffer)}[whence]
+        self._position = max(0, start + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def _int_dpi(value) -> int:
+    """dpi value as used by python-pptx (72 for missing or invalid values)."""
+    try:
+        dpi = int(round(float(value)))
+    except (TypeError, ValueError):
+        return 72
+    return dpi if 1 <= dpi <= 2048 else 72
+
+
+class MediaFile:
+    """
+    Image referenced by path (hashed in chunks, streamed from disk when saved) or given as buffer (bytes, bytearray,
+    memoryview, mmap - used without copy; has to stay valid and unchanged until the presentation is saved).
+    Only the image header is parsed (format, size and dpi).
+    """
+
+    def __init__(self, source: Union[str, PurePath, bytes, bytearray, memoryview, 'mmap.mmap'],
+                 filename: Optional[str] = None, chunk_size: int = CHUNK_SIZE):
+        if isinstance(source, (str, PurePath)):
+            self.path: Optional[str] = os.fspath(source)
+            self.buffer: Optional[memoryview] = None
+            self.filename = filename or os.path.basename(self.path)
+            self.size = os.path.getsize(self.path)
+        else:
+            self.path = None
+            self.buffer = memoryview(source).cast("B")
+            self.filename = filename
+            self.size = len(self.buffer)
+        self.chunk_size = chunk_size
+
+        sha1 = hashlib.sha1()
+        for chunk in self.iter_chunks():
+            sha1.update(chunk)
+        self.sha1 = sha1.hexdigest()
+
+        from PIL import Image as PILImage
+        with self.open() as file, PILImage.open(file) as image:
+            pil_format, self.px_size, pil_dpi = image.format, image.size, image.info.get("dpi")
+        if pil_format not in PIL_EXTENSIONS:
+            raise ValueError(f"Unsupported image format {pil_format} (expected one of {', '.join(PIL_EXTENSIONS)}).")
+        self.ext = PIL_EXTENSIONS[pil_format]
+        self.content_type = image_content_types[self.ext]
+        self.dpi = tuple(_int_dpi(value) for value in pil_dpi) if isinstance(pil_dpi, tuple) else (72, 72)
+
+    def open(self) -> IO[bytes]:
+        """Binary file object of the image data."""
+        if self.buffer is not None:
+            return io.BufferedReader(_BufferFile(self.buffer))
+        return open(self.path, "rb")
+
+    def iter_chunks(self) -> Iterator[Union[bytes, memoryview]]:
+        """Image data in chunks of chunk_size (slices of buffer without copy)."""
+        if self.buffer is not None:
+            for start in range(0, self.size, self.chunk_size):
+                yield self.buffer[start:start + self.chunk_size]
+            return
+        with open(self.path, "rb") as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                yield chunk
+
+    def read(self) -> Union[bytes, memoryview]:
+        """All image data (the buffer itself or the file content)."""
+        if self.buffer is not None:
+            return self.buffer
+        with open(self.path, "rb") as file:
+            return file.read()
+
+
+class StreamedImagePart(ImagePart):
+    """Image part keeping its data in a MediaFile (written in chunks by save_presentation)."""
+
+    def __init__(self, partname: PackURI, package, media_file: MediaFile):
+        super().__init__(partname, media_file.content_type, package, b"", media_file.filename)
+        self.media_file = media_file
+
+    @property
+    def blob(self) -> Union[bytes, memoryview]:
+        return self.media_file.read()
+
+    @property
+    def image(self) -> Image:
+        return Image(bytes(self.blob), self.desc)
+
+    @property
+    def sha1(self) -> str:
+        return self.media_file.sha1
+
+    @property
+    def _dpi(self) -> Tuple[int, int]:
+        return self.media_file.dpi
+
+    @property
+    def _px_size(self) -> Tuple[int, int]:
+        return self.media_file.px_size
+
+
+def get_or_add_image_part(package, media_file: MediaFile) -> ImagePart:
+    """Image part of package with the image of media_file (reused if the package already contains this image)."""
+    image_part = package._image_parts._find_by_sha1(media_file.sha1)
+    if image_part is None:
+        image_part = StreamedImagePart(package.next_image_partname(media_file.ext), package, media_file)
+    return image_part
+
+
+def add_picture(slide: Slide, media_file: MediaFile, left: int, top: int, width: Optional[int] = None,
+                height: Optional[int] = None) -> Picture:
+    """Like slide.shapes.add_picture, but for a MediaFile."""
+    image_part = get_or_add_image_part(slide.part.package, media_file)
+    r_id = slide.part.relate_to(image_part, RT.IMAGE)
+    pic = slide.shapes._add_pic_from_image_part(image_part, r_id, left, top, width, height)
+    slide.shapes._recalculate_extents()
+    return slide.shapes._shape_factory(pic)
+
+
+def part_size(part: Part) -> int:
+    """Size of the part data [bytes] (without loading streamed images)."""
+    if isinstance(part, StreamedImagePart):
+        return part.media_file.size
+    return len(part.blob)
+
+
+def write_part(zip_file: zipfile.ZipFile, name: str, part: Part) -> None:
+    """Write the data of part as entry name to zip_file - StreamedImageParts chunk by chunk."""
+    if not isinstance(part, StreamedImagePart):
+        zip_file.writestr(name, part.blob)
+        return
+    with zip_file.open(name, "w", force_zip64=part.media_file.size > zipfile.ZIP64_LIMIT) as entry:
+        for chunk in part.media_file.iter_chunks():
+            entry.write(chunk)
+
+
+def save_presentation(prs: Presentation, file: Union[str, IO[bytes]], deterministic: bool = False) -> None:
+    """
+    Save prs like prs.save(file), but write StreamedImageParts chunk by chunk (not loaded into memory).
+    If deterministic is True, the modification date is set to the build date and the zip file gets fixed entry order
+    and timestamps (see zip_package.deterministic_zip).
+    """
+    if deterministic:
+        prs.core_properties.modified = zip_package.build_datetime()
+        with io.BytesIO() as buffer:
+            save_presentation(prs, buffer)
+            zip_package.deterministic_zip(buffer, file if hasattr(file, "write") else str(file))
+        return
+    package = prs.part.package
+    parts = list(package.iter_parts())
+    if not any(isinstance(part, StreamedImagePart) for part in parts):
+        prs.save(file)
+        return
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as zip_file:  # same entries as python-pptx PackageWriter
+        zip_file.writestr(CONTENT_TYPES_URI[1:], serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        zip_file.writestr(PACKAGE_URI.rels_uri[1:], package._rels.xml)
+        for part in parts:
+            write_part(zip_file, part.partname[1:], part)
+            if part._rels:
+                zip_file.writestr(part.partname.rels_uri[1:], part.rels.xml)
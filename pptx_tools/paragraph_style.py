@@ -2,15 +2,28 @@
 This module provides a helper class to deal with paragraphs in python-pptx.
 @author: Nathanael Jöhrmann
 """
-from typing import Optional
+import copy
+from typing import Optional, Union, Iterable
 
 from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
 from pptx.shapes.autoshape import Shape
+from pptx.slide import Slide
+from pptx.table import Table
 from pptx.text.text import _Paragraph
+from pptx.util import Length, Emu
 
 from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.instrumentation import instrumented
 from pptx_tools.utils import _DO_NOT_CHANGE
 
+_BULLET_TAGS = tuple(qn(tag) for tag in ("a:buNone", "a:buAutoNum", "a:buChar", "a:buBlip"))
+# child order of a:pPr (used to insert children at the correct position)
+_PPR_TAG_SEQ = ("a:lnSpc", "a:spcBef", "a:spcAft", "a:buClrTx", "a:buClr", "a:buSzTx", "a:buSzPct", "a:buSzPts",
+                "a:buFontTx", "a:buFont", "a:buNone", "a:buAutoNum", "a:buChar", "a:buBlip", "a:tabLst", "a:defRPr",
+                "a:extLst")
+
 
 class PPTXParagraphStyle:
     """
@@ -22,8 +35,11 @@ class PPTXParagraphStyle:
         self.alignment: Optional[PP_PARAGRAPH_ALIGNMENT] = None  # PP_PARAGRAPH_ALIGNMENT.CENTER/JUSTIFY/LEFT/RIGHT/...
         self.level: Optional[int] = None  # 0 .. 8 (indentation level)
         self.line_spacing: Optional[float] = None
-        self.space_before: Optional[float] = None
-        self.space_after: Optional[float] = None
+        self.space_before: Optional[Length] = None  # e.g. Pt(6)
+        self.space_after: Optional[Length] = None  # e.g. Pt(6)
+        self.margin_left: Optional[Length] = None  # e.g. Inches(0.5); left indentation of all lines
+        self.indent: Optional[Length] = None  # indentation of first line (relative to margin_left; can be negative)
+        self.bullet: Union[str, bool, None] = None  # bullet character (e.g. "•"); False -> no bullet
         # --------------------------------------------------------------------------------------------------------------
         self.font_style: Optional[PPTXFontStyle] = None
 
@@ -34,14 +50,35 @@ class PPTXParagraphStyle:
         self.line_spacing = paragraph.line_spacing
         self.space_before = paragraph.space_before
         self.space_after = paragraph.space_after
+        pPr = paragraph._p.pPr
+        if pPr is None:
+            self.margin_left = self.indent = self.bullet = None
+        else:
+            self.margin_left = None if pPr.get("marL") is None else Emu(int(pPr.get("marL")))
+            self.indent = None if pPr.get("indent") is None else Emu(int(pPr.get("indent")))
+            self.bullet = self._read_bullet(pPr)
         self.font_style = PPTXFontStyle().read_font(paragraph.font)
         return self
 
+    @staticmethod
+    def _read_bullet(pPr) -> Union[str, bool, None]:
+        bullet = next(pPr.iterchildren(*_BULLET_TAGS), None)
+        if bullet is None:
+            return None
+        if bullet.tag == qn("a:buNone"):
+            return False
+        if bullet.tag == qn("a:buChar"):
+            return bullet.get("char")
+        return None  # auto numbering and picture bullets are not supported jet
+
     def set(self, alignment: Optional[PP_PARAGRAPH_ALIGNMENT] = _DO_NOT_CHANGE,
             level: Optional[int] = _DO_NOT_CHANGE,
             line_spacing: Optional[float] = _DO_NOT_CHANGE,
-            space_before: Optional[float] = _DO_NOT_CHANGE,
-            space_after: Optional[float] = _DO_NOT_CHANGE
+            space_before: Optional[Length] = _DO_NOT_CHANGE,
+            space_after: Optional[Length] = _DO_NOT_CHANGE,
+            margin_left: Optional[Length] = _DO_NOT_CHANGE,
+            indent: Optional[Length] = _DO_NOT_CHANGE,
+            bullet: Union[str, bool, None] = _DO_NOT_CHANGE
             ) -> 'PPTXParagraphStyle':
         """Convenience method to set several paragraph attributes together."""
         if alignment is not _DO_NOT_CHANGE:
@@ -54,6 +91,12 @@ class PPTXParagraphStyle:
             self.space_before = space_before
         if space_after is not _DO_NOT_CHANGE:
             self.space_after = space_after
+        if margin_left is not _DO_NOT_CHANGE:
+            self.margin_left = margin_left
+        if indent is not _DO_NOT_CHANGE:
+            self.indent = indent
+        if bullet is not _DO_NOT_CHANGE:
+            self.bullet = bullet
         return self
 
     def write_paragraph(self, paragraph: _Paragraph) -> None:
@@ -64,9 +107,71 @@ class PPTXParagraphStyle:
             paragraph.level = self.level
         if self.line_spacing is not None:
             paragraph.line_spacing = self.line_spacing
+        if self.space_before is not None:
+            paragraph.space_before = self.space_before
+        if self.space_after is not None:
+            paragraph.space_after = self.space_after
+        if self.margin_left is not None:
+            paragraph._p.get_or_add_pPr().set("marL", str(int(self.margin_left)))
+        if self.indent is not None:
+            paragraph._p.get_or_add_pPr().set("indent", str(int(self.indent)))
+        if self.bullet is not None:
+            self._write_bullet(paragraph._p.get_or_add_pPr())
         if self.font_style is not None:
             self.font_style.write_paragraph(paragraph)
 
+    def _write_bullet(self, pPr) -> None:
+        for old_bullet in list(pPr.iterchildren(*_BULLET_TAGS)):
+            pPr.remove(old_bullet)
+        if self.bullet is False:
+            bullet = parse_xml(f'<a:buNone {nsdecls("a")}/>')
+        else:
+            bullet = parse_xml(f'<a:buChar {nsdecls("a")}/>')
+            bullet.set("char", self.bullet)
+        pPr.insert_element_before(bullet, *_PPR_TAG_SEQ[_PPR_TAG_SEQ.index("a:buBlip") + 1:])
+
+    @instrumented("PPTXParagraphStyle.write_all_paragraphs")
+    def write_all_paragraphs(self, target: Union[Shape, Table, Slide]) -> None:
+        """
+        Batched version of write_shape(): write attributes to every paragraph in given shape, table or slide.
+        The paragraph properties are created only once and copied to all a:p elements found in one lxml traversal
+        (without creating _Paragraph objects).
+        """
+        element = target._tbl if isinstance(target, Table) else target._element
+        self.write_p_elements(list(element.iter(qn("a:p"))))
+
+    @instrumented("PPTXParagraphStyle.write_p_elements")
+    def write_p_elements(self, p_elements: Iterable) -> None:
+        """Batched version of write_paragraph() for many a:p elements."""
+        source = parse_xml(f'<a:p {nsdecls("a")}/>')
+        font_style, self.font_style = self.font_style, None  # font is merged separately (keeps existing values)
+        try:
+            self.write_paragraph(_Paragraph(source, None))
+        finally:
+            self.font_style = font_style
+        source_pPr = source.get_or_add_pPr()
+
+        pPr_elements = []
+        for p in p_elements:
+            pPr = p.get_or_add_pPr()
+            pPr.attrib.update(source_pPr.attrib)
+            for child in source_pPr:
+                self._replace_pPr_child(pPr, child)
+            pPr_elements.append(pPr)
+
+        if self.font_style is not None:
+            self.font_style.write_rPr_elements(pPr.get_or_add_defRPr() for pPr in pPr_elements)
+
+    @staticmethod
+    def _replace_pPr_child(pPr, child) -> None:
+        """Replace child (or bullet group) of pPr with a copy of child, keeping the schema order."""
+        old_children = pPr.iterchildren(*_BULLET_TAGS) if child.tag in _BULLET_TAGS else pPr.iterchildren(child.tag)
+        for old_child in list(old_children):
+            pPr.remove(old_child)
+        prefixed_tag = "a:" + child.tag.rsplit("}", 1)[1]
+        pPr.insert_element_before(copy.deepcopy(child), *_PPR_TAG_SEQ[_PPR_TAG_SEQ.index(prefixed_tag) + 1:])
+
+    @instrumented("PPTXParagraphStyle.write_shape")
     def write_shape(self, shape: Shape) -> None:
         """
         Write attributes to all paragraphs in given pptx.shapes.autoshape.Shape.
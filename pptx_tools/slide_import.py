@@ -0,0 +1,286 @@
+"""
+This module provides import of slides from other presentations (files, python-pptx Presentations or PPTXCreator
+instances) into a presentation (used by PPTXCreator.import_slides()). To merge many decks, use one SlideImporter for
+all of them - media, slide layouts and slide masters are indexed once and reused by hash:
+
+    importer = SlideImporter(creator)
+    for filename in filenames:
+        importer.import_slides(filename)
+
+- Relationships keep their rIds, so the copied slide XML does not need to be changed.
+- Images/media with identical content and identical slide layouts (incl. their slide master) are reused.
+  Slide layouts not found in the target are copied together with their slide master (only used layouts).
+- Other related parts (charts, embedded workbooks, ...) are copied; notes slides are not imported.
+- Hyperlinks to slides that are not imported are removed.
+Run time is linear in the number of imported parts. Only one source presentation has to be kept in memory at a time.
+@author: Nathanael Jöhrmann
+"""
+import copy
+import hashlib
+import re
+from typing import Dict, IO, Iterable, List, Optional, Union
+
+import pptx
+from lxml import etree
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT, RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.package import Part, XmlPart, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.oxml.ns import qn
+from pptx.parts.image import ImagePart
+from pptx.parts.media import MediaPart
+from pptx.presentation import Presentation
+from pptx.slide import Slide
+
+_MIN_MASTER_ID = 2147483648  # ids of slide masters and slide layouts share one range
+_MIN_SLIDE_ID = 256
+_SLIDE_LINK_ATTRIBUTE = qn("r:id")
+
+
+def _partname_template(partname: str) -> str:
+    """'/ppt/media/image12.png' -> '/ppt/media/image%d.png'"""
+    match = re.match(r"^(.*?)\d*(\.[^./]+)$", partname)
+    if match is None:
+        return partname + "%d"
+    return match.group(1) + "%d" + match.group(2)
+
+
+def _presentation(source) -> Presentation:
+    """source: filename, binary file object, python-pptx Presentation or PPTXCreator"""
+    if isinstance(source, Presentation):
+        return source
+    if hasattr(source, "prs"):
+        return source.prs
+    return pptx.Presentation(source)
+
+
+class SlideImporter:
+    """Imports slides from other presentations into target (a python-pptx Presentation or PPTXCreator)."""
+
+    def __init__(self, target):
+        self.prs = _presentation(target)
+        self._presentation_part = self.prs.part
+        self._package = self._presentation_part.package
+
+        self._partnames = set()
+        self._next_partname_index: Dict[str, int] = {}
+        self._media: Dict[str, Part] = {}  # sha1 -> image/media part
+        self._media_hashes: Dict[Part, str] = {}  # image/media part -> sha1 (media are only hashed once)
+        self._hashes: Dict[tuple, str] = {}  # (part, exclude_reltype) -> hash; cleared after each import
+        self._slide_links: List[tuple] = []  # (new part, rId, source slide part) of hyperlinks between slides
+        self._masters: Dict[str, Part] = {}  # master hash -> master part
+        self._layouts: Dict[tuple, Part] = {}  # (layout hash, master hash) -> layout part
+        self._next_master_id = _MIN_MASTER_ID
+        self._next_slide_id = _MIN_SLIDE_ID
+
+    def _read_target(self) -> None:
+        """
+        Read part names, media, masters/layouts and ids of the target presentation. Called before each import, because
+        the target might have been changed in between (e.g. slides or images added by PPTXCreator).
+        """
+        self._partnames = set()
+        self._media = {}
+        media_hashes = {}
+        for part in self._package.iter_parts():
+            self._partnames.add(part.partname)
+            if isinstance(part, (ImagePart, MediaPart)):
+                sha1 = self._media_hashes.get(part) or hashlib.sha1(part.blob).hexdigest()
+                media_hashes[part] = sha1
+                self._media.setdefault(sha1, part)
+        self._media_hashes = media_hashes
+
+        self._masters = {}
+        self._layouts = {}
+        master_ids = [int(sld_master_id.get("id")) for sld_master_id in self.prs.slide_masters._sldMasterIdLst]
+        for master in self.prs.slide_masters:
+            self._register_master(master.part)
+            master_ids.extend(int(sld_layout_id.get("id"))
+                              for sld_layout_id in master._element.get_or_add_sldLayoutIdLst())
+        self._next_master_id = max([self._next_master_id - 1] + master_ids) + 1
+
+        sld_id_lst = self.prs.slides._sldIdLst
+        self._next_slide_id = max([self._next_slide_id - 1] + [sld_id.id for sld_id in sld_id_lst.sldId_lst]) + 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # hashes
+    # ------------------------------------------------------------------------------------------------------------------
+    def _hash(self, part: Part, exclude_reltype: Optional[str] = None) -> str:
+        """
+        Content hash of part including all related parts (except relationships of exclude_reltype, used to break
+        the circle slide master <-> slide layout).
+        """
+        key = self._hashes.get((part, exclude_reltype))
+        if key is not None:
+            return key
+        if not isinstance(part, XmlPart):
+            sha1 = hashlib.sha1(part.blob)
+        elif exclude_reltype == RT.SLIDE_LAYOUT:  # the slide layouts of a master are not part of its identity
+            element = copy.deepcopy(part._element)
+            for sld_layout_id_lst in element.findall(qn("p:sldLayoutIdLst")):
+                element.remove(sld_layout_id_lst)
+            sha1 = hashlib.sha1(etree.tostring(element))
+        else:
+            sha1 = hashlib.sha1(etree.tostring(part._element))
+        for r_id in sorted(part.rels):
+            rel = part.rels[r_id]
+            if rel.reltype == exclude_reltype:
+                continue
+            target = rel.target_ref if rel.is_external else self._hash(rel.target_part)
+            sha1.update(f"|{r_id}|{rel.reltype}|{target}".encode())
+        key = self._hashes[part, exclude_reltype] = sha1.hexdigest()
+        return key
+
+    def _master_hash(self, master_part: Part) -> str:
+        return self._hash(master_part, RT.SLIDE_LAYOUT)
+
+    def _layout_key(self, layout_part: Part) -> tuple:
+        return (self._hash(layout_part, RT.SLIDE_MASTER),
+                self._master_hash(layout_part.part_related_by(RT.SLIDE_MASTER)))
+
+    def _register_master(self, master_part: Part) -> None:
+        self._masters.setdefault(self._master_hash(master_part), master_part)
+        for rel in master_part.rels.values():
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                self._layouts.setdefault(self._layout_key(rel.target_part), rel.target_part)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # copy parts
+    # ------------------------------------------------------------------------------------------------------------------
+    def _new_partname(self, partname: str) -> PackURI:
+        template = _partname_template(partname)
+        index = self._next_partname_index.get(template, 1)
+        while template % index in self._partnames:
+            index += 1
+        self._next_partname_index[template] = index + 1
+        result = PackURI(template % index)
+        self._partnames.add(result)
+        return result
+
+    def _copy_part(self, part: Part, part_map: Dict[Part, Part]) -> Part:
+        """Copy part (but not its relationships) into target package."""
+        partname = self._new_partname(part.partname)
+        if isinstance(part, XmlPart):
+            result = type(part)(partname, part.content_type, self._package, copy.deepcopy(part._element))
+        else:
+            result = type(part).load(partname, part.content_type, self._package, part.blob)
+        part_map[part] = result
+        return result
+
+    def _copy_rels(self, part: Part, new_part: Part, part_map: Dict[Part, Part], skip=()) -> None:
+        """Copy relationships of part to new_part (same rIds), importing all target parts."""
+        for r_id, rel in part.rels.items():
+            if rel.reltype in skip:
+                continue
+            if rel.is_external:
+                target = rel.target_ref
+            elif rel.reltype == RT.SLIDE:  # resolved after all slides are imported
+                self._slide_links.append((new_part, r_id, rel.target_part))
+                continue
+            else:
+                target = self._import_part(rel.target_part, part_map)
+            new_part.rels._rels[r_id] = _Relationship(new_part.rels._base_uri, r_id, rel.reltype, rel._target_mode,
+                                                      target)
+
+    def _import_part(self, part: Part, part_map: Dict[Part, Part]) -> Part:
+        if part in part_map:
+            return part_map[part]
+        if isinstance(part, (ImagePart, MediaPart)):
+            sha1 = hashlib.sha1(part.blob).hexdigest()
+            if sha1 not in self._media:
+                self._media[sha1] = self._copy_part(part, part_map)
+                self._media_hashes[self._media[sha1]] = sha1
+            result = part_map[part] = self._media[sha1]
+            return result
+        if part.content_type == CT.PML_SLIDE_LAYOUT:
+            result = part_map[part] = self._import_layout(part, part_map)
+            return result
+        new_part = self._copy_part(part, part_map)
+        self._copy_rels(part, new_part, part_map)
+        return new_part
+
+    def _import_master(self, master_part: Part, part_map: Dict[Part, Part]) -> Part:
+        """Copy master_part (without its slide layouts) and add it to the target presentation."""
+        master_hash = self._master_hash(master_part)
+        if master_hash in self._masters:
+            return self._masters[master_hash]
+        new_master = self._copy_part(master_part, part_map)
+        sld_layout_id_lst = new_master._element.get_or_add_sldLayoutIdLst()
+        for sld_layout_id in list(sld_layout_id_lst):
+            sld_layout_id_lst.remove(sld_layout_id)
+        self._copy_rels(master_part, new_master, part_map, skip=(RT.SLIDE_LAYOUT,))
+
+        r_id = self._presentation_part.rels._add_relationship(RT.SLIDE_MASTER, new_master)
+        sld_master_id = self.prs.slide_masters._sldMasterIdLst._add_sldMasterId()
+        sld_master_id.set("id", str(self._next_master_id))
+        sld_master_id.rId = r_id
+        self._next_master_id += 1
+        self._masters[master_hash] = new_master
+        return new_master
+
+    def _import_layout(self, layout_part: Part, part_map: Dict[Part, Part]) -> Part:
+        """Returns an identical slide layout of the target presentation, or copies layout_part (and its master)."""
+        key = self._layout_key(layout_part)
+        if key in self._layouts:
+            return self._layouts[key]
+        master_part = layout_part.part_related_by(RT.SLIDE_MASTER)
+        new_master = self._import_master(master_part, part_map)
+        new_layout = self._copy_part(layout_part, part_map)
+        self._copy_rels(layout_part, new_layout, part_map, skip=(RT.SLIDE_MASTER,))
+        for r_id, rel in layout_part.rels.items():
+            if rel.reltype == RT.SLIDE_MASTER:
+                new_layout.rels._rels[r_id] = _Relationship(new_layout.rels._base_uri, r_id, RT.SLIDE_MASTER,
+                                                            rel._target_mode, new_master)
+
+        r_id = new_master.rels._add_relationship(RT.SLIDE_LAYOUT, new_layout)
+        sld_layout_id = new_master._element.get_or_add_sldLayoutIdLst()._add_sldLayoutId()
+        sld_layout_id.set("id", str(self._next_master_id))
+        sld_layout_id.rId = r_id
+        self._next_master_id += 1
+        self._layouts[key] = new_layout
+        return new_layout
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # public interface
+    # ------------------------------------------------------------------------------------------------------------------
+    def import_slides(self, source: Union[str, IO[bytes], Presentation, 'PPTXCreator'],
+                      slides: Optional[Iterable[Union[int, Slide]]] = None,
+                      index: Optional[int] = None) -> List[Slide]:
+        """
+        Copy slides (all slides if None; slide indices or Slide objects) of source to the end of the target
+        presentation (or to position index). Returns the new slides.
+        """
+        source_prs = _presentation(source)
+        if source_prs is self.prs:
+            raise ValueError("Can not import slides from the target presentation itself.")
+        if slides is None:
+            slides = list(source_prs.slides)
+        else:
+            slides = [source_prs.slides[slide] if isinstance(slide, int) else slide for slide in slides]
+
+        self._read_target()
+        part_map: Dict[Part, Part] = {}
+        self._slide_links = []
+        sld_id_lst = self.prs.slides._sldIdLst
+        new_sld_ids = []
+        for slide in slides:
+            new_part = self._copy_part(slide.part, part_map)
+            self._copy_rels(slide.part, new_part, part_map, skip=(RT.NOTES_SLIDE,))
+            r_id = self._presentation_part.rels._add_relationship(RT.SLIDE, new_part)
+            new_sld_ids.append(sld_id_lst._add_sldId(id=self._next_slide_id, rId=r_id))
+            self._next_slide_id += 1
+
+        for new_part, r_id, target_part in self._slide_links:
+            if target_part in part_map:
+                new_part.rels._rels[r_id] = _Relationship(new_part.rels._base_uri, r_id, RT.SLIDE, RTM.INTERNAL,
+                                                          part_map[target_part])
+            else:
+                for element in [element for element in new_part._element.iter()
+                                if element.get(_SLIDE_LINK_ATTRIBUTE) == r_id]:
+                    element.getparent().remove(element)
+        self._slide_links = []
+        self._hashes = {}  # do not keep source presentation alive
+
+        if index is not None:
+            for offset, sld_id in enumerate(new_sld_ids):
+                sld_id_lst.insert(index + offset, sld_id)
+
+        return [part_map[slide.part].slide for slide in slides]
@@ -0,0 +1,126 @@
+"""
+This module provides snapshots of a (partially built) PPTXCreator, to cheaply build many variants of a presentation
+sharing the same first slides:
+
+    creator = PPTXCreator(TemplateExample())
+    ...  # add shared slides
+    snapshot = creator.snapshot()
+    for variant in variants:
+        variant_creator = snapshot.fork()
+        ...  # add variant specific slides
+        variant_creator.save(f"{variant}.pptx")
+
+Copies are made on the in-memory package (no saving and re-parsing): the XML of slides, notes and the presentation
+part is deep-copied, while images, media, slide layouts, slide masters and themes are shared between all copies.
+Shared parts have to be treated as read-only (e.g. do not change placeholders of a layout after forking).
+The template of a fork is a shallow copy using the forked presentation (its layouts and masters are shared as well).
+@author: Nathanael Jöhrmann
+"""
+import copy
+from typing import Dict, Optional, Tuple
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.package import Part, XmlPart, _Relationship
+from pptx.package import Package
+from pptx.parts.image import ImagePart
+from pptx.parts.media import MediaPart
+from pptx.presentation import Presentation
+from pptx.slide import SlideLayout, SlideMaster
+
+_SHARED_CONTENT_TYPES = (CT.PML_SLIDE_LAYOUT, CT.PML_SLIDE_MASTER, CT.OFC_THEME)
+
+
+def _is_shareable(part: Part) -> bool:
+    return isinstance(part, (ImagePart, MediaPart)) or part.content_type in _SHARED_CONTENT_TYPES
+
+
+def _shared_parts(package: Package) -> set:
+    """Shareable parts, excluding all parts related to a part that is not shared (e.g. a layout linking to a chart)."""
+    parts = list(package.iter_parts())
+    shared = {part for part in parts if _is_shareable(part)}
+    changed = True
+    while changed:
+        changed = False
+        for part in list(shared):
+            if any(not rel.is_external and rel.target_part not in shared for rel in part.rels.values()):
+                shared.discard(part)
+                changed = True
+    return shared
+
+
+def copy_presentation(prs: Presentation) -> Tuple[Presentation, Dict[Part, Part]]:
+    """
+    Returns an independent copy of prs (sharing read-only parts, see module docstring) and a dict mapping
+    all parts of prs to their counterpart in the copy.
+    """
+    package = prs.part.package
+    shared = _shared_parts(package)
+    new_package = Package(None)
+
+    part_map: Dict[Part, Part] = {}
+    for part in package.iter_parts():
+        if part in shared:
+            part_map[part] = part
+        elif isinstance(part, XmlPart):
+            part_map[part] = type(part)(part.partname, part.content_type, new_package, copy.deepcopy(part._element))
+        else:  # binary parts (e.g. embedded xlsx) can be changed -> new part, but sharing the (immutable) bytes
+            part_map[part] = type(part).load(part.partname, part.content_type, new_package, part.blob)
+
+    def copy_rels(source_rels, target_rels):
+        for rel in source_rels.values():
+            target = rel.target_ref if rel.is_external else part_map[rel.target_part]
+            target_rels._rels[rel.rId] = _Relationship(target_rels._base_uri, rel.rId, rel.reltype,
+                                                       rel._target_mode, target)
+
+    copy_rels(package._rels, new_package._rels)
+    for part, new_part in part_map.items():
+        if new_part is not part:
+            copy_rels(part.rels, new_part.rels)
+
+    return new_package.presentation_part.presentation, part_map
+
+
+def _map_layout(layout: Optional[SlideLayout], part_map: Dict[Part, Part]) -> Optional[SlideLayout]:
+    if layout is None:
+        return None
+    return part_map[layout.part].slide_layout
+
+
+class PPTXSnapshot:
+    """
+    Frozen copy of the state of a PPTXCreator (see PPTXCreator.snapshot()).
+    Changing the creator afterwards does not change the snapshot; every fork() returns a new, independent creator.
+    """
+
+    def __init__(self, creator: 'PPTXCreator'):
+        self._creator = _copy_creator(creator)
+
+    def fork(self) -> 'PPTXCreator':
+        """Returns a new PPTXCreator with the presentation state of this snapshot."""
+        return _copy_creator(self._creator)
+
+
+def _copy_creator(creator: 'PPTXCreator') -> 'PPTXCreator':
+    """Used by PPTXCreator.fork() and PPTXSnapshot."""
+    prs, part_map = copy_presentation(creator.prs)
+    result = copy.copy(creator)
+    result.prs = prs
+    result.slides = [part_map[slide.part].slide for slide in creator.slides]
+    result.title_layout = _map_layout(creator.title_layout, part_map)
+    result.default_layout = _map_layout(creator.default_layout, part_map)
+    result.default_position = copy.copy(creator.default_position)
+    if creator.template is not None:
+        result.template = _copy_template(creator.template, prs, part_map)
+    return result
+
+
+def _copy_template(template: 'AbstractTemplate', prs: Presentation, part_map: Dict[Part, Part]) -> 'AbstractTemplate':
+    """Shallow copy of template using prs (slide layouts/masters of template are mapped to prs)."""
+    result = copy.copy(template)
+    for name, value in vars(template).items():
+        if isinstance(value, SlideLayout):
+            setattr(result, name, _map_layout(value, part_map))
+        elif isinstance(value, SlideMaster):
+            setattr(result, name, part_map[value.part].slide_master)
+    result.prs = prs
+    return result
@@ -0,0 +1,217 @@
+"""
+This module provides StreamingPPTXCreator, a PPTXCreator writing very large presentations with (nearly) constant memory.
+
+    with StreamingPPTXCreator("report.pptx", TemplateExample()) as creator:
+        for client in clients:
+            slide = creator.add_slide(client.name)
+            creator.add_table(slide, client.data)
+            creator.add_image(client.figure_file, slide)
+
+A slide is written to the output zip (slide XML, rels and all related parts: media, charts, notes ...) as soon as the
+next slide is added (or flush()/close() is called) and then removed from the presentation, so only the current slide
+is kept in memory. Media are written once (identical images of several slides are stored once, by sha1); images
+added as media.MediaFile are streamed from disk.
+presentation.xml, [Content_Types].xml, the package rels and all template parts (slide masters, layouts, themes, core
+properties ...) are written by close().
+
+Limitations: a slide can not be changed after the next slide was added, slides can not be reordered or linked to
+each other (move_slide, add_content_slide, create_hyperlink) and the presentation can not be copied or exported
+(snapshot, fork, import_slides, save, write, save_as_pdf, save_as_png) and texts of written slides can not be replaced
+(replace_text). These methods raise StreamingNotSupportedError.
+@author: Nathanael Jöhrmann
+"""
+import hashlib
+import re
+import zipfile
+from typing import IO, Dict, List, Optional, Tuple, Union
+
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import CT_Relationships, CT_Types, parse_xml, serialize_part_xml
+from pptx.opc.package import Part
+from pptx.opc.packuri import PackURI
+from pptx.opc.spec import default_content_types
+from pptx.slide import Slide, SlideLayout
+
+from pptx_tools import media
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.templates import AbstractTemplate
+
+MEDIA_CONTENT_TYPE_PREFIXES = ("image/", "video/", "audio/")
+
+
+class StreamingNotSupportedError(RuntimeError):
+    """Raised by methods of PPTXCreator that can not work with StreamingPPTXCreator (see module docstring)."""
+
+
+def _is_media(part: Part) -> bool:
+    return part.content_type.startswith(MEDIA_CONTENT_TYPE_PREFIXES) or part.partname.startswith("/ppt/media/")
+
+
+def _rels_xml(partname: str, relationships: List[Tuple[str, str, str, bool]]) -> bytes:
+    """Rels item for relationships (rId, reltype, target partname or external target, is_external) of partname."""
+    rels = CT_Relationships.new()
+    base_uri = PackURI(partname).baseURI
+    for r_id, reltype, target, is_external in relationships:
+        rels.add_rel(r_id, reltype, target if is_external else PackURI(target).relative_ref(base_uri), is_external)
+    return rels.xml_file_bytes
+
+
+class StreamingPPTXCreator(PPTXCreator):
+    """PPTXCreator writing every finished slide immediately to filename (see module docstring)."""
+
+    def __init__(self, filename: Union[str, IO[bytes]], template: Optional[AbstractTemplate] = None,
+                 build_cache: Optional['build_cache.SlideBuildCache'] = None):
+        """:param filename: output *.pptx file (filename or writable binary file object)"""
+        super().__init__(template, build_cache)
+        self.filename = filename
+        self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED)
+        self._current: Optional[Slide] = None
+        self._slide_names: List[str] = []
+        self._content_types: Dict[str, str] = {}  # partname -> content type of all written parts
+        self._media_names: Dict[str, str] = {}  # sha1 -> partname
+        self._used_names = {str(part.partname) for part in self.prs.part.package.iter_parts()}
+        self._next_name_index: Dict[str, int] = {}  # name template -> next index to try
+        self.slide_count = 0
+
+    def __enter__(self) -> 'StreamingPPTXCreator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # -- slides --------------------------------------------------------------------------------------------------------
+    def add_slide(self, title: str, layout: SlideLayout = None) -> Slide:
+        """Write the current slide and add a new slide. If no layout is given, default_layout is used."""
+        self.flush()
+        self._current = super().add_slide(title, layout)
+        return self._current
+
+    def flush(self) -> None:
+        """Write the current slide (and its related parts) to the output and remove it from the presentation."""
+        self._check_open()
+        if self._current is None:
+            return
+        slide_part, self._current = self._current.part, None
+        presentation_part = self.prs.part
+        for r_id, rel in list(presentation_part.rels.items()):
+            if not rel.is_external and rel.target_part is slide_part:
+                for sld_id in self.prs.slides._sldIdLst.sldId_lst:
+                    if sld_id.rId == r_id:
+                        self.prs.slides._sldIdLst.remove(sld_id)
+                presentation_part.rels.pop(r_id)
+
+        persistent = {id(part): str(part.partname) for part in presentation_part.package.iter_parts()}
+        names = {id(slide_part): self._next_name("/ppt/slides/slide%d.xml")}
+        self._write_part(slide_part, names, persistent)
+        self._slide_names.append(names[id(slide_part)])
+        self.slide_count += 1
+
+    def _next_name(self, template: str) -> str:
+        index = self._next_name_index.get(template, 1)
+        while template % index in self._used_names:
+            index += 1
+        self._next_name_index[template] = index + 1
+        self._used_names.add(template % index)
+        return template % index
+
+    def _write(self, partname: str, part: Part) -> None:
+        media.write_part(self._zip, partname[1:], part)
+        self._content_types[partname] = part.content_type
+
+    def _target_name(self, part: Part, names: Dict[int, str], persistent: Dict[int, str]) -> str:
+        """Partname of target part in the output (written now, if needed)."""
+        if id(part) in names:
+            return names[id(part)]
+        if id(part) in persistent:
+            return persistent[id(part)]
+        if part.content_type == CT.PML_SLIDE:
+            raise ValueError("StreamingPPTXCreator: links to other slides are not supported.")
+        if _is_media(part):
+            sha1 = getattr(part, "sha1", None) or hashlib.sha1(part.blob).hexdigest()
+            if sha1 not in self._media_names:
+                name = self._next_name(f"/ppt/media/{'image' if part.content_type.startswith('image/') else 'media'}"
+                                       f"%d.{part.partname.ext}")
+                self._write(name, part)
+                self._media_names[sha1] = name
+            names[id(part)] = self._media_names[sha1]
+            return names[id(part)]
+        names[id(part)] = self._next_name(re.sub(r"\d*(\.[^./]+)$", r"%d\1", str(part.partname)))
+        self._write_part(part, names, persistent)
+        return names[id(part)]
+
+    def _write_part(self, part: Part, names: Dict[int, str], persistent: Dict[int, str]) -> None:
+        """Write part (already named in names), its rels and all related parts not written yet."""
+        partname = names[id(part)]
+        relationships = []
+        for r_id, rel in part.rels.items():
+            if rel.is_external:
+                relationships.append((r_id, rel.reltype, rel.target_ref, True))
+            else:
+                relationships.append((r_id, rel.reltype, self._target_name(rel.target_part, names, persistent), False))
+        self._write(partname, part)
+        if relationships:
+            self._zip.writestr(PackURI(partname).rels_uri[1:], _rels_xml(partname, relationships))
+
+    # -- close ---------------------------------------------------------------------------------------------------------
+    def close(self) -> None:
+        """Write the current slide, presentation.xml, template parts, content types and rels; close the output."""
+        if self._zip is None:
+            return
+        self.flush()
+        package = self.prs.part.package
+        parts = list(package.iter_parts())
+        for part in parts:  # parts created after __init__ (e.g. notes master) might use names of written parts
+            if str(part.partname) in self._content_types:
+                part.partname = PackURI(self._next_name(re.sub(r"\d*(\.[^./]+)$", r"%d\1", str(part.partname))))
+
+        presentation_part = self.prs.part
+        sld_id_lst = self.prs.slides._sldIdLst
+        next_slide_id = max([sld_id.id for sld_id in sld_id_lst.sldId_lst] + [255]) + 1
+        next_r_id = max([int(r_id[3:]) for r_id in presentation_part.rels.keys() if r_id[3:].isdigit()] + [0]) + 1
+        slide_relationships = []
+        for index, slide_name in enumerate(self._slide_names):
+            r_id = f"rId{next_r_id + index}"
+            sld_id_lst._add_sldId(id=next_slide_id + index, rId=r_id)
+            slide_relationships.append((r_id, RT.SLIDE, slide_name, False))
+
+        for part in parts:
+            media.write_part(self._zip, part.partname[1:], part)
+            if part is presentation_part:
+                rels = parse_xml(part.rels.xml)
+                rels.extend(list(parse_xml(_rels_xml(part.partname, slide_relationships))))
+                self._zip.writestr(part.partname.rels_uri[1:], rels.xml_file_bytes)
+            elif part.rels.keys():
+                self._zip.writestr(part.partname.rels_uri[1:], part.rels.xml)
+        self._zip.writestr("_rels/.rels", package._rels.xml)
+        self._content_types.update((str(part.partname), part.content_type) for part in parts)
+        self._zip.writestr("[Content_Types].xml", serialize_part_xml(self._content_types_xml()))
+        self._zip.close()
+        self._zip = None
+
+    def _content_types_xml(self) -> CT_Types:
+        defaults = {"rels": CT.OPC_RELATIONSHIPS, "xml": CT.XML}
+        overrides = {}
+        for partname, content_type in self._content_types.items():
+            ext = PackURI(partname).ext
+            if (ext.lower(), content_type) in default_content_types:
+                defaults[ext.lower()] = content_type
+            else:
+                overrides[partname] = content_type
+        types = CT_Types.new()
+        for ext, content_type in sorted(defaults.items()):
+            types.add_default(ext, content_type)
+        for partname, content_type in sorted(overrides.items()):
+            types.add_override(partname, content_type)
+        return types
+
+    def _check_open(self) -> None:
+        if self._zip is None:
+            raise ValueError(f"StreamingPPTXCreator for {self.filename} is already closed.")
+
+    # -- not supported -------------------------------------------------------------------------------------------------
+    def _not_supported(self, *args, **kwargs):
+        raise StreamingNotSupportedError("Not supported by StreamingPPTXCreator (slides are written when the next "
+                                         "slide is added) - use PPTXCreator.")
+
+    move_slide = add_content_slide = snapshot = fork = import_slides = replace_text = save = write = save_as_pdf = \
+        save_as_png = _not_supported
@@ -0,0 +1,166 @@
+"""
+This module provides functions to collect all font and paragraph styles used in a slide or presentation.
+Instead of creating python-pptx proxy objects for every run and calling PPTXFontStyle.read_font(), all a:rPr and
+a:pPr elements are read directly via lxml in one pass. Identical styles are only converted once (read cache).
+@author: Nathanael Jöhrmann
+"""
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Union
+
+from pptx.dml.color import RGBColor
+from pptx.enum.text import MSO_TEXT_UNDERLINE_TYPE, PP_PARAGRAPH_ALIGNMENT
+from pptx.oxml.ns import qn
+from pptx.presentation import Presentation
+from pptx.slide import Slide
+from pptx.util import Pt, Emu
+
+from pptx_tools.enumerations import TEXT_CAPS_VALUES, TEXT_STRIKE_VALUES
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.paragraph_style import PPTXParagraphStyle
+
+# run_index is None for paragraph locations
+StyleLocation = namedtuple("StyleLocation", ["slide_index", "shape_id", "paragraph_index", "run_index"])
+
+_TX_BODY_TAGS = (qn("p:txBody"), qn("a:txBody"))  # a:txBody is used in table cells
+_SHAPE_TAGS = (qn("p:sp"), qn("p:graphicFrame"), qn("p:cxnSp"))
+_TRUE_VALUES = ("1", "true")
+
+
+class StyleUsage:
+    """A (deduplicated) style together with all locations where it is used."""
+
+    def __init__(self, style: Union[PPTXFontStyle, PPTXParagraphStyle]):
+        self.style = style
+        self.locations: List[StyleLocation] = []
+
+    def __len__(self):
+        return len(self.locations)
+
+
+def _font_key(rPr) -> tuple:
+    """Hashable key of all a:rPr values read into a PPTXFontStyle."""
+    if rPr is None:
+        return (None,) * 8
+    latin = rPr.find(qn("a:latin"))
+    srgb_color = rPr.find(f"{qn('a:solidFill')}/{qn('a:srgbClr')}")
+    return (rPr.get("b"), rPr.get("i"), rPr.get("u"), rPr.get("sz"), rPr.get("cap"), rPr.get("strike"),
+            None if latin is None else latin.get("typeface"),
+            None if srgb_color is None else srgb_color.get("val"))
+
+
+def _read_bool(value: Optional[str]) -> Optional[bool]:
+    if value is None:
+        return None
+    return value in _TRUE_VALUES
+
+
+def _font_style_from_key(key: tuple) -> PPTXFontStyle:
+    bold, italic, underline, size, caps, strike, name, color = key
+    result = PPTXFontStyle()
+    result.bold = _read_bool(bold)
+    result.italic = _read_bool(italic)
+    if underline is not None:  # same mapping as pptx.text.text.Font.underline
+        underline = MSO_TEXT_UNDERLINE_TYPE.from_xml(underline)
+        if underline == MSO_TEXT_UNDERLINE_TYPE.NONE:
+            underline = False
+        elif underline == MSO_TEXT_UNDERLINE_TYPE.SINGLE_LINE:
+            underline = True
+    result.underline = underline
+    result.size = None if size is None else Pt(int(size) / 100).pt
+    result.caps = None if caps is None else TEXT_CAPS_VALUES(caps)
+    result.strikethrough = None if strike is None else TEXT_STRIKE_VALUES(strike)
+    result.name = name
+    result.color_rgb = None if color is None else RGBColor.from_string(color)
+    return result
+
+
+def _paragraph_key(pPr) -> tuple:
+    """Hashable key of all a:pPr values read into a PPTXParagraphStyle."""
+    if pPr is None:
+        return (None,) * 8 + (_font_key(None),)
+    return (pPr.get("algn"), pPr.get("lvl"), pPr.line_spacing, pPr.space_before, pPr.space_after,
+            pPr.get("marL"), pPr.get("indent"), PPTXParagraphStyle._read_bullet(pPr), _font_key(pPr.defRPr))
+
+
+def _paragraph_style_from_key(key: tuple, font_cache: dict) -> PPTXParagraphStyle:
+    alignment, level, line_spacing, space_before, space_after, margin_left, indent, bullet, font_key = key
+    result = PPTXParagraphStyle()
+    result.alignment = None if alignment is None else PP_PARAGRAPH_ALIGNMENT.from_xml(alignment)
+    result.level = 0 if level is None else int(level)  # same default as _Paragraph.level
+    result.line_spacing = line_spacing
+    result.space_before = space_before
+    result.space_after = space_after
+    result.margin_left = None if margin_left is None else Emu(int(margin_left))
+    result.indent = None if indent is None else Emu(int(indent))
+    result.bullet = bullet
+    result.font_style = _cached_font_style(font_key, font_cache)
+    return result
+
+
+def _cached_font_style(key: tuple, cache: dict) -> PPTXFontStyle:
+    try:
+        return cache[key]
+    except KeyError:
+        result = cache[key] = _font_style_from_key(key)
+        return result
+
+
+def _iter_slides(source: Union[Presentation, Slide, Iterable[Slide]]) -> Iterable[Slide]:
+    if isinstance(source, Slide):
+        return [source]
+    if isinstance(source, Presentation):
+        return source.slides
+    return source
+
+
+def _shape_id(element) -> Optional[int]:
+    """Returns id of the slide shape (text box, table ...) containing element."""
+    while element is not None and element.tag not in _SHAPE_TAGS:
+        element = element.getparent()
+    if element is None:
+        return None
+    c_nv_pr = next(element.iter(qn("p:cNvPr")), None)
+    return None if c_nv_pr is None else int(c_nv_pr.get("id"))
+
+
+def _iter_paragraph_elements(slide_element):
+    """Yields (shape_id, paragraph_index, a:p element) for all paragraphs of a slide (including table cells)."""
+    for tx_body in slide_element.iter(*_TX_BODY_TAGS):
+        shape_id = _shape_id(tx_body)
+        for paragraph_index, p in enumerate(tx_body.iterchildren(qn("a:p"))):
+            yield shape_id, paragraph_index, p
+
+
+def font_style_inventory(source: Union[Presentation, Slide, Iterable[Slide]]) -> Dict[tuple, StyleUsage]:
+    """
+    Collect the font styles of all runs in source (presentation, slide or iterable of slides).
+    Returns a dict mapping a hashable style key to a StyleUsage (PPTXFontStyle and list of run locations).
+    """
+    result: Dict[tuple, StyleUsage] = {}
+    r_tag = qn("a:r")
+    for slide_index, slide in enumerate(_iter_slides(source)):
+        for shape_id, paragraph_index, p in _iter_paragraph_elements(slide._element):
+            for run_index, r in enumerate(p.iterchildren(r_tag)):
+                key = _font_key(r.rPr)
+                usage = result.get(key)
+                if usage is None:
+                    usage = result[key] = StyleUsage(_font_style_from_key(key))
+                usage.locations.append(StyleLocation(slide_index, shape_id, paragraph_index, run_index))
+    return result
+
+
+def paragraph_style_inventory(source: Union[Presentation, Slide, Iterable[Slide]]) -> Dict[tuple, StyleUsage]:
+    """
+    Collect the paragraph styles of all paragraphs in source (presentation, slide or iterable of slides).
+    Returns a dict mapping a hashable style key to a StyleUsage (PPTXParagraphStyle and list of paragraph locations).
+    """
+    font_cache = {}
+    result: Dict[tuple, StyleUsage] = {}
+    for slide_index, slide in enumerate(_iter_slides(source)):
+        for shape_id, paragraph_index, p in _iter_paragraph_elements(slide._element):
+            key = _paragraph_key(p.pPr)
+            usage = result.get(key)
+            if usage is None:
+                usage = result[key] = StyleUsage(_paragraph_style_from_key(key, font_cache))
+            usage.locations.append(StyleLocation(slide_index, shape_id, paragraph_index, None))
+    return result
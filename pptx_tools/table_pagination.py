@@ -0,0 +1,223 @@
+"""
+This module provides tables split across several slides (used by PPTXCreator.add_paginated_table()), e.g. for
+datasets with thousands of rows. Every slide gets a table with the repeated header row(s) and as many rows as fit
+onto the slide (row heights are estimated from the cell texts with text_metrics.py, including wrapping).
+
+table_data can be any iterable (e.g. a generator reading a file or a database cursor); rows are read in slide-sized
+chunks, so only the rows of one slide are kept in memory. The table style is written only once: the first table is
+created with add_table(), all other tables are built from copies of its styled (header and body) rows. Conditional
+formats are evaluated per slide (values of other slides are unknown while streaming).
+@author: Nathanael Jöhrmann
+"""
+import copy
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from pptx.oxml.ns import qn
+from pptx.shapes.graphfrm import GraphicFrame
+from pptx.util import Emu, Inches, Pt
+
+from pptx_tools import text_metrics
+from pptx_tools.conditional_format import write_conditional_formats
+from pptx_tools.position import PPTXPosition
+from pptx_tools.table_style import PPTXTableStyle, CELL_MARGIN_Y, table_layout, table_row_heights
+
+BOTTOM_MARGIN = Inches(0.5)  # default free space below paginated tables
+DEFAULT_COL_WIDTH = Inches(1)  # column width used by PPTXCreator.add_table() without table width
+
+
+class TablePaginator:
+    """Adds the rows of table_data as tables on as many slides as needed (see module docstring)."""
+
+    def __init__(self, creator: 'PPTXCreator', title: str, position: Optional[PPTXPosition] = None,
+                 table_style: Optional[PPTXTableStyle] = None, header_rows: int = 1,
+                 rows_per_slide: Optional[int] = None, max_height: Optional[int] = None, layout=None):
+        """
+        :param title: title of all slides
+        :param header_rows: number of rows at the start of table_data repeated on every slide
+        :param rows_per_slide: fixed number of (not header) rows per slide; estimated from row heights if None
+        :param max_height: max. table height [EMU]; default: space between table top and BOTTOM_MARGIN
+        """
+        self.creator = creator
+        self.title = title
+        self.layout = layout
+        self.table_style = table_style
+        self.header_rows = header_rows
+        self.rows_per_slide = rows_per_slide
+
+        if table_style is not None and table_style.position is not None:
+            position = table_style.position
+        self.position = position if position is not None else creator.default_position
+        self.left, self.top = self.position.tuple()
+        if max_height is None:
+            max_height = creator.prs.slide_height - self.top - BOTTOM_MARGIN
+        self.max_height = max_height
+
+        self.font_style = None if table_style is None else table_style.font_style
+        self.header_font_style = None
+        if header_rows > 0:  # default table style: bold first row
+            self.header_font_style = (table_style or PPTXTableStyle())._header_font_style(first_row=True)
+
+        self.cols = 0
+        self.col_widths: List[Emu] = []
+        self.header: List[List[str]] = []
+        self._header_heights: List[Emu] = []
+        self._frame_prototype = None  # styled p:graphicFrame with header rows, but without body rows
+        self._row_prototype = None  # styled a:tr with one paragraph (one empty run) per cell
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # layout
+    # ------------------------------------------------------------------------------------------------------------------
+    def _row_texts(self, row: Iterable[any]) -> List[str]:
+        texts = [f"{entry}" for entry in row]
+        if len(texts) > self.cols:
+            raise ValueError(f"Row has {len(texts)} cells, but the paginated table has only {self.cols} columns.")
+        return texts + [""] * (self.cols - len(texts))
+
+    def _chunk_size(self) -> int:
+        """Max. number of body rows that could fit onto one slide."""
+        if self.rows_per_slide is not None:
+            return self.rows_per_slide
+        metrics, size = text_metrics.font_parameters(self.font_style)
+        min_row_height = metrics.line_height * Pt(size) + 2 * CELL_MARGIN_Y
+        return max(1, int((self.max_height - sum(self._header_heights)) // min_row_height) + 1)
+
+    def _init_columns(self, header: List[List[any]], rows: List[List[any]]) -> None:
+        """Set number of columns and column widths (from header and first rows)."""
+        self.cols = max((sum(1 for _ in row) for row in header + rows), default=0)
+        self.header = [self._row_texts(row) for row in header]
+        texts = self.header + [self._row_texts(row) for row in rows]
+        table_style = self.table_style
+        if table_style is not None and table_style.auto_size:
+            self.col_widths = table_layout(texts, self.font_style, self.header_font_style,
+                                           table_style._auto_size_max_width())[0]
+        elif table_style is not None and table_style.width is not None:
+            table_style._update_col_ratios(self.cols)
+            ratios = table_style.col_ratios[:self.cols]
+            self.col_widths = [Emu(int(Inches(table_style.width * ratio / sum(ratios)))) for ratio in ratios]
+        else:
+            self.col_widths = [DEFAULT_COL_WIDTH] * self.cols
+        self._header_heights = table_row_heights(self.header, self.col_widths, self.font_style,
+                                                 self.header_font_style) if self.header else []
+
+    def _page_row_heights(self, rows: List[List[str]]) -> List[Emu]:
+        return table_row_heights(rows, self.col_widths, self.font_style)
+
+    def _split(self, rows: List[List[str]], heights: List[Emu]) -> int:
+        """Number of rows fitting onto one slide (at least one)."""
+        if self.rows_per_slide is not None:
+            return len(rows)
+        available = self.max_height - sum(self._header_heights)
+        for count, height in enumerate(heights):
+            available -= height
+            if available < 0:
+                return max(1, count)
+        return len(rows)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # tables
+    # ------------------------------------------------------------------------------------------------------------------
+    def _write_sizes(self, shape: GraphicFrame, row_heights: List[Emu]) -> None:
+        tbl = shape._element.graphic.graphicData.tbl
+        for grid_col, width in zip(tbl.tblGrid.gridCol_lst, self.col_widths):
+            grid_col.w = width
+        for tr, height in zip(tbl.tr_lst, row_heights):
+            tr.h = height
+        shape.width = Emu(sum(self.col_widths))
+        shape.height = Emu(sum(row_heights))
+
+    def _write_conditional_formats(self, shape: GraphicFrame, texts: List[List[str]]) -> None:
+        if self.table_style is not None and self.table_style.conditional_formats:
+            write_conditional_formats(shape.table, self.table_style.conditional_formats, texts)
+
+    def _add_first_table(self, rows: List[List[str]], heights: List[Emu]) -> GraphicFrame:
+        """Add the first table with add_table() and keep its styled rows as prototypes for the other tables."""
+        table_style = None
+        if self.table_style is not None:
+            # sizes are written by the paginator, conditional formats per slide
+            table_style = copy.copy(self.table_style)
+            table_style.set(width=None, auto_size=None, position=None, conditional_formats=None)
+        slide = self.creator.add_slide(self.title, self.layout)
+        shape = self.creator.add_table(slide, self.header + rows, self.position, table_style)
+        self._write_sizes(shape, self._header_heights + heights)
+
+        frame = copy.deepcopy(shape._element)  # prototypes are taken before conditional formats are written
+        tr_lst = frame.graphic.graphicData.tbl.tr_lst
+        self._row_prototype = copy.deepcopy(tr_lst[len(self.header)])
+        for tr in tr_lst[len(self.header):]:
+            tr.getparent().remove(tr)
+        for tc in self._row_prototype.tc_lst:  # one paragraph with one empty run per cell
+            p_lst = tc.txBody.p_lst
+            for p in p_lst[1:]:
+                tc.txBody.remove(p)
+            for child in list(p_lst[0]):
+                if child.tag in (qn("a:r"), qn("a:br"), qn("a:fld")):
+                    p_lst[0].remove(child)
+            p_lst[0].add_r("")
+        self._frame_prototype = frame
+        self._write_conditional_formats(shape, self.header + rows)
+        return shape
+
+    def _new_row(self, texts: List[str], height: Emu):
+        tr = copy.deepcopy(self._row_prototype)
+        tr.h = height
+        for t, text in zip(list(tr.iter(qn("a:t"))), texts):
+            if "\n" not in text and "\v" not in text:
+                t.text = text
+                continue
+            r = t.getparent()
+            p = r.getparent()
+            p.remove(r)
+            lines = text.split("\n")
+            for line in reversed(lines[1:]):
+                new_p = copy.deepcopy(p)
+                new_p.append_text(line)
+                p.addnext(new_p)
+            p.append_text(lines[0])
+        return tr
+
+    def _add_table(self, rows: List[List[str]], heights: List[Emu]) -> GraphicFrame:
+        """Add a table (copy of the styled first table) with rows on a new slide."""
+        slide = self.creator.add_slide(self.title, self.layout)
+        frame = copy.deepcopy(self._frame_prototype)
+        shape_id = slide.shapes._next_shape_id
+        frame.nvGraphicFramePr.cNvPr.id = shape_id
+        frame.nvGraphicFramePr.cNvPr.name = f"Table {shape_id - 1}"
+        tbl = frame.graphic.graphicData.tbl
+        for texts, height in zip(rows, heights):
+            tbl.append(self._new_row(texts, height))
+        slide.shapes._spTree.append(frame)
+        shape = slide.shapes[-1]
+        shape.height = Emu(sum(self._header_heights) + sum(heights))
+        self._write_conditional_formats(shape, self.header + rows)
+        return shape
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # public interface
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_rows(self, table_data: Iterable[Iterable[any]]) -> List[GraphicFrame]:
+        """Add all rows of table_data (first header_rows rows are the header); returns the table shapes."""
+        rows: Iterator = iter(table_data)
+        header = [list(row) for row in islice(rows, self.header_rows)]
+        chunk = [list(row) for row in islice(rows, self._chunk_size())]
+        self._init_columns(header, chunk)
+        if self.cols == 0:
+            raise ValueError("Can not add a paginated table without any cells.")
+        chunk = [self._row_texts(row) for row in chunk]
+
+        result = []
+        while True:
+            chunk.extend(self._row_texts(row) for row in islice(rows, max(0, self._chunk_size() - len(chunk))))
+            if result and not chunk:
+                break
+            heights = self._page_row_heights(chunk)
+            count = self._split(chunk, heights)
+            if not result:
+                if count == 0:  # no body rows -> nothing to use as row prototype
+                    slide = self.creator.add_slide(self.title, self.layout)
+                    return [self.creator.add_table(slide, self.header, self.position, self.table_style)]
+                result.append(self._add_first_table(chunk[:count], heights[:count]))
+            else:
+                result.append(self._add_table(chunk[:count], heights[:count]))
+            chunk = chunk[count:]
+        return result
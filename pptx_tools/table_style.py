@@ -2,22 +2,39 @@
 This module provides a helper class to deal with tables in python-pptx.
 @author: Nathanael Jöhrmann
 """
-from typing import Optional
+import copy
+import importlib.util
+import math
+from typing import Optional, Iterable, List, Sequence, Tuple
 
+# numpy is slow to import -> only imported when a table layout is computed
+has_numpy = importlib.util.find_spec("numpy") is not None
+
+from pptx.oxml.ns import qn
 from pptx.shapes.autoshape import Shape
 from pptx.table import Table, _Cell
-from pptx.util import Inches
+from pptx.util import Emu, Inches, Pt
 
+from pptx_tools.conditional_format import PPTXConditionalFormat, write_conditional_formats
 from pptx_tools.fill_style import PPTXFillStyle
 from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.instrumentation import instrumented, count_styled_cells
 from pptx_tools.position import PPTXPosition
+from pptx_tools import text_metrics
 from pptx_tools.utils import iter_table_cells, _DO_NOT_CHANGE
 
+# default cell margins of PowerPoint
+CELL_MARGIN_X = Inches(0.1)
+CELL_MARGIN_Y = Inches(0.05)
+MIN_COL_WIDTH = Inches(0.3)
+AUTO_SIZE_MAX_WIDTH_FRACTION = 0.9  # max. table width (fraction of slide width) used by auto_size, if width is None
+
 
 class PPTXCellStyle:  # format table cell
     def __init__(self):
         self.fill_style = PPTXFillStyle()
 
+    @instrumented("PPTXCellStyle.write_cell")
     def write_cell(self, cell: _Cell) -> None:
         self.fill_style.write_fill(cell.fill)
 
@@ -36,7 +53,11 @@ class PPTXTableStyle:
 
         self.width: Optional[float] = None  # in [Inches]; don't use Inches() - is transformed in _write_col_sizes!!!
         self.col_ratios = None
+        # compute col widths (col_ratios are ignored) and row heights from cell texts; width is used as max. width
+        self.auto_size: Optional[bool] = None
         self.position = None
+        # evaluated vectorized and written after font_style/cell_style; later formats override earlier ones
+        self.conditional_formats: Optional[List[PPTXConditionalFormat]] = None
 
     def read_table(self, table: Table):
         """Read attributes from a Table object, ignoring font and cell style."""
@@ -56,7 +77,9 @@ class PPTXTableStyle:
             row_banding: Optional[bool] = _DO_NOT_CHANGE,
             width: Optional[float] = _DO_NOT_CHANGE,
             col_ratios: Optional[list] = _DO_NOT_CHANGE,
-            position: Optional[PPTXPosition] = _DO_NOT_CHANGE
+            auto_size: Optional[bool] = _DO_NOT_CHANGE,
+            position: Optional[PPTXPosition] = _DO_NOT_CHANGE,
+            conditional_formats: Optional[List[PPTXConditionalFormat]] = _DO_NOT_CHANGE
             ) -> 'PPTXTableStyle':
         """Convenience method to set several table attributes together."""
         if font_style is not _DO_NOT_CHANGE:
@@ -73,11 +96,17 @@ class PPTXTableStyle:
             self.width = width
         if col_ratios is not _DO_NOT_CHANGE:
             self.col_ratios = col_ratios
+        if auto_size is not _DO_NOT_CHANGE:
+            self.auto_size = auto_size
         if position is not _DO_NOT_CHANGE:
             self.position = position
+        if conditional_formats is not _DO_NOT_CHANGE:
+            self.conditional_formats = conditional_formats
         return self
 
     def _write_all_cells(self, table: Table) -> None:
+        if self.font_style is None and self.cell_style is None:
+            return
         for cell in iter_table_cells(table):
             if self.font_style is not None:
                 # paragraph is managed per cell; there is no "table paragraph"
@@ -101,17 +130,58 @@ class PPTXTableStyle:
         for column, ratio in zip(table.columns, self.col_ratios):
             column.width = Inches(self.width * ratio / ratio_sum)
 
-    def write_shape(self, shape: Shape) -> None:
-        """Write attributes to table in given pptx.shapes.autoshape.Shape."""
+    def _auto_size_max_width(self) -> Optional[Emu]:
+        """Max. table width used by auto_size: width, or a fraction of the slide width if width is None."""
+        if self.width is not None:
+            return Inches(self.width)
+        if PPTXPosition.prs is not None:
+            return Emu(round(PPTXPosition.prs.slide_width * AUTO_SIZE_MAX_WIDTH_FRACTION))
+        return None
+
+    def _header_font_style(self, first_row: Optional[bool] = None) -> Optional[PPTXFontStyle]:
+        """
+        Font style used to measure the first row (bold font_style) if the first row is a header
+        (first_row_header, or first_row if first_row_header is None); otherwise None.
+        """
+        if not (self.first_row_header or (self.first_row_header is None and first_row)):
+            return None
+        result = PPTXFontStyle() if self.font_style is None else copy.copy(self.font_style)
+        result.bold = True  # default table styles use bold header text
+        return result
+
+    def _write_auto_size(self, table: Table) -> None:
+        max_width = self._auto_size_max_width()
+        header_font_style = self._header_font_style(table.first_row)
+        t_tag = qn("a:t")
+        texts = [["\n".join("".join(t.text or "" for t in p.iter(t_tag)) for p in tc.txBody.p_lst)
+                  for tc in tr.tc_lst] for tr in table._tbl.tr_lst]
+        col_widths, row_heights = table_layout(texts, self.font_style, header_font_style, max_width)
+        for grid_col, width in zip(table._tbl.tblGrid.gridCol_lst, col_widths):
+            grid_col.w = width
+        for tr, height in zip(table._tbl.tr_lst, row_heights):
+            tr.h = height
+
+    def write_shape(self, shape: Shape, table_data: Optional[Iterable[Iterable[any]]] = None) -> None:
+        """
+        Write attributes to table in given pptx.shapes.autoshape.Shape.
+        table_data is optional and used for conditional formats (otherwise values are read from cell texts).
+        """
         if not shape.has_table:
             print(f"Warning: Could not write table style. {shape} has no table.")
             return
         if self.position is not None:
             shape.left, shape.top = self.position.tuple()
-        self.write_table(shape.table)
+        self.write_table(shape.table, table_data)
+        if self.auto_size:
+            shape.width = sum(column.width for column in shape.table.columns)
+            shape.height = sum(row.height for row in shape.table.rows)
 
-    def write_table(self, table: Table) -> None:
-        """Write attributes to table object."""
+    @instrumented("PPTXTableStyle.write_table", count_styled_cells)
+    def write_table(self, table: Table, table_data: Optional[Iterable[Iterable[any]]] = None) -> None:
+        """
+        Write attributes to table object.
+        table_data is optional and used for conditional formats (otherwise values are read from cell texts).
+        """
         if self.first_row_header is not None:
             table._tbl.firstRow = self.first_row_header
 
@@ -121,10 +191,15 @@ class PPTXTableStyle:
         if self.row_banding is not None:
             table.horz_banding = self.row_banding
 
-        if self.width is not None:
+        if self.auto_size:
+            self._write_auto_size(table)
+        elif self.width is not None:
             self._write_col_sizes(table)
         self._write_all_cells(table)
 
+        if self.conditional_formats:
+            write_conditional_formats(table, self.conditional_formats, table_data)
+
     def set_width_as_fraction(self, fraction: float):
         assert fraction > 0.0
         if PPTXPosition.prs is None:
@@ -132,3 +207,103 @@ class PPTXTableStyle:
                             " Create a PPTXCreator instance first, or set manually.")
 
         self.width = PPTXPosition.prs.slide_width.inches * fraction
+
+
+def _distribute_width(natural_widths: 'np.ndarray', max_width: Optional[int]) -> 'np.ndarray':
+    """
+    Column widths for natural (unwrapped) column widths: all columns get their natural width if the sum fits into
+    max_width; otherwise narrow columns keep their natural width and the remaining width is shared equally by the
+    wide columns (which wrap their text).
+    """
+    import numpy as np
+    widths = np.maximum(natural_widths, MIN_COL_WIDTH).astype(float)
+    if max_width is None or widths.sum() <= max_width:
+        return widths
+    fixed = np.zeros(widths.shape, dtype=bool)
+    while True:
+        share = (max_width - widths[fixed].sum()) / max(1, (~fixed).sum())
+        newly_fixed = ~fixed & (widths <= share)
+        if not newly_fixed.any():
+            break
+        fixed |= newly_fixed
+    widths[~fixed] = max(share, MIN_COL_WIDTH)
+    return widths
+
+
+def _measure_lines(texts: List[List[str]], cols: int, font_style: Optional[PPTXFontStyle],
+                   header_font_style: Optional[PPTXFontStyle]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """Returns owner cell (flat index), width and height (EMU) of every line of all cells."""
+    import numpy as np
+    owners, lines = [], []
+    for ir, row in enumerate(texts):
+        for ic, text in enumerate(row):
+            for line in str(text).replace("\v", "\n").split("\n"):
+                owners.append(ir * cols + ic)
+                lines.append(line)
+    owners = np.asarray(owners, dtype=int)
+    is_header = owners < cols if header_font_style is not None else np.zeros(len(owners), dtype=bool)
+
+    line_widths = np.zeros(len(lines))
+    line_heights = np.zeros(len(lines))
+    for style, selection in [(font_style, ~is_header), (header_font_style, is_header)]:
+        if not selection.any():
+            continue
+        metrics, size = text_metrics.font_parameters(style)
+        selected_lines = [line for line, selected in zip(lines, selection) if selected]
+        line_widths[selection] = np.asarray(metrics.text_widths(selected_lines)) * Pt(size)
+        line_heights[selection] = metrics.line_height * Pt(size)
+    return owners, line_widths, line_heights
+
+
+def _wrapped_row_heights(owners: 'np.ndarray', line_widths: 'np.ndarray', line_heights: 'np.ndarray',
+                         col_widths: 'np.ndarray', rows: int, cols: int) -> List[Emu]:
+    import numpy as np
+    available = np.maximum(col_widths - 2 * CELL_MARGIN_X, 1)[owners % cols]
+    wrapped_heights = np.maximum(1, np.ceil(line_widths / available)) * line_heights
+    cell_heights = np.zeros(rows * cols)
+    np.add.at(cell_heights, owners, wrapped_heights)
+    row_heights = cell_heights.reshape(rows, cols).max(axis=1) + 2 * CELL_MARGIN_Y
+    return [Emu(int(math.ceil(height))) for height in row_heights]
+
+
+def table_layout(texts: List[List[str]], font_style: Optional[PPTXFontStyle] = None,
+                 header_font_style: Optional[PPTXFontStyle] = None,
+                 max_width: Optional[int] = None) -> Tuple[List[Emu], List[Emu]]:
+    """
+    Returns column widths and row heights (EMU) fitting texts (rows x cols; "\n" separates paragraphs).
+    header_font_style (optional) is used for the first row. Columns are as wide as their longest line; if the table
+    would be wider than max_width, the widest columns are narrowed and their text wraps (taller rows).
+    All lines are measured in one batch with cached glyph widths (see text_metrics.py).
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Table auto size needs module numpy to be installed.")
+
+    import numpy as np
+    rows, cols = len(texts), max((len(row) for row in texts), default=0)
+    if rows == 0 or cols == 0:
+        return [], []
+
+    owners, line_widths, line_heights = _measure_lines(texts, cols, font_style, header_font_style)
+    cell_widths = np.zeros(rows * cols)
+    np.maximum.at(cell_widths, owners, line_widths)
+    col_widths = _distribute_width(cell_widths.reshape(rows, cols).max(axis=0) + 2 * CELL_MARGIN_X, max_width)
+
+    row_heights = _wrapped_row_heights(owners, line_widths, line_heights, col_widths, rows, cols)
+    return [Emu(int(math.ceil(width))) for width in col_widths], row_heights
+
+
+def table_row_heights(texts: List[List[str]], col_widths: Sequence[int], font_style: Optional[PPTXFontStyle] = None,
+                      header_font_style: Optional[PPTXFontStyle] = None) -> List[Emu]:
+    """
+    Returns row heights (EMU) fitting texts (rows x cols) into columns of col_widths (text wraps at the column
+    width). header_font_style (optional) is used for the first row.
+    """
+    if not has_numpy:
+        raise ModuleNotFoundError("Table row heights need module numpy to be installed.")
+
+    import numpy as np
+    rows, cols = len(texts), len(col_widths)
+    if rows == 0 or cols == 0:
+        return []
+    owners, line_widths, line_heights = _measure_lines(texts, cols, font_style, header_font_style)
+    return _wrapped_row_heights(owners, line_widths, line_heights, np.asarray(col_widths, dtype=float), rows, cols)
@@ -1,16 +1,55 @@
 """
 This file contains variables with names of important pptx template master_slide shapes
 """
+import atexit
 from datetime import datetime
+from typing import Dict, List, Optional
 
 import importlib.resources
 # from pptx.enum.text import MSO_AUTO_SIZE
 from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
+from pptx.shapes.base import BaseShape
+from pptx.slide import SlideLayout
 
 from pptx_tools.better_abc import ABCMeta, abstract_attribute
 from pptx_tools.utils import change_paragraph_text_to
 
 
+class TemplateShapeIndex:
+    """
+    Shapes of all slide masters and slide layouts of a presentation, indexed by name, placeholder idx and
+    placeholder type (built once in one pass; shapes with the same name on several masters/layouts share one entry).
+    """
+
+    def __init__(self, prs: Presentation):
+        self.prs = prs
+        self.master_shapes: Dict[str, List[BaseShape]] = {}  # name -> shapes
+        self.master_placeholders_by_idx: Dict[int, List[BaseShape]] = {}
+        self.master_placeholders_by_type: Dict[PP_PLACEHOLDER, List[BaseShape]] = {}
+        self.layouts: Dict[str, List[SlideLayout]] = {}  # layout name -> layouts (of all masters)
+        self.layout_shapes: Dict[str, List[BaseShape]] = {}
+        self.layout_placeholders_by_idx: Dict[int, List[BaseShape]] = {}
+        self.layout_placeholders_by_type: Dict[PP_PLACEHOLDER, List[BaseShape]] = {}
+
+        for slide_master in prs.slide_masters:
+            self._add_shapes(slide_master.shapes, self.master_shapes, self.master_placeholders_by_idx,
+                             self.master_placeholders_by_type)
+            for slide_layout in slide_master.slide_layouts:
+                self.layouts.setdefault(slide_layout.name, []).append(slide_layout)
+                self._add_shapes(slide_layout.shapes, self.layout_shapes, self.layout_placeholders_by_idx,
+                                 self.layout_placeholders_by_type)
+
+    @staticmethod
+    def _add_shapes(shapes, by_name: dict, by_idx: dict, by_type: dict) -> None:
+        for shape in shapes:
+            by_name.setdefault(shape.name, []).append(shape)
+            if shape.is_placeholder:
+                placeholder_format = shape.placeholder_format
+                by_idx.setdefault(placeholder_format.idx, []).append(shape)
+                by_type.setdefault(placeholder_format.type, []).append(shape)
+
+
 class AbstractTemplate(metaclass=ABCMeta):
     """
     Templates should subclass this abstract class, to make sure,
@@ -33,6 +72,58 @@ class AbstractTemplate(metaclass=ABCMeta):
     def default_layout(cls):
         pass
 
+    @property
+    def shape_index(self) -> TemplateShapeIndex:
+        """Index of master and layout shapes (built on first use, rebuilt if prs was replaced)."""
+        index = self.__dict__.get("_shape_index")
+        if index is None or index.prs is not self.prs:
+            index = self._shape_index = TemplateShapeIndex(self.prs)
+        return index
+
+    def master_shapes_named(self, name: str) -> List[BaseShape]:
+        """All slide master shapes with the given name."""
+        return self.shape_index.master_shapes.get(name, [])
+
+    def layout_shapes_named(self, name: str) -> List[BaseShape]:
+        """All slide layout shapes with the given name."""
+        return self.shape_index.layout_shapes.get(name, [])
+
+    def layout_named(self, name: str) -> Optional[SlideLayout]:
+        """First slide layout with the given name (None if there is no such layout)."""
+        layouts = self.shape_index.layouts.get(name)
+        return layouts[0] if layouts else None
+
+    def write_text_to_master_shape(self, text: str, shape_name: str) -> None:
+        """Write text to the first paragraph of all slide master shapes (with text frame) named shape_name."""
+        for shape in self.master_shapes_named(shape_name):
+            if shape.has_text_frame:
+                change_paragraph_text_to(shape.text_frame.paragraphs[0], text)
+
+    def write_text_to_layout_shape(self, text: str, shape_name: str) -> None:
+        """Write text to the first paragraph of all slide layout shapes (with text frame) named shape_name."""
+        for shape in self.layout_shapes_named(shape_name):
+            if shape.has_text_frame:
+                change_paragraph_text_to(shape.text_frame.paragraphs[0], text)
+
+
+class _ResourceFile:
+    """
+    Class attribute with the file path of a package resource. The resource is only looked up (and extracted, if the
+    package is e.g. zipped) on first access, not when the class is defined.
+    """
+
+    def __init__(self, package: str, resource: str):
+        self.package = package
+        self.resource = resource
+        self._path = None
+
+    def __get__(self, instance, owner) -> str:
+        if self._path is None:
+            context = importlib.resources.as_file(importlib.resources.files(self.package).joinpath(self.resource))
+            self._path = str(context.__enter__())
+            atexit.register(context.__exit__, None, None, None)  # removes temporary file (if one was extracted)
+        return self._path
+
 
 # ----------------------------------------------------------------------------
 # --------- Customized template classes are needed for each template ---------
@@ -41,9 +132,8 @@ class TemplateExample(AbstractTemplate):
     """
     Class handling example-template.pptx).
     """
-    TEMPLATE_FILE = str(importlib.resources.as_file(
-                    importlib.resources.files('pptx_tools').joinpath('resources/example-template.pptx')
-                    ).__enter__())
+    TEMPLATE_FILE = _ResourceFile('pptx_tools', 'resources/example-template.pptx')
+
     def __init__(self):
         self.prs = Presentation(self.TEMPLATE_FILE)
 
@@ -71,13 +161,6 @@ class TemplateExample(AbstractTemplate):
     def set_website(self, text):
         self.write_text_to_master_shape(text=text, shape_name=self.website_shape_name)
 
-    def write_text_to_master_shape(self, text, shape_name):
-        for shape in self.master_shapes:
-            if not shape.has_text_frame:
-                continue
-            if shape.name == shape_name:
-                change_paragraph_text_to(shape.text_frame.paragraphs[0], text)
-
     @property
     def master_shapes(self):
         result = []
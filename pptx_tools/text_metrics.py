@@ -0,0 +1,170 @@
+"""
+This module provides text measurement using font metrics (needs Pillow, a dependency of python-pptx), e.g. to size
+text boxes (PPTXCreator.add_text_box) without opening the presentation in PowerPoint.
+
+Font files are looked up by family name, bold and italic in the usual font directories of Windows, macOS and Linux
+(use register_font() for other fonts). Glyph widths are cached per font file (in em) - measuring a string is just
+a sum of cached values, and many strings can be measured in one batch (text_widths()).
+If a font is not installed, a fallback font (DejaVu Sans) is used, or an average glyph width if that is not found
+either. Kerning and ligatures are ignored, so results are estimates (typically within a few percent).
+@author: Nathanael Jöhrmann
+"""
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pptx.util import Emu, Inches, Pt
+
+DEFAULT_FONT_NAME = "Calibri"  # used when no font name is given (default theme font of PowerPoint)
+DEFAULT_FONT_SIZE = 18  # [Pt] used when no font size is given
+FALLBACK_FONT_NAME = "DejaVu Sans"
+AVERAGE_GLYPH_WIDTH = 0.55  # [em] used without any font file
+AVERAGE_LINE_HEIGHT = 1.2  # [em] used without any font file
+FONT_FILE_EXTENSIONS = (".ttf", ".otf")
+
+# default text frame insets of PowerPoint
+TEXT_FRAME_MARGIN_X = Inches(0.1)
+TEXT_FRAME_MARGIN_Y = Inches(0.05)
+
+_UNITS_PER_EM = 1000  # font size used to read glyph widths
+
+_font_files: Optional[Dict[Tuple[str, bool, bool], str]] = None  # (family, bold, italic) -> file path
+_font_metrics: Dict[Optional[str], 'FontMetrics'] = {}  # file path -> FontMetrics
+
+
+def font_directories() -> List[str]:
+    """Returns the font directories of the current platform."""
+    home = os.path.expanduser("~")
+    if sys.platform.startswith("win32"):
+        return [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts")]
+    if sys.platform.startswith("darwin"):
+        return ["/Library/Fonts", "/Network/Library/Fonts", "/System/Library/Fonts",
+                os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts", os.path.join(home, ".fonts"),
+            os.path.join(home, ".local", "share", "fonts")]
+
+
+def _font_key(path: str) -> Tuple[str, bool, bool]:
+    """(family, bold, italic) read from the font file (raises OSError for unreadable/unsupported files)."""
+    from PIL import ImageFont
+    family, style = ImageFont.truetype(path, 10).getname()
+    style = (style or "").lower()
+    return family, "bold" in style, "italic" in style or "oblique" in style
+
+
+def _installed_fonts() -> Dict[Tuple[str, bool, bool], str]:
+    result = {}
+    for directory in font_directories():
+        for root, _, filenames in os.walk(directory):  # nothing, if directory does not exist
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() not in FONT_FILE_EXTENSIONS:
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    key = _font_key(path)
+                except Exception:  # unreadable or corrupt font file -> skip only this file
+                    continue
+                result.setdefault(key, path)
+    return result
+
+
+def register_font(name: str, path: str, bold: bool = False, italic: bool = False) -> None:
+    """Use the font file at path for the given font name/style (e.g. for fonts outside the font directories)."""
+    global _font_files
+    if _font_files is None:
+        _font_files = _installed_fonts()
+    _font_files[name, bold, italic] = path
+
+
+def find_font_file(name: str, bold: bool = False, italic: bool = False) -> Optional[str]:
+    """Returns the path of the font file for name/style (or a similar style/fallback font), None if not found."""
+    global _font_files
+    if _font_files is None:
+        _font_files = _installed_fonts()
+    for key in [(name, bold, italic), (name, bold, False), (name, False, False),
+                (FALLBACK_FONT_NAME, bold, italic), (FALLBACK_FONT_NAME, bold, False),
+                (FALLBACK_FONT_NAME, False, False)]:
+        if key in _font_files:
+            return _font_files[key]
+    return None
+
+
+class FontMetrics:
+    """Glyph widths and line height (in em) of one font file; glyph widths are read on first use and cached."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._font = None
+        self._widths: Dict[str, float] = {}
+        self.line_height = AVERAGE_LINE_HEIGHT
+        if path is not None:
+            from PIL import ImageFont
+            self._font = ImageFont.truetype(path, _UNITS_PER_EM)
+            ascent, descent = self._font.getmetrics()
+            self.line_height = max(AVERAGE_LINE_HEIGHT, (ascent + descent) / _UNITS_PER_EM)
+
+    def _glyph_width(self, char: str) -> float:
+        width = AVERAGE_GLYPH_WIDTH if self._font is None else self._font.getlength(char) / _UNITS_PER_EM
+        self._widths[char] = width
+        return width
+
+    def text_width(self, text: str) -> float:
+        """Width of text in em (single line)."""
+        try:
+            return sum(map(self._widths.__getitem__, text))
+        except KeyError:  # unknown glyphs
+            for char in set(text).difference(self._widths):
+                self._glyph_width(char)
+            return sum(map(self._widths.__getitem__, text))
+
+    def text_widths(self, texts: Iterable[str]) -> List[float]:
+        """Width of every text in em (single lines). Every distinct text is only measured once."""
+        cache = {}
+        result = []
+        for text in texts:
+            width = cache.get(text)
+            if width is None:
+                width = cache[text] = self.text_width(text)
+            result.append(width)
+        return result
+
+
+def get_font_metrics(name: Optional[str] = None, bold: bool = False, italic: bool = False) -> FontMetrics:
+    """Returns the (cached) FontMetrics for the given font name/style."""
+    path = find_font_file(name or DEFAULT_FONT_NAME, bool(bold), bool(italic))
+    metrics = _font_metrics.get(path)
+    if metrics is None:
+        metrics = _font_metrics[path] = FontMetrics(path)
+    return metrics
+
+
+def font_parameters(font_style: Optional['PPTXFontStyle']) -> Tuple[FontMetrics, float]:
+    """Returns FontMetrics and font size [Pt] of font_style (defaults for values not set)."""
+    if font_style is None:
+        return get_font_metrics(), DEFAULT_FONT_SIZE
+    name = font_style.name if isinstance(font_style.name, str) else None
+    size = font_style.size if isinstance(font_style.size, (int, float)) else DEFAULT_FONT_SIZE
+    return get_font_metrics(name, font_style.bold is True, font_style.italic is True), size
+
+
+def text_widths(texts: Iterable[str], font_style: Optional['PPTXFontStyle'] = None) -> List[Emu]:
+    """Width (EMU) of every text (longest line, lines separated by newline or vertical tab) in font_style."""
+    metrics, size = font_parameters(font_style)
+    texts = [str(text).replace("\v", "\n") for text in texts]
+    lines = [text.split("\n") for text in texts]
+    widths = iter(metrics.text_widths(line for text_lines in lines for line in text_lines))
+    return [Emu(round(Pt(size) * max(next(widths) for _ in text_lines))) for text_lines in lines]
+
+
+def text_size(text: str, font_style: Optional['PPTXFontStyle'] = None) -> Tuple[Emu, Emu]:
+    """Size (EMU) of text (without wrapping) in font_style."""
+    metrics, size = font_parameters(font_style)
+    line_count = str(text).replace("\v", "\n").count("\n") + 1
+    return text_widths([text], font_style)[0], Emu(round(Pt(size) * metrics.line_height * line_count))
+
+
+def text_box_size(text: str, font_style: Optional['PPTXFontStyle'] = None) -> Tuple[Emu, Emu]:
+    """Size (EMU) of a text box (not wrapping text, default insets) fitting text in font_style."""
+    width, height = text_size(text, font_style)
+    return Emu(width + 2 * TEXT_FRAME_MARGIN_X), Emu(height + 2 * TEXT_FRAME_MARGIN_Y)
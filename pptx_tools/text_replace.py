@@ -0,0 +1,132 @@
+"""
+This module provides deck-level find-and-replace with regular expressions (e.g. to rebrand presentations).
+In contrast to utils.change_paragraph_text_to, matches may span several runs and every run keeps its own formatting:
+text outside of matches stays in its run, the replacement of a match is written to the run containing the first
+character of the match. Matches do not span line breaks, paragraphs or fields.
+
+All a:t nodes of a part (slide, notes slide, slide layout or slide master - including tables and group shapes) are
+visited in a single lxml pass; no python-pptx shape/run objects are created.
+
+    replace_text(prs, r"ACME( Corp\\.?)?", "Globex")
+    replace_text_in_file("old.pptx", "new.pptx", r"\\b20(19|20)\\b", "2021")
+@author: Nathanael Jöhrmann
+"""
+import re
+from bisect import bisect_right
+from typing import Callable, IO, List, Pattern, Union
+
+import pptx
+from lxml import etree
+from pptx.oxml.ns import qn
+
+from pptx_tools.zip_package import TEXT_PARTS, ZipEntry, read_entries, write_zip
+
+Replacement = Union[str, Callable[['re.Match'], str]]
+
+_T = qn("a:t")
+_BR = qn("a:br")
+_R = qn("a:r")
+
+
+def _replace_in_runs(t_nodes: List[etree._Element], regex: Pattern, repl: Replacement) -> int:
+    """Replace all matches in the text of t_nodes (a:t of consecutive runs with text); returns number of matches."""
+    texts = [t.text for t in t_nodes]
+    joined = "".join(texts)
+    matches = list(regex.finditer(joined))
+    if not matches:
+        return 0
+    starts = [0]
+    for text in texts:
+        starts.append(starts[-1] + len(text))
+    new_texts = [[] for _ in texts]
+
+    position = 0
+
+    def copy_until(end: int) -> None:
+        """Copy unchanged text joined[position:end] into the runs it came from."""
+        nonlocal position
+        i = bisect_right(starts, position) - 1
+        while position < end:
+            stop = min(end, starts[i + 1])
+            new_texts[i].append(joined[position:stop])
+            position = stop
+            i += 1
+
+    for match in matches:
+        copy_until(match.start())
+        replacement = match.expand(repl) if isinstance(repl, str) else repl(match)
+        new_texts[min(bisect_right(starts, match.start()) - 1, len(texts) - 1)].append(replacement)
+        position = match.end()
+    copy_until(len(joined))
+
+    for t, text in zip(t_nodes, new_texts):
+        t.text = "".join(text)
+    return len(matches)
+
+
+def replace_in_element(element: etree._Element, pattern: Union[str, Pattern], repl: Replacement,
+                       flags: int = 0) -> int:
+    """
+    Replace all matches of pattern in the text of element (e.g. slide._element) with repl (string with group
+    references like re.sub, or function match -> string). Returns the number of replacements.
+    """
+    regex = re.compile(pattern, flags)
+    count = 0
+    group: List[etree._Element] = []
+    paragraph = None
+    for node in element.iter(_T, _BR):
+        run = node.getparent()
+        is_run_text = node.tag == _T and run.tag == _R
+        if not (is_run_text and run.getparent() is paragraph):  # line break, field or new paragraph
+            if group:
+                count += _replace_in_runs(group, regex, repl)
+                group = []
+            paragraph = run.getparent() if is_run_text else None
+        if is_run_text and node.text:
+            group.append(node)
+    if group:
+        count += _replace_in_runs(group, regex, repl)
+    return count
+
+
+def _text_parts(prs: pptx.presentation.Presentation, notes: bool, layouts: bool, masters: bool):
+    for slide in prs.slides:
+        yield slide
+        if notes and slide.has_notes_slide:
+            yield slide.notes_slide
+    for master in prs.slide_masters:
+        if layouts:
+            yield from master.slide_layouts
+        if masters:
+            yield master
+
+
+def replace_text(prs: pptx.presentation.Presentation, pattern: Union[str, Pattern], repl: Replacement,
+                 flags: int = 0, notes: bool = True, layouts: bool = True, masters: bool = True) -> int:
+    """
+    Replace all matches of pattern in slides (including tables), notes, slide layouts and slide masters of prs
+    (see replace_in_element). Returns the number of replacements.
+    """
+    regex = re.compile(pattern, flags)
+    return sum(replace_in_element(part._element, regex, repl) for part in _text_parts(prs, notes, layouts, masters))
+
+
+def replace_text_in_file(source: Union[str, IO[bytes]], destination: Union[str, IO[bytes]],
+                         pattern: Union[str, Pattern], repl: Replacement, flags: int = 0) -> int:
+    """
+    Like replace_text, but for a saved *.pptx file (e.g. to process many decks in a batch): only the text parts
+    (zip_package.TEXT_PARTS) are parsed, all other zip entries are copied unchanged. Returns the number of replacements.
+    """
+    regex = re.compile(pattern, flags)
+    count = 0
+    entries = read_entries(source)
+    for index, entry in enumerate(entries):
+        if TEXT_PARTS.match(entry.filename):
+            root = etree.fromstring(entry.blob())
+            part_count = replace_in_element(root, regex, repl)
+            if part_count:
+                count += part_count
+                blob = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+                entries[index] = ZipEntry.from_blob(entry.filename, entry.date_time, blob)
+    write_zip(destination, entries)
+    return count
@@ -0,0 +1,188 @@
+"""
+This module provides read-only text extraction for saved *.pptx files and an optional on-disk inverted index to search
+many decks (e.g. an archive of generated presentations).
+
+iter_deck_text streams the slide XML directly from the zip file with iterparse and yields one TextRecord per shape
+with text (tables and grouped shapes included) - no python-pptx objects are created and the file is not changed.
+
+TextIndex stores the words of every slide in an sqlite database. Decks are (re-)indexed only if their size or
+modification time changed, so updating the index of a large archive is cheap. All words of a query have to be on the
+same slide; a trailing * matches all words with that prefix.
+
+    python -m pptx_tools.text_search archive.sqlite add decks/*.pptx
+    python -m pptx_tools.text_search archive.sqlite search "quarterly revenue*"
+@author: Nathanael Jöhrmann
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import zipfile
+from collections import namedtuple
+from typing import IO, Iterable, Iterator, List, Optional, Union
+
+from lxml import etree
+from pptx.oxml.ns import qn
+
+from pptx_tools.zip_package import presentation_relationships, shape_text, slide_names_in_order
+
+TextRecord = namedtuple("TextRecord", ["slide_index", "shape_id", "shape_name", "text"])
+SearchHit = namedtuple("SearchHit", ["path", "slide_index", "text"])
+
+WORD_PATTERN = re.compile(r"\w+")
+
+_SHAPE_TAGS = (qn("p:sp"), qn("p:graphicFrame"))
+_C_NV_PR = qn("p:cNvPr")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER, mtime REAL);
+CREATE TABLE IF NOT EXISTS slides (id INTEGER PRIMARY KEY, deck_id INTEGER NOT NULL, slide_index INTEGER,
+                                   text TEXT);
+CREATE TABLE IF NOT EXISTS postings (word TEXT NOT NULL, slide_id INTEGER NOT NULL, PRIMARY KEY (word, slide_id))
+    WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS slides_deck ON slides (deck_id);
+"""
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# text extraction
+# ----------------------------------------------------------------------------------------------------------------------
+def _iter_slide_text(file: IO[bytes], slide_index: int) -> Iterator[TextRecord]:
+    for _, shape in etree.iterparse(file, tag=_SHAPE_TAGS):
+        text = shape_text(shape)
+        if text.strip():
+            c_nv_pr = next(shape.iter(_C_NV_PR), None)
+            yield TextRecord(slide_index, None if c_nv_pr is None else int(c_nv_pr.get("id")),
+                             None if c_nv_pr is None else c_nv_pr.get("name"), text)
+        shape.clear()
+        while shape.getprevious() is not None:  # free already processed shapes
+            del shape.getparent()[0]
+
+
+def iter_deck_text(file: Union[str, IO[bytes]]) -> Iterator[TextRecord]:
+    """Yields a TextRecord (slide_index, shape_id, shape_name, text) for every shape with text, in slide order."""
+    with zipfile.ZipFile(file) as zip_file:
+        for slide_index, name in enumerate(slide_names_in_order(zip_file, presentation_relationships(zip_file))):
+            with zip_file.open(name) as slide_file:
+                yield from _iter_slide_text(slide_file, slide_index)
+
+
+def words(text: str) -> List[str]:
+    """Lower case words of text as used by TextIndex."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# inverted index
+# ----------------------------------------------------------------------------------------------------------------------
+class TextIndex:
+    """Inverted index (word -> slides) of many *.pptx files stored in an sqlite database (see module docstring)."""
+
+    def __init__(self, filename: str):
+        """:param filename: sqlite database (created if it does not exist, ":memory:" for an in-memory index)"""
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'TextIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def paths(self) -> List[str]:
+        """All indexed files."""
+        return [path for path, in self.connection.execute("SELECT path FROM decks ORDER BY path")]
+
+    def _remove_deck(self, deck_id: int) -> None:
+        self.connection.execute("DELETE FROM postings WHERE slide_id IN (SELECT id FROM slides WHERE deck_id = ?)",
+                                (deck_id,))
+        self.connection.execute("DELETE FROM slides WHERE deck_id = ?", (deck_id,))
+        self.connection.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    def add(self, path: str, force: bool = False) -> bool:
+        """Index (or re-index) the *.pptx file path; returns False if it is unchanged since the last update."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT id, size, mtime FROM decks WHERE path = ?", (path,)).fetchone()
+        if row is not None and not force and row[1:] == (stat.st_size, stat.st_mtime):
+            return False
+        slide_texts = {}
+        for record in iter_deck_text(path):  # read before changing the index (file might be broken)
+            slide_texts.setdefault(record.slide_index, []).append(record.text)
+
+        with self.connection:  # one transaction per deck
+            if row is not None:
+                self._remove_deck(row[0])
+            deck_id = self.connection.execute("INSERT INTO decks (path, size, mtime) VALUES (?, ?, ?)",
+                                              (path, stat.st_size, stat.st_mtime)).lastrowid
+            for slide_index, texts in slide_texts.items():
+                text = "\n".join(texts)
+                slide_id = self.connection.execute("INSERT INTO slides (deck_id, slide_index, text) VALUES (?, ?, ?)",
+                                                   (deck_id, slide_index, text)).lastrowid
+                self.connection.executemany("INSERT INTO postings (word, slide_id) VALUES (?, ?)",
+                                            ((word, slide_id) for word in set(words(text))))
+        return True
+
+    def update(self, paths: Iterable[str]) -> List[str]:
+        """Add all new or changed files of paths and remove indexed files that no longer exist; returns added paths."""
+        added = [path for path in paths if self.add(path)]
+        with self.connection:
+            for deck_id, path in self.connection.execute("SELECT id, path FROM decks").fetchall():
+                if not os.path.exists(path):
+                    self._remove_deck(deck_id)
+        return added
+
+    def remove(self, path: str) -> None:
+        with self.connection:
+            for deck_id, in self.connection.execute("SELECT id FROM decks WHERE path = ?",
+                                                    (os.path.abspath(path),)).fetchall():
+                self._remove_deck(deck_id)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[SearchHit]:
+        """Returns all slides containing every word of query (word* matches a prefix), ordered by path and slide."""
+        conditions, parameters = [], []
+        for term in query.split():
+            term_words = words(term)
+            for i, word in enumerate(term_words):
+                if term.endswith("*") and i == len(term_words) - 1:
+                    conditions.append("SELECT slide_id FROM postings WHERE word >= ? AND word < ?")
+                    parameters += [word, word + "\U0010ffff"]
+                else:
+                    conditions.append("SELECT slide_id FROM postings WHERE word = ?")
+                    parameters.append(word)
+        if not conditions:
+            return []
+        sql = (f"SELECT decks.path, slides.slide_index, slides.text FROM slides JOIN decks ON decks.id = slides.deck_id "
+               f"WHERE slides.id IN ({' INTERSECT '.join(conditions)}) ORDER BY decks.path, slides.slide_index")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [SearchHit(*row) for row in self.connection.execute(sql, parameters)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Search the text of many *.pptx files.")
+    parser.add_argument("index", help="sqlite index file")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    commands.add_parser("add", help="add new/changed files to the index").add_argument("paths", nargs="+")
+    search_parser = commands.add_parser("search", help="print slides containing all words of query")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with TextIndex(args.index) as index:
+        if args.command == "add":
+            for path in index.update(args.paths):
+                print(f"indexed {path}")
+        else:
+            for hit in index.search(args.query, args.limit):
+                print(f"{hit.path} [slide {hit.slide_index + 1}]: {hit.text[:100]!r}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,15 +3,13 @@ This module is a collection of helpful misc. functions.
 @author: Nathanael Jöhrmann
 """
 import _ctypes
+import importlib.util
 import os
+import sys
 from typing import Generator, Union
 
-try:
-    from comtypes.client import Constants, CreateObject
-
-    has_comptypes = True
-except:
-    has_comptypes = False
+# comtypes (windows only) is imported when exporting to PDF/PNG - importing comtypes.client is slow
+has_comptypes = sys.platform.startswith("win32") and importlib.util.find_spec("comtypes") is not None
 
 import pptx
 from pptx.table import Table, _Cell
@@ -102,6 +100,7 @@ def save_pptx_as_png(save_folder: Union[str, "LocalPath"], pptx_filename: str, o
               f"Set overwrite_folder=True, if you want to overwrite folder content.")
         return False
 
+    from comtypes.client import Constants, CreateObject
     powerpoint = CreateObject("Powerpoint.Application")
     pp_constants = Constants(powerpoint)
 
@@ -127,6 +126,7 @@ def save_pptx_as_pdf(pdf_filename: Union[str, "LocalPath"], pptx_filename, overw
         print(f"File {pdf_filename} already exists. Set overwrite=True, if you want to overwrite file.")
         return False
 
+    from comtypes.client import Constants, CreateObject
     powerpoint = CreateObject("Powerpoint.Application")
     pp_constants = Constants(powerpoint)
     pres = powerpoint.Presentations.Open(pptx_filename)
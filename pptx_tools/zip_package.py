@@ -0,0 +1,277 @@
+"""
+This module provides low level access to the zip container of *.pptx files: zip entries are read with their compressed
+data and can be written to other zip files without decompressing/recompressing them (used by mail_merge.py,
+text_replace.py and for deterministic saving).
+
+The package helpers (relationships, slide order, part hashes, pictures and shape texts read directly from the zip file,
+without creating python-pptx objects) are shared by deck_analyzer.py, deck_diff.py, compaction.py and text_search.py.
+
+Deterministic zip files (deterministic_zip) have a fixed entry order ([Content_Types].xml, _rels/.rels, then sorted
+by name) and a fixed timestamp for all entries: SOURCE_DATE_EPOCH (environment variable, see reproducible-builds.org)
+or DEFAULT_DATE_TIME.
+@author: Nathanael Jöhrmann
+"""
+import datetime
+import hashlib
+import os
+import posixpath
+import re
+import struct
+import time
+import zipfile
+import zlib
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+
+DEFAULT_DATE_TIME = (1980, 1, 1, 0, 0, 0)  # earliest date supported by zip files
+FIRST_ENTRIES = ("[Content_Types].xml", "_rels/.rels")
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+TEXT_PARTS = re.compile(r"ppt/(slides|slideLayouts|slideMasters|notesSlides)/[^/]+\.xml$")  # parts with slide texts
+CHUNK_SIZE = 2 ** 20
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_UTF8_FLAG = 0x800
+_COMPRESS_LEVEL = 6
+_T = qn("a:t")
+_BR = qn("a:br")
+_P = qn("a:p")
+
+
+def build_date_time() -> Tuple[int, ...]:
+    """Timestamp of deterministic builds: SOURCE_DATE_EPOCH (if set) or DEFAULT_DATE_TIME."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch is None:
+        return DEFAULT_DATE_TIME
+    return max(DEFAULT_DATE_TIME, tuple(time.gmtime(int(epoch))[:6]))
+
+
+def build_datetime() -> datetime.datetime:
+    """build_date_time() as datetime (e.g. for core properties)."""
+    return datetime.datetime(*build_date_time())
+
+
+class ZipEntry:
+    """A zip entry (compressed data and header fields) that can be written to several zip files."""
+    __slots__ = ("filename", "date_time", "method", "crc", "file_size", "external_attr", "data")
+
+    def __init__(self, filename: str, date_time: Tuple[int, ...], method: int, crc: int, file_size: int,
+                 data: bytes, external_attr: int = 0):
+        self.filename = filename
+        self.date_time = date_time
+        self.method = method
+        self.crc = crc
+        self.file_size = file_size
+        self.external_attr = external_attr
+        self.data = data
+
+    @classmethod
+    def from_blob(cls, filename: str, date_time: Tuple[int, ...], blob: bytes) -> 'ZipEntry':
+        """New (deflated) entry with content blob."""
+        compressor = zlib.compressobj(_COMPRESS_LEVEL, zlib.DEFLATED, -15)
+        data = compressor.compress(blob) + compressor.flush()
+        return cls(filename, date_time, zipfile.ZIP_DEFLATED, zlib.crc32(blob), len(blob), data)
+
+    @property
+    def compress_size(self) -> int:
+        return len(self.data)
+
+    def blob(self) -> bytes:
+        """Uncompressed data."""
+        return self.data if self.method == zipfile.ZIP_STORED else zlib.decompress(self.data, -15)
+
+    def _header_fields(self) -> tuple:
+        name = self.filename.encode("utf-8")
+        flags = 0 if len(name) == len(self.filename) else _UTF8_FLAG
+        year, month, day, hour, minute, second = self.date_time
+        dos_date, dos_time = (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+        return name, flags, dos_date, dos_time
+
+    def local_header(self) -> bytes:
+        name, flags, dos_date, dos_time = self._header_fields()
+        return _LOCAL_HEADER.pack(b"PK\x03\x04", 20, flags, self.method, dos_time, dos_date, self.crc,
+                                  self.compress_size, self.file_size, len(name), 0) + name
+
+    def central_header(self, offset: int) -> bytes:
+        name, flags, dos_date, dos_time = self._header_fields()
+        return _CENTRAL_HEADER.pack(b"PK\x01\x02", 20, 20, flags, self.method, dos_time, dos_date, self.crc,
+                                    self.compress_size, self.file_size, len(name), 0, 0, 0, 0,
+                                    self.external_attr, offset) + name
+
+
+def read_entries(file: Union[str, IO[bytes]]) -> List[ZipEntry]:
+    """Returns all zip entries of file (filename or binary file object) with their (still compressed) data."""
+    with zipfile.ZipFile(file) as zip_file:
+        infos = [info for info in zip_file.infolist() if not info.is_dir()]
+        zip_fp = zip_file.fp
+        result = []
+        for info in infos:
+            if info.flag_bits & 0x1:
+                raise ValueError(f"Encrypted zip entry {info.filename} is not supported.")
+            zip_fp.seek(info.header_offset)
+            name_length, extra_length = _LOCAL_HEADER.unpack(zip_fp.read(_LOCAL_HEADER.size))[-2:]
+            zip_fp.seek(name_length + extra_length, 1)
+            result.append(ZipEntry(info.filename, info.date_time, info.compress_type, info.CRC, info.file_size,
+                                   zip_fp.read(info.compress_size), info.external_attr))
+    return result
+
+
+def write_zip(destination: Union[str, IO[bytes]], entries: Iterable[ZipEntry]) -> None:
+    """Write entries (in the given order) as zip file to destination (filename or binary file object)."""
+    file = open(destination, "wb") if isinstance(destination, str) else destination
+    try:
+        central_directory = []
+        offset = 0
+        for entry in entries:
+            central_directory.append(entry.central_header(offset))
+            header = entry.local_header()
+            file.write(header)
+            file.write(entry.data)
+            offset += len(header) + entry.compress_size
+        directory = b"".join(central_directory)
+        file.write(directory)
+        file.write(_END_RECORD.pack(b"PK\x05\x06", 0, 0, len(central_directory), len(central_directory),
+                                    len(directory), offset, 0))
+    finally:
+        if file is not destination:
+            file.close()
+
+
+def deterministic_zip(source: Union[str, IO[bytes]], destination: Union[str, IO[bytes]],
+                      date_time: Optional[Tuple[int, ...]] = None) -> None:
+    """
+    Copy the zip file source to destination with fixed entry order and timestamps (default: build_date_time()).
+    Compressed data is copied unchanged.
+    """
+    date_time = date_time or build_date_time()
+    entries = read_entries(source)
+    first = {name: index for index, name in enumerate(FIRST_ENTRIES)}
+    entries.sort(key=lambda entry: (first.get(entry.filename, len(first)), entry.filename))
+    for entry in entries:
+        entry.date_time = date_time
+        entry.external_attr = 0
+    write_zip(destination, entries)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# package helpers (parts are read directly from the zip file)
+# ----------------------------------------------------------------------------------------------------------------------
+def rels_name(part_name: str) -> str:
+    """'ppt/slides/slide1.xml' -> 'ppt/slides/_rels/slide1.xml.rels'"""
+    directory, filename = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", filename + ".rels")
+
+
+def rels_source(rels_name: str) -> str:
+    """'ppt/slides/_rels/slide1.xml.rels' -> 'ppt/slides/slide1.xml' ('_rels/.rels' -> '')"""
+    directory, filename = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(directory), filename[:-len(".rels")])
+
+
+def resolve_target(source: str, target: str) -> str:
+    """Zip entry name of the (internal) relationship target of part source."""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def read_relationships(zip_file: zipfile.ZipFile) -> Dict[str, List[dict]]:
+    """Returns {source part name: [{"id", "type", "target"}, ...]} for all internal relationships."""
+    result = {}
+    for name in zip_file.namelist():
+        if not name.endswith(".rels"):
+            continue
+        source = rels_source(name)
+        relationships = result[source] = []
+        with zip_file.open(name) as file:
+            for relationship in etree.parse(file).getroot().iterchildren(f"{{{RELATIONSHIPS_NS}}}Relationship"):
+                if relationship.get("TargetMode") == "External":
+                    continue
+                relationships.append({"id": relationship.get("Id"), "type": relationship.get("Type"),
+                                      "target": resolve_target(source, relationship.get("Target"))})
+    return result
+
+
+def presentation_relationships(zip_file: zipfile.ZipFile) -> List[dict]:
+    """Relationships [{"id", "type", "target"}, ...] of ppt/presentation.xml."""
+    with zip_file.open("ppt/_rels/presentation.xml.rels") as file:
+        return [{"id": relationship.get("Id"), "type": relationship.get("Type"),
+                 "target": resolve_target("ppt/presentation.xml", relationship.get("Target"))}
+                for relationship in etree.parse(file).getroot().iterchildren(f"{{{RELATIONSHIPS_NS}}}Relationship")]
+
+
+def slide_names_in_order(zip_file: zipfile.ZipFile, presentation_relationships: List[dict]) -> List[str]:
+    """Slide part names in presentation order (p:sldIdLst), not in relationship order."""
+    targets = {relationship["id"]: relationship["target"] for relationship in presentation_relationships
+               if relationship["type"] == RT.SLIDE}
+    with zip_file.open("ppt/presentation.xml") as file:
+        return [targets[sld_id.get(qn("r:id"))] for _, sld_id in etree.iterparse(file, tag=qn("p:sldId"))
+                if sld_id.get(qn("r:id")) in targets]
+
+
+def hash_part(zip_file: zipfile.ZipFile, name: str) -> str:
+    """sha1 (hex) of the content of zip entry name (read in chunks)."""
+    sha1 = hashlib.sha1()
+    with zip_file.open(name) as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def iter_pictures(zip_file: zipfile.ZipFile, slide_name: str) -> Iterator[Tuple[Optional[str], str, int, int]]:
+    """Yields (shape name, embed rId, displayed width [EMU], displayed height [EMU]) for all pictures of a slide."""
+    with zip_file.open(slide_name) as file:
+        for _, pic in etree.iterparse(file, tag=qn("p:pic")):
+            blip = pic.find(f"{qn('p:blipFill')}/{qn('a:blip')}")
+            ext = pic.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")  # not a:extLst/a:ext (e.g. of a:blip)
+            c_nv_pr = pic.find(f"{qn('p:nvPicPr')}/{qn('p:cNvPr')}")
+            if blip is not None and ext is not None and ext.get("cx") is not None:
+                yield (None if c_nv_pr is None else c_nv_pr.get("name"), blip.get(qn("r:embed")),
+                       int(ext.get("cx")), int(ext.get("cy")))
+            pic.clear()
+
+
+def iter_image_sizes(zip_file: zipfile.ZipFile, part_name: str) -> Iterator[Tuple[str, Optional[Tuple[int, int]]]]:
+    """
+    Yields (embed rId, displayed size of the whole image [EMU]) for all a:blip elements of an xml part. Cropped pictures
+    (a:srcRect) yield the size the uncropped image would have; blips not used by a picture (shape, background or table
+    cell fills) yield None, as their displayed size is not known (e.g. tiled or stretched fills).
+    """
+    with zip_file.open(part_name) as file:
+        for _, element in etree.iterparse(file, tag=(qn("p:pic"), qn("a:blip"))):
+            if element.tag == qn("a:blip"):
+                parent = element.getparent()
+                if parent.tag != qn("p:blipFill") or parent.getparent().tag != qn("p:pic"):
+                    yield element.get(qn("r:embed")), None
+                continue
+            blip = element.find(f"{qn('p:blipFill')}/{qn('a:blip')}")
+            ext = element.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")
+            if blip is not None:
+                size = None
+                if ext is not None and ext.get("cx") is not None:
+                    source_rect = element.find(f"{qn('p:blipFill')}/{qn('a:srcRect')}")
+                    size = (int(ext.get("cx")), int(ext.get("cy")))
+                    if source_rect is not None:
+                        size = _uncropped_size(size, source_rect)
+                yield blip.get(qn("r:embed")), size
+            element.clear()
+
+
+def _uncropped_size(size: Tuple[int, int], source_rect: etree._Element) -> Optional[Tuple[int, int]]:
+    visible_x = 100000 - int(source_rect.get("l", 0)) - int(source_rect.get("r", 0))  # in 1/1000 percent
+    visible_y = 100000 - int(source_rect.get("t", 0)) - int(source_rect.get("b", 0))
+    if visible_x <= 0 or visible_y <= 0:
+        return None
+    return round(size[0] * 100000 / visible_x), round(size[1] * 100000 / visible_y)
+
+
+def shape_text(shape: etree._Element) -> str:
+    """Text of all paragraphs of shape (also table cells), separated by newlines (line breaks -> vertical tab)."""
+    paragraphs = []
+    for paragraph in shape.iter(_P):
+        paragraphs.append("".join(node.text or "" if node.tag == _T else "\v" for node in paragraph.iter(_T, _BR)))
+    return "\n".join(paragraphs)
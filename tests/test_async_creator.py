@@ -0,0 +1,135 @@
+"""
+This file contains tests for async_creator.py.
+@author: Nathanael Jöhrmann
+"""
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import pptx
+import pytest
+
+from pptx_tools.async_creator import AsyncPPTXCreator, _figure_lock, _figure_to_png
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.instrumentation import PPTXInstrumentation
+from pptx_tools.templates import TemplateExample
+
+
+async def _create_deck(titles, max_concurrency=None) -> AsyncPPTXCreator:
+    creator = await AsyncPPTXCreator.create(TemplateExample, max_concurrency=max_concurrency)
+    figure = plt.figure(figsize=(2, 1.5), dpi=50)
+    slides = await asyncio.gather(*(creator.add_slide(title) for title in titles))
+    await asyncio.gather(*(creator.add_matplotlib_figure(figure, slide) for slide in slides),
+                         *(creator.add_latex_formula(r"a^2 + b^2 = c^2", slide) for slide in slides))
+    plt.close(figure)
+    return creator
+
+
+def test_async_creator():
+    async def main():
+        async with await _create_deck([f"slide {i}" for i in range(5)], max_concurrency=2) as creator:
+            return await creator.to_bytes()
+
+    prs = pptx.Presentation(io.BytesIO(asyncio.run(main())))
+    assert [slide.shapes.title.text for slide in prs.slides] == [f"slide {i}" for i in range(5)]
+    assert all(len(slide.shapes) == 3 for slide in prs.slides)
+
+
+def test_async_creator_concurrent_creators(tmpdir):
+    async def main():
+        creators = await asyncio.gather(*(_create_deck([f"deck {i}"]) for i in range(4)))
+        await asyncio.gather(*(creator.save(str(tmpdir.join(f"deck_{i}.pptx"))) for i, creator in enumerate(creators)))
+        for creator in creators:
+            creator.close()
+
+    asyncio.run(main())
+    for i in range(4):
+        assert pptx.Presentation(str(tmpdir.join(f"deck_{i}.pptx"))).slides[0].shapes.title.text == f"deck {i}"
+
+
+def test_async_creator_run_and_cancel():
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(creator: PPTXCreator):
+        started.set()
+        release.wait(5)
+
+    async def main():
+        async with AsyncPPTXCreator(PPTXCreator(TemplateExample())) as creator:
+            blocking = asyncio.ensure_future(creator.run(block))
+            queued = asyncio.ensure_future(creator.add_slide("cancelled"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            queued.cancel()
+            # the executor job is cancelled (done callback of the executor future) before the task is finished
+            await asyncio.wait({queued})
+            assert queued.cancelled()
+            release.set()
+            await blocking
+            await creator.add_slide("added")
+            return [slide.shapes.title.text for slide in creator.creator.prs.slides]
+
+    assert asyncio.run(main()) == ["added"]
+
+
+def test_async_creator_render_executor():
+    render_executor = ThreadPoolExecutor(1)
+
+    async def main():
+        creator = AsyncPPTXCreator(PPTXCreator(TemplateExample()), render_executor=render_executor)
+        slide = await creator.add_slide("slide")
+        picture = await creator.add_latex_formula(r"x^2", slide)
+        creator.close()
+        return picture
+
+    assert asyncio.run(main()).image.content_type == "image/png"
+    render_executor.shutdown()
+
+
+def test_async_creator_shared_figure():
+    figure = plt.figure(figsize=(2, 1.5), dpi=50)
+    figure.gca().plot([1, 3, 2])
+    expected = _figure_to_png(figure)
+
+    async def main():
+        creator = AsyncPPTXCreator(PPTXCreator(TemplateExample()))
+        slide = await creator.add_slide("slide")
+        pictures = await asyncio.gather(*(creator.add_matplotlib_figure(figure, slide) for _ in range(8)))
+        creator.close()
+        return pictures
+
+    pictures = asyncio.run(main())
+    plt.close(figure)
+    assert all(picture.image.blob == expected for picture in pictures)
+    assert _figure_lock(figure) is _figure_lock(figure)
+
+
+def test_async_creator_create_and_to_bytes():
+    threads = []
+
+    def template_factory():
+        threads.append(threading.current_thread())
+        return TemplateExample()
+
+    async def main():
+        async with await AsyncPPTXCreator.create(template_factory) as creator:
+            await creator.add_slide("deterministic")
+            return await creator.to_bytes(deterministic=True), await creator.to_bytes(compact=True, deterministic=True)
+
+    first, compacted = asyncio.run(main())
+    assert threads and threads[0] is not threading.main_thread()  # template is loaded in the io executor
+    assert asyncio.run(main()) == (first, compacted)
+    assert pptx.Presentation(io.BytesIO(compacted)).slides[0].shapes.title.text == "deterministic"
+
+
+def test_async_creator_instrumentation():
+    async def main():
+        async with AsyncPPTXCreator(PPTXCreator(TemplateExample())) as creator:
+            with PPTXInstrumentation() as instrumentation:  # jobs of the presentation thread are recorded
+                await asyncio.gather(*(creator.add_slide(f"slide {index}") for index in range(3)))
+            await creator.add_slide("not instrumented")
+        return instrumentation
+
+    assert asyncio.run(main()).counters["slides_added"] == 3
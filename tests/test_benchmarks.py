@@ -0,0 +1,23 @@
+"""
+This file contains tests for the benchmark runner (benchmarks/benchmark_pptx_tools.py).
+@author: Nathanael Jöhrmann
+"""
+from benchmarks.benchmark_pptx_tools import compare_with_baseline, run_benchmark, BENCHMARKS
+
+
+def _results(time_min, peak_memory):
+    return {"results": {"bench": {"time_min": time_min, "time_median": time_min, "peak_memory": peak_memory}}}
+
+
+def test_compare_with_baseline():
+    baseline = _results(1.0, 1000)
+    assert compare_with_baseline(_results(1.2, 1000), baseline, tolerance=0.25) == []
+    assert len(compare_with_baseline(_results(1.3, 1000), baseline, tolerance=0.25)) == 1
+    assert len(compare_with_baseline(_results(1.3, 2000), baseline, tolerance=0.25)) == 2
+    assert compare_with_baseline(_results(1.3, 2000), {"results": {}}) == []  # new benchmark
+
+
+def test_run_benchmark():
+    result = run_benchmark(BENCHMARKS["add_table_10x10"], repeat=1)
+    assert result["time_min"] > 0
+    assert set(result) == {"time_min", "time_median", "peak_memory"}
@@ -0,0 +1,127 @@
+"""
+This file contains tests for build_cache.py and deterministic saving (zip_package.py).
+@author: Nathanael Jöhrmann
+"""
+import functools
+import io
+import os
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pptx_tools import zip_package
+from pptx_tools.build_cache import SlideBuildCache, input_hash
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.position import PPTXPosition
+from pptx_tools.templates import TemplateExample
+
+built = []
+
+
+def _build_slide(creator: PPTXCreator, slide, data, figure_key):
+    built.append(figure_key)
+    creator.add_table(slide, data, PPTXPosition(0.1, 0.3))
+    image = io.BytesIO()
+    Image.new("RGB", (30, 20), figure_key).save(image, format="PNG")
+    creator.add_image(image, slide, PPTXPosition(0.6, 0.3))
+    text_box = creator.add_text_box(slide, "link")
+    text_box.text_frame.paragraphs[0].runs[0].hyperlink.address = "https://github.com"
+
+
+def _build_chart_slide(creator: PPTXCreator, slide):
+    creator.add_chart(slide, [1, 2, 3])
+
+
+def _build_deck(cache, tmpdir, name: str, keys) -> bytes:
+    creator = PPTXCreator(TemplateExample(), build_cache=cache)
+    for index, key in enumerate(keys):
+        creator.add_cached_slide(f"slide {index}", _build_slide, [["a", "b"], [index, key]], key)
+    creator.add_cached_slide("chart", _build_chart_slide)
+    filename = os.path.join(str(tmpdir), name)
+    creator.save(filename, deterministic=True)
+    with open(filename, "rb") as file:
+        return file.read()
+
+
+def test_deterministic_save(tmpdir, monkeypatch):
+    blobs = [_build_deck(None, tmpdir, f"deck{index}.pptx", ["red", "blue"]) for index in range(2)]
+    assert blobs[0] == blobs[1]
+    with zipfile.ZipFile(io.BytesIO(blobs[0])) as zip_file:
+        names = zip_file.namelist()
+        assert names[:2] == ["[Content_Types].xml", "_rels/.rels"] and names[2:] == sorted(names[2:])
+        assert {info.date_time for info in zip_file.infolist()} == {zip_package.DEFAULT_DATE_TIME}
+
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1600000000")
+    assert zip_package.build_date_time() == (2020, 9, 13, 12, 26, 40)
+    creator = PPTXCreator(TemplateExample())
+    filename = os.path.join(str(tmpdir), "epoch.pptx")
+    creator.save(filename, deterministic=True, compact=True)
+    with zipfile.ZipFile(filename) as zip_file:
+        assert zip_file.infolist()[0].date_time == (2020, 9, 13, 12, 26, 40)
+    assert creator.prs.core_properties.modified.year == 2020
+
+
+@pytest.mark.parametrize("directory", [False, True])
+def test_slide_build_cache(tmpdir, directory):
+    cache = SlideBuildCache(os.path.join(str(tmpdir), "cache") if directory else None)
+    del built[:]
+    first = _build_deck(cache, tmpdir, "first.pptx", ["red", "blue", "red"])
+    assert built == ["red", "blue", "red"]
+    assert (cache.hits, cache.misses, cache.uncacheable) == (0, 3, 1)
+
+    if directory:  # new process: cache is read from disk
+        cache = SlideBuildCache(os.path.join(str(tmpdir), "cache"))
+    second = _build_deck(cache, tmpdir, "second.pptx", ["red", "blue", "red"])
+    assert built == ["red", "blue", "red"]  # nothing built again
+    assert second == first  # cached slides give byte-identical decks
+
+    _build_deck(cache, tmpdir, "third.pptx", ["red", "green", "red"])
+    assert built[3:] == ["green"]
+    report = cache.report()
+    assert report["hits"] == 5 and report["uncacheable"] == (2 if directory else 3)
+    assert (report["slides"], report["misses"]) == ((8, 1) if directory else (12, 4))
+    assert report["hit_rate"] == 5 / report["slides"]
+
+
+def test_input_hash():
+    assert input_hash(PPTXFontStyle().set(size=12), np.arange(3)) == input_hash(PPTXFontStyle().set(size=12),
+                                                                                  np.arange(3))
+    assert input_hash(PPTXFontStyle().set(size=12)) != input_hash(PPTXFontStyle().set(size=14))
+    assert input_hash({"a": 1, "b": [1, 2]}) == input_hash({"b": [1, 2], "a": 1})
+    assert input_hash(1) != input_hash(1.0) != input_hash("1")
+    with pytest.raises(TypeError):
+        input_hash(PPTXCreator().prs)
+
+
+def _slide_builder(color):
+    def build(creator: PPTXCreator, slide):
+        creator.add_text_box(slide, color)
+    return build
+
+
+def test_function_key():
+    def key(build):
+        return SlideBuildCache().key(creator, "title", creator.default_layout, build, ())
+    creator = PPTXCreator(TemplateExample())
+    assert key(_slide_builder("red")) == key(_slide_builder("red")) != key(_slide_builder("blue"))
+    assert key(functools.partial(_build_slide, data=[1])) != key(functools.partial(_build_slide, data=[2]))
+    assert key(functools.partial(_build_slide, data=[1])) != key(functools.partial(_build_chart_slide, data=[1]))
+    with pytest.raises(TypeError):
+        key(_slide_builder(creator.prs))  # python-pptx objects can not be hashed
+    with pytest.raises(TypeError):
+        key(type("Builder", (), {"__call__": lambda self, creator, slide: None})())
+
+
+def test_cyclic_input_hash():
+    class Node:
+        def __init__(self):
+            self.other = None
+    first, second = Node(), Node()
+    first.other, second.other = second, first
+    with pytest.raises(TypeError):
+        input_hash(first)
+    with pytest.raises(TypeError):
+        input_hash({"a": {first}})
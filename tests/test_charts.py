@@ -0,0 +1,97 @@
+"""
+This file contains tests for charts.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+import zipfile
+
+import numpy as np
+import pptx
+import pytest
+from pptx.enum.chart import XL_CHART_TYPE
+
+from pptx_tools import charts
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture
+def creator():
+    return PPTXCreator(TemplateExample())
+
+
+def _sheet_xml(shape) -> str:
+    blob = shape.chart.part.chart_workbook.xlsx_part.blob
+    with zipfile.ZipFile(io.BytesIO(blob)) as xlsx:
+        return xlsx.read("xl/worksheets/sheet1.xml").decode()
+
+
+def test_lttb_indices():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 10  # spike has to survive downsampling
+    indices = charts.lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+    assert list(charts.lttb_indices(x[:50], y[:50], 100)) == list(range(50))
+
+
+def test_add_chart_xy(creator):
+    slide = creator.add_slide("xy chart")
+    x = np.linspace(0, 10, 5000)
+    y = np.column_stack([np.sin(x), np.cos(x)])
+    y[10, 0] = np.nan
+    shape = creator.add_chart(slide, y, x, series_names=["sin", "cos"], title="trig", max_points=200)
+    chart = shape.chart
+    assert chart.chart_type == XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS
+    assert chart.chart_title.text_frame.text == "trig"
+    assert [series.name for series in chart.series] == ["sin", "cos"]
+    assert [len(series.values) for series in chart.series] == [200, 200]
+    assert max(chart.series[1].values) == pytest.approx(1, abs=1e-3)
+
+    sheet = _sheet_xml(shape)
+    assert '<c r="B1" t="inlineStr"><is><t>sin</t></is></c>' in sheet
+    assert f'<c r="D201"><v>{chart.series[1].values[-1]!r}</v></c>' in sheet
+    x_ref = shape.chart.part._element.xpath("//c:ser[2]/c:xVal/c:numRef/c:f")[0].text
+    assert x_ref == "Sheet1!$C$2:$C$201"
+
+    saved = io.BytesIO()
+    creator.prs.save(saved)
+    reloaded = pptx.Presentation(saved).slides[0].shapes[-1].chart
+    assert [len(series.values) for series in reloaded.series] == [200, 200]
+
+
+def test_add_chart_full_resolution(creator):
+    y = np.arange(3000) % 7
+    shape = creator.add_chart(creator.add_slide("full"), y, max_points=None)
+    points = shape.chart.part._element.xpath("//c:ser/c:yVal/c:numRef/c:numCache/c:pt")  # series.values is O(n^2)
+    assert len(points) == 3000
+    assert shape.chart.series[0].name == "Series 1"
+
+
+def test_add_chart_categories(creator):
+    slide = creator.add_slide("category chart")
+    shape = creator.add_chart(slide, {"a": [1, 2, np.nan, 4], "b": [4, 3, 2, 1]}, ["q", "r", "s", "t&u"],
+                              chart_type=XL_CHART_TYPE.COLUMN_CLUSTERED)
+    chart = shape.chart
+    assert list(chart.plots[0].categories) == ["q", "r", "s", "t&u"]
+    assert list(chart.series[0].values) == [1, 2, None, 4]
+    assert list(chart.series[1].values) == [4, 3, 2, 1]
+    sheet = _sheet_xml(shape)
+    assert "<t>t&amp;u</t>" in sheet
+    assert '<c r="B4">' not in sheet  # nan -> empty cell
+
+    with pytest.raises(ValueError):
+        creator.add_chart(slide, [1, 2, 3], ["a", "b", "c"])  # XY chart needs numeric x
+    with pytest.raises(ValueError):
+        creator.add_chart(slide, [1, 2, 3], [1, 2])
+
+
+def test_add_chart_pandas(creator):
+    pd = pytest.importorskip("pandas")
+    data = pd.DataFrame({"a": np.arange(10.0), "b": np.arange(10.0) ** 2}, index=np.arange(10) * 0.5)
+    chart = creator.add_chart(creator.add_slide("pandas"), data).chart
+    assert [series.name for series in chart.series] == ["a", "b"]
+    assert chart.series[1].values[-1] == 81
@@ -0,0 +1,131 @@
+"""
+This file contains tests for compaction.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+import zipfile
+
+import matplotlib.pyplot as plt
+import pptx
+import pytest
+from lxml import etree
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+from pptx_tools.compaction import compact_pptx
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.deck_analyzer import analyze_deck
+from pptx_tools.templates import TemplateExample
+from tests.test_deck_analyzer import add_powerpoint_ext_lst
+
+
+@pytest.fixture(scope='module')
+def bloated_pptx():
+    """Deck with a duplicated image (slide 2 uses a copy of the image of slide 1) and an unreferenced media part."""
+    creator = PPTXCreator(TemplateExample())
+    figure = plt.figure(figsize=(4, 3), dpi=200)
+    for title in ["slide 01", "slide 02"]:
+        creator.add_matplotlib_figure(figure, creator.add_slide(title), zoom=0.25)  # 800 x 600 pixel at 1 x 0.75 inch
+    plt.close(figure)
+    saved = io.BytesIO()
+    creator.prs.save(saved)
+
+    result = io.BytesIO()
+    with zipfile.ZipFile(saved) as source_zip, zipfile.ZipFile(result, "w", zipfile.ZIP_DEFLATED) as bloated_zip:
+        for name in source_zip.namelist():
+            data = source_zip.read(name)
+            if name == "ppt/slides/_rels/slide2.xml.rels":
+                data = data.replace(b"../media/image2.png", b"../media/image3.png")
+            elif name == "ppt/media/image2.png":  # image1.png is the logo of the template
+                bloated_zip.writestr("ppt/media/image3.png", data)
+                bloated_zip.writestr("ppt/media/unused.png", data[:-1])
+            bloated_zip.writestr(name, data)
+    yield result
+
+
+def test_compact_pptx(bloated_pptx):
+    before = analyze_deck(bloated_pptx)
+    assert before["duplicate_media"][0]["parts"] == ["ppt/media/image3.png", "ppt/media/image2.png"]
+    assert before["unreferenced_parts"] == ["ppt/media/unused.png"]
+
+    compacted = io.BytesIO()
+    statistics = compact_pptx(bloated_pptx, compacted)
+    assert statistics["duplicates_merged"] == {"ppt/media/image2.png": "ppt/media/image3.png"}
+    assert statistics["removed_parts"] == ["ppt/media/image2.png", "ppt/media/unused.png"]
+    assert statistics["bytes_after"] < statistics["bytes_before"]
+
+    after = analyze_deck(compacted)
+    assert after["duplicate_media"] == []
+    assert after["unreferenced_parts"] == []
+    assert after["missing_targets"] == []
+    assert [slide["pictures"][0]["part"] for slide in after["slides"]] == ["ppt/media/image3.png"] * 2
+    with zipfile.ZipFile(compacted) as compacted_zip:
+        assert compacted_zip.namelist()[0] == "[Content_Types].xml"
+    assert len(pptx.Presentation(compacted).slides) == 2
+
+
+def test_compact_pptx_max_dpi(bloated_pptx):
+    compacted = io.BytesIO()
+    statistics = compact_pptx(bloated_pptx, compacted, max_dpi=100)
+    assert {"part": "ppt/media/image3.png", "size": (100, 75)} in statistics["downsampled_images"]
+    assert analyze_deck(compacted, max_dpi=100)["oversized_images"] == []
+
+
+def test_save_compact(tmpdir):
+    creator = PPTXCreator(TemplateExample())
+    figure = plt.figure(figsize=(4, 3), dpi=200)
+    creator.add_matplotlib_figure(figure, creator.add_slide("slide 01"), zoom=0.25)
+    plt.close(figure)
+    filename = str(tmpdir.join("compact.pptx"))
+    creator.save(filename, compact=True, max_dpi=100)
+    assert analyze_deck(filename)["slides"][0]["pictures"][0]["pixels"] == (100, 75)
+
+
+def test_compact_pptx_max_dpi_ext_lst():
+    creator = PPTXCreator(TemplateExample())
+    figure = plt.figure(figsize=(4, 3), dpi=200)
+    add_powerpoint_ext_lst(creator.add_matplotlib_figure(figure, creator.add_slide("slide 01"), zoom=0.25))
+    plt.close(figure)
+    saved = io.BytesIO()
+    creator.prs.save(saved)
+    compacted = io.BytesIO()
+    statistics = compact_pptx(saved, compacted, max_dpi=100)
+    assert (100, 75) in [image["size"] for image in statistics["downsampled_images"]]
+
+
+def _picture_deck():
+    """Deck with one picture of 800 x 600 pixel displayed at 1 x 0.75 inch; returns (creator, picture)."""
+    creator = PPTXCreator(TemplateExample())
+    figure = plt.figure(figsize=(4, 3), dpi=200)
+    picture = creator.add_matplotlib_figure(figure, creator.add_slide("slide 01"), zoom=0.25)
+    plt.close(figure)
+    return creator, picture
+
+
+def _downsampled_sizes(creator, picture, max_dpi):
+    """Sizes picture's image part was downsampled to by compact_pptx."""
+    saved, compacted = io.BytesIO(), io.BytesIO()
+    creator.prs.save(saved)
+    image_part = picture.part.related_part(picture._element.blip_rId).partname.lstrip("/")
+    statistics = compact_pptx(saved, compacted, max_dpi=max_dpi)
+    return [image["size"] for image in statistics["downsampled_images"] if image["part"] == image_part]
+
+
+def test_compact_pptx_max_dpi_cropped_picture():
+    creator, picture = _picture_deck()
+    picture.crop_left = picture.crop_right = 0.25  # visible: 400 x 600 pixel at 1 x 0.75 inch
+    assert _downsampled_sizes(creator, picture, max_dpi=100) == [(200, 75)]
+
+
+def test_compact_pptx_max_dpi_fill_image():
+    creator, picture = _picture_deck()
+    shape = creator.prs.slides[0].shapes.add_shape(MSO_SHAPE.RECTANGLE, 0, 0, Inches(1), Inches(1))
+    sp_pr = shape._element.spPr
+    for fill in sp_pr.findall(qn("a:solidFill")) + sp_pr.findall(qn("a:noFill")):
+        sp_pr.remove(fill)
+    blip_fill = etree.Element(qn("a:blipFill"))
+    etree.SubElement(blip_fill, qn("a:blip")).set(qn("r:embed"), picture._element.blip_rId)
+    etree.SubElement(blip_fill, qn("a:tile"))
+    sp_pr.insert(sp_pr.index(sp_pr.find(qn("a:prstGeom"))) + 1, blip_fill)
+    assert _downsampled_sizes(creator, picture, max_dpi=100) == []
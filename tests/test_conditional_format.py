@@ -0,0 +1,89 @@
+"""
+This file contains tests for conditional formats (conditional_format.py) used by PPTXTableStyle.
+@author: Nathanael Jöhrmann
+"""
+import numpy as np
+import pytest
+from pptx.dml.color import RGBColor
+
+from pptx_tools.conditional_format import PPTXConditionalFormat, AxisFormat, ThresholdFormat, TopNFormat, RowFormat, \
+    ColumnFormat, ColormapFormat, table_values
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.fill_style import PPTXFillStyle, FillType
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.table_style import PPTXTableStyle
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture(scope='module')
+def pptx_creator():
+    creator = PPTXCreator(TemplateExample())
+    yield creator
+
+
+@pytest.fixture(scope='function')
+def red_fill():
+    fill_style = PPTXFillStyle()
+    fill_style.set(fill_type=FillType.SOLID, fore_color_rgb=(255, 0, 0))
+    yield fill_style
+
+
+def fill_color(cell):
+    return None if cell.fill.type is None else cell.fill.fore_color.rgb
+
+
+VALUES = np.array([[1.0, 5.0, 3.0], [np.nan, 2.0, 9.0]])
+
+
+def test_threshold_format():
+    assert ThresholdFormat(min_value=2, max_value=5).mask(VALUES).tolist() == [[False, True, True],
+                                                                               [False, True, False]]
+
+
+def test_top_n_format():
+    assert TopNFormat(2).mask(VALUES).tolist() == [[False, True, False], [False, False, True]]
+    assert TopNFormat(1, largest=False).mask(VALUES).tolist() == [[True, False, False], [False, False, False]]
+    assert TopNFormat(10).mask(VALUES).sum() == 5  # nan is ignored
+
+
+def test_row_and_column_format():
+    assert RowFormat([1]).mask(VALUES).tolist() == [[False] * 3, [True] * 3]
+    assert ColumnFormat(lambda values: np.nansum(values, axis=0) > 8).mask(VALUES).tolist() == [[False, False, True],
+                                                                                               [False, False, True]]
+    assert (RowFormat([1]).rows, ColumnFormat([2]).cols) == ([1], [2])
+
+
+def test_abstract_formats():
+    with pytest.raises(TypeError):
+        PPTXConditionalFormat()
+    with pytest.raises(NotImplementedError):
+        AxisFormat([0])
+
+
+def test_table_values(pptx_creator):
+    slide = pptx_creator.add_slide("test_table_values")
+    shape = pptx_creator.add_table(slide, [["a", "b"], [1, 2.5]])
+    assert np.array_equal(table_values(shape.table), [[np.nan, np.nan], [1, 2.5]], equal_nan=True)
+    assert np.array_equal(table_values(shape.table, [[1]]), [[1, np.nan], [np.nan, np.nan]], equal_nan=True)
+    with pytest.raises(ValueError):
+        table_values(shape.table, [[1, 2], [3, 4], [5, 6]])
+    with pytest.raises(ValueError):
+        table_values(shape.table, [[1, 2, 3]])
+
+
+def test_write_table__conditional_formats(pptx_creator, red_fill):
+    table_data = [["name", "value"], ["a", 1], ["b", 7], ["c", 3]]
+    bold = PPTXFontStyle().set(bold=True)
+    table_style = PPTXTableStyle().set(conditional_formats=[
+        ColormapFormat([(0, (0, 0, 0)), (1, (0, 0, 200))]),
+        ThresholdFormat(min_value=5, fill_style=red_fill, font_style=bold),
+    ])
+    slide = pptx_creator.add_slide("test_write_table__conditional_formats")
+    table = pptx_creator.add_table(slide, table_data, table_style=table_style).table
+
+    assert fill_color(table.cell(0, 1)) is None
+    assert fill_color(table.cell(1, 1)) == RGBColor(0, 0, 0)
+    assert fill_color(table.cell(2, 1)) == RGBColor(255, 0, 0)  # later formats override earlier ones
+    assert fill_color(table.cell(3, 1)) == RGBColor(0, 0, 67)
+    assert table.cell(2, 1).text_frame.paragraphs[0].runs[0].font.bold
+    assert not table.cell(3, 1).text_frame.paragraphs[0].runs[0].font.bold
@@ -0,0 +1,53 @@
+"""
+This file contains tests for deck_analyzer.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+
+import matplotlib.pyplot as plt
+import pytest
+from pptx.oxml import parse_xml
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.deck_analyzer import analyze_deck
+from pptx_tools.templates import TemplateExample
+
+
+POWERPOINT_EXT_LST = (  # extLst as written by PowerPoint (a:ext without cx/cy)
+    '<a:extLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"><a:ext uri="{%s}">'
+    '<a14:useLocalDpi xmlns:a14="http://schemas.microsoft.com/office/drawing/2010/main" val="0"/></a:ext></a:extLst>')
+
+
+def add_powerpoint_ext_lst(picture) -> None:
+    """Add extLst elements to p:cNvPr and a:blip of picture, like PowerPoint does."""
+    picture._element.nvPicPr.cNvPr.append(parse_xml(POWERPOINT_EXT_LST % "FF2B5EF4-FFF2-40B4-BE49-F238E27FC236"))
+    picture._element.blipFill.blip.append(parse_xml(POWERPOINT_EXT_LST % "28A0092B-C50C-407E-A947-70E740481C1C"))
+
+
+@pytest.fixture(scope='module')
+def pptx_file():
+    creator = PPTXCreator(TemplateExample())
+    slide_01 = creator.add_slide("slide 01")
+    slide_02 = creator.add_slide("slide 02")
+    figure = plt.figure(figsize=(4, 3), dpi=200)
+    picture = creator.add_matplotlib_figure(figure, slide_01, zoom=0.25)  # 800 x 600 pixel at 1 x 0.75 inch
+    add_powerpoint_ext_lst(picture)
+    plt.close(figure)
+    creator.move_slide(slide_02, 0)
+    result = io.BytesIO()
+    creator.prs.save(result)
+    yield result
+
+
+def test_analyze_deck(pptx_file):
+    report = analyze_deck(pptx_file)
+    assert [slide["part"] for slide in report["slides"]] == ["ppt/slides/slide2.xml", "ppt/slides/slide1.xml"]
+    assert report["total_compressed"] == sum(part["compressed"] for part in report["parts"].values())
+    assert report["slides"][1]["related_parts"] == [report["slides"][1]["pictures"][0]["part"]]
+    assert report["oversized_images"][0]["slide_index"] == 1
+    assert report["oversized_images"][0]["pixels"] == (800, 600)
+    assert report["oversized_images"][0]["dpi"] == pytest.approx(800)
+    assert "ppt/slideLayouts/slideLayout1.xml" in report["unused_layouts"]
+    assert report["missing_targets"] == []
+    assert report["duplicate_media"] == []
+    assert analyze_deck(pptx_file, max_dpi=1000)["oversized_images"] == []
@@ -0,0 +1,130 @@
+"""
+This file contains tests for deck_diff.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+import zipfile
+
+from PIL import Image
+from pptx.util import Pt
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.deck_diff import diff_decks
+from pptx_tools.position import PPTXPosition
+from pptx_tools.templates import TemplateExample
+
+
+def _png(color) -> io.BytesIO:
+    file = io.BytesIO()
+    Image.new("RGB", (20, 10), color).save(file, format="PNG")
+    file.seek(0)
+    return file
+
+
+def _build(change: str = None) -> io.BytesIO:
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("Report")
+    text_box = creator.add_text_box(slide, "Summary", PPTXPosition(0.1, 0.3))
+    creator.add_table(slide, [["a", "b"], ["1", "2"]])
+    creator.add_image(_png("red" if change == "image" else "blue"), slide)
+    for index in range(3):
+        creator.add_slide(f"slide {index}")
+
+    if change == "text":
+        text_box.text_frame.paragraphs[0].runs[0].text = "Summary 2021"
+    elif change == "style":
+        text_box.text_frame.paragraphs[0].runs[0].font.size = Pt(30)
+        text_box.left += 1000
+    elif change == "shapes":
+        slide.shapes._spTree.remove(text_box._element)
+        creator.add_text_box(creator.prs.slides[1], "new")
+    elif change == "slides":
+        creator.add_slide("added")
+    file = io.BytesIO()
+    creator.prs.save(file)
+    file.seek(0)
+    return file
+
+
+def _rewrite(file: io.BytesIO, rewrite_entry) -> io.BytesIO:
+    """Copy of zip file with entries rewritten by rewrite_entry(name, blob) -> (name, blob)."""
+    result = io.BytesIO()
+    with zipfile.ZipFile(file) as source, zipfile.ZipFile(result, "w", zipfile.ZIP_DEFLATED) as destination:
+        for info in source.infolist():
+            destination.writestr(*rewrite_entry(info.filename, source.read(info)))
+    result.seek(0)
+    return result
+
+
+def _rename_media(file: io.BytesIO) -> io.BytesIO:
+    def rename(name, blob):
+        if name.endswith(".rels"):
+            blob = blob.replace(b"media/image1.png", b"media/renamed.png")
+        return name.replace("media/image1.png", "media/renamed.png"), blob
+    return _rewrite(file, rename)
+
+
+def test_equal_decks():
+    report = diff_decks(_build(), _build())
+    assert report == {"equal": True, "slides": [], "parts": {"added": [], "removed": [], "changed": []}}
+    assert diff_decks(_build(), _rename_media(_build()))["equal"]
+
+
+def test_text_and_style_delta():
+    report = diff_decks(_build(), _build("text"))
+    assert not report["equal"]
+    [slide] = report["slides"]
+    assert slide["slide"] == 0 and slide["status"] == "changed"
+    [shape] = slide["shapes"]
+    assert shape["text"] == {"old": "Summary", "new": "Summary 2021"}
+    assert "style" not in shape and "position" not in shape
+
+    [shape] = diff_decks(_build(), _build("style"))["slides"][0]["shapes"]
+    assert shape["position"] == {"x": {"old": shape["position"]["x"]["old"],
+                                       "new": shape["position"]["x"]["old"] + 1000}}
+    assert {"path": "/p:txBody/a:p/a:r/a:rPr@sz", "old": None, "new": "3000"} in shape["style"]
+    assert "text" not in shape
+
+
+def test_shape_slide_and_media_changes():
+    slides = diff_decks(_build(), _build("shapes"))["slides"]
+    assert [(slide["slide"], [(shape["shape"], shape["status"]) for shape in slide["shapes"]]) for slide in slides] \
+        == [(0, [("TextBox 3", "removed")]), (1, [("TextBox 3", "added")])]
+
+    assert diff_decks(_build(), _build("slides"))["slides"] == [{"slide": 4, "status": "added"}]
+    assert diff_decks(_build("slides"), _build())["slides"] == [{"slide": 4, "status": "removed"}]
+
+    [shape] = diff_decks(_build(), _build("image"))["slides"][0]["shapes"]
+    assert shape["shape"].startswith("Picture") and shape["style"][0]["path"] == "/p:blipFill/a:blip@embed"
+
+
+def test_changed_parts():
+    creator = PPTXCreator(TemplateExample())
+    old = io.BytesIO()
+    creator.prs.save(old)
+    creator.template.write_text_to_master_shape("changed", "Rectangle 5")
+    new = io.BytesIO()
+    creator.prs.save(new)
+    report = diff_decks(old, new)
+    assert report["slides"] == [] and report["parts"]["changed"] == ["ppt/slideMasters/slideMaster1.xml",
+                                                                     "ppt/slideMasters/slideMaster2.xml"]
+    assert not report["equal"]
+
+
+def test_changed_master_image():
+    # image1.png is the logo of the template slide masters (not used by any slide)
+    new = _rewrite(_build(), lambda name, blob: (name, _png("red").getvalue() if name == "ppt/media/image1.png"
+                                                 else blob))
+    report = diff_decks(_build(), new)
+    assert not report["equal"] and report["slides"] == []
+    assert report["parts"]["changed"] == ["ppt/slideMasters/_rels/slideMaster1.xml.rels",
+                                          "ppt/slideMasters/_rels/slideMaster2.xml.rels"]
+
+
+def test_renumbered_master_relationships():
+    def renumber(name, blob):  # rId6 -> rId99 in relationships and XML of slide master 1
+        if name in ("ppt/slideMasters/slideMaster1.xml", "ppt/slideMasters/_rels/slideMaster1.xml.rels"):
+            blob = blob.replace(b'"rId6"', b'"rId99"')
+        return name, blob
+
+    assert diff_decks(_build(), _rewrite(_build(), renumber))["equal"]
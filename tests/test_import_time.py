@@ -0,0 +1,44 @@
+"""
+This file contains an import time budget test for pptx_tools.creator (heavy optional modules are imported on first use).
+@author: Nathanael Jöhrmann
+"""
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET = 0.25  # [s] import time of pptx_tools.creator on top of python-pptx
+LAZY_MODULES = ["matplotlib", "comtypes", "numpy"]
+
+_SCRIPT = f"""
+import json, sys, time
+import pptx
+start = time.perf_counter()
+import pptx_tools.creator
+import pptx_tools.templates
+duration = time.perf_counter() - start
+template_file = pptx_tools.templates.TemplateExample.__dict__["TEMPLATE_FILE"]
+print(json.dumps({{"duration": duration, "modules": [name for name in {LAZY_MODULES!r} if name in sys.modules],
+                  "template_file_resolved": template_file._path is not None}}))
+"""
+
+
+def _measure_import() -> dict:
+    output = subprocess.run([sys.executable, "-c", _SCRIPT], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_time_budget():
+    result = _measure_import()
+    assert result["modules"] == []
+    assert not result["template_file_resolved"]
+    if result["duration"] > IMPORT_TIME_BUDGET:  # retry once (cold file system cache, busy machine)
+        result = _measure_import()
+    assert result["duration"] < IMPORT_TIME_BUDGET
+
+
+def test_template_file():
+    from pptx_tools.templates import TemplateExample
+    assert TemplateExample.TEMPLATE_FILE.endswith("example-template.pptx")
+    assert TemplateExample().TEMPLATE_FILE == TemplateExample.TEMPLATE_FILE
@@ -0,0 +1,81 @@
+"""
+This file contains tests for PPTXInstrumentation.
+@author: Nathanael Jöhrmann
+"""
+import io
+import threading
+
+import pytest
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.instrumentation import PPTXInstrumentation
+from pptx_tools.style_sheets import table_no_header
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture(scope='function')
+def pptx_creator():
+    creator = PPTXCreator(TemplateExample())
+    yield creator
+
+
+def test_instrumentation(pptx_creator, tmpdir):
+    events = []
+    original_add_table = PPTXCreator.add_table
+    with PPTXInstrumentation(callback=events.append, trace_memory=True) as instrumentation:
+        assert PPTXCreator.add_table is not original_add_table
+        slide = pptx_creator.add_slide("test_instrumentation")
+        pptx_creator.add_table(slide, [[1, 2, 3], [4, 5, 6]], table_style=table_no_header())
+        PPTXFontStyle().set(bold=True).write_shape(pptx_creator.add_text_box(slide, "text"))
+        pptx_creator.save(tmpdir.join("test_instrumentation.pptx"))
+    assert PPTXCreator.add_table is original_add_table  # no overhead when disabled
+
+    report = instrumentation.report()
+    assert report["operations"]["PPTXCreator.add_table"]["calls"] == 1
+    assert report["operations"]["PPTXFontStyle.write_shape"]["calls"] == 1
+    assert report["counters"]["slides_added"] == 1
+    assert report["counters"]["shapes_added"] == 2
+    assert report["counters"]["cells_written"] == 6
+    assert report["counters"]["cells_styled"] == 6
+    assert report["counters"]["saved_bytes"] > 0
+    assert report["peak_memory"] > 0
+    assert len(events) == sum(operation["calls"] for operation in report["operations"].values())
+    assert "PPTXCreator.save" in instrumentation.report_text()
+
+
+def test_instrumentation__media_bytes(pptx_creator):
+    import matplotlib.pyplot as plt
+    figure = plt.figure(figsize=(1, 1), dpi=50)
+    with PPTXInstrumentation() as instrumentation:
+        pptx_creator.add_matplotlib_figure(figure, pptx_creator.add_slide("test_instrumentation__media_bytes"))
+    plt.close(figure)
+    assert instrumentation.counters["media_bytes"] > 0
+    assert instrumentation.operations["PPTXCreator.add_image"].calls == 1
+
+
+def test_instrumentation__per_context():
+    original_add_slide = PPTXCreator.add_slide
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def build(slides: int):
+        creator = PPTXCreator(TemplateExample())
+        with PPTXInstrumentation() as instrumentation:
+            barrier.wait(5)  # both instrumentations are enabled at the same time
+            for index in range(slides):
+                creator.add_slide(f"slide {index}")
+            barrier.wait(5)
+        results[slides] = instrumentation.counters["slides_added"]
+
+    threads = [threading.Thread(target=build, args=(slides,)) for slides in (2, 5)]
+    for thread in threads:
+        thread.start()
+    with PPTXInstrumentation() as instrumentation:
+        with pytest.raises(RuntimeError):
+            PPTXInstrumentation().enable()  # only one instrumentation per context
+        for thread in threads:
+            thread.join()
+    assert results == {2: 2, 5: 5}  # every thread records only its own deck
+    assert instrumentation.counters == {}
+    assert PPTXCreator.add_slide is original_add_slide  # unpatched after the last instrumentation was disabled
@@ -0,0 +1,76 @@
+"""
+This file contains tests for mail_merge.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+import os
+import zipfile
+
+import pptx
+import pytest
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.mail_merge import MergeTemplate, merge_records
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture
+def template_file():
+    creator = PPTXCreator(TemplateExample())
+    creator.template.write_text_to_master_shape("{{website}}", "Rectangle 5")
+    slide = creator.add_slide("Certificate for {{name}}")
+    creator.add_table(slide, [["name", "score"], ["{{name}}", "{{ score }}"]])
+    text_frame = creator.add_text_box(slide, "").text_frame
+    paragraph = text_frame.paragraphs[0]
+    for text in ["Welcome to {{ci", "t", "y}}, {{", "name}}!"]:  # tokens split into several runs
+        paragraph.add_run().text = text
+    paragraph.runs[2].font.bold = True
+    slide.notes_slide.notes_text_frame.text = "{{name}} <{{website}}>"
+    creator.add_slide("no fields")
+    file = io.BytesIO()
+    creator.prs.save(file)
+    file.seek(0)
+    return file
+
+
+def test_merge_template(template_file):
+    template = MergeTemplate(template_file)
+    assert template.fields == {"name", "score", "city", "website"}
+    assert any(name.startswith("ppt/slideMasters/") for name in template.parts)
+    assert "ppt/slides/slide2.xml" not in template.parts
+
+    result = io.BytesIO()
+    template.render({"name": "Ann & <Bob>", "score": 1.5, "city": "Köln", "website": "x.org"}, result)
+    prs = pptx.Presentation(result)
+    slide = prs.slides[0]
+    assert slide.shapes.title.text_frame.text == "Certificate for Ann & <Bob>"
+    assert [cell.text for cell in slide.shapes[-2].table.rows[1].cells] == ["Ann & <Bob>", "1.5"]
+    paragraph = slide.shapes[-1].text_frame.paragraphs[0]
+    assert paragraph.text == "Welcome to Köln, Ann & <Bob>!"
+    assert paragraph.runs[2].text == ", Ann & <Bob>" and paragraph.runs[2].font.bold
+    assert slide.notes_slide.notes_text_frame.text == "Ann & <Bob> <x.org>"
+    masters = [shape.text_frame.text for master in prs.slide_masters for shape in master.shapes
+               if shape.name == "Rectangle 5"]
+    assert masters == ["x.org"] * len(prs.slide_masters)
+
+    # entries without fields are copied unchanged
+    template_file.seek(0)
+    with zipfile.ZipFile(template_file) as source, zipfile.ZipFile(result) as merged:
+        assert merged.testzip() is None
+        assert merged.namelist() == source.namelist()
+        for info in source.infolist():
+            if info.filename not in template.parts:
+                assert merged.getinfo(info.filename).CRC == info.CRC
+
+    with pytest.raises(KeyError):
+        template.render({"name": "Ann"}, io.BytesIO())
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_merge_records(template_file, tmpdir, workers):
+    records = ({"name": f"name {index}", "score": index, "city": "c", "website": "w"} for index in range(5))
+    pattern = os.path.join(str(tmpdir), "{index}_{score}.pptx")
+    filenames = merge_records(template_file, records, pattern, workers=workers, max_pending=2)
+    assert filenames == [pattern.format(index=index, score=index) for index in range(5)]
+    for index, filename in enumerate(filenames):
+        assert pptx.Presentation(filename).slides[0].shapes.title.text_frame.text == f"Certificate for name {index}"
@@ -0,0 +1,90 @@
+"""
+This file contains tests for media.py (images embedded without copy: MediaFile).
+@author: Nathanael Jöhrmann
+"""
+import io
+import mmap
+import os
+import tracemalloc
+import zipfile
+
+import pptx
+import pytest
+from PIL import Image
+
+from pptx_tools import media
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.instrumentation import PPTXInstrumentation
+from pptx_tools.streaming_creator import StreamingPPTXCreator
+from pptx_tools.templates import TemplateExample
+
+
+def _png_bytes(color, size=(40, 30)) -> bytes:
+    file = io.BytesIO()
+    Image.new("RGB", size, color).save(file, format="PNG", dpi=(150, 150))
+    return file.getvalue()
+
+
+@pytest.fixture
+def large_tiff(tmpdir) -> str:
+    filename = os.path.join(str(tmpdir), "scan.tiff")
+    Image.frombytes("RGB", (2000, 1500), os.urandom(2000 * 1500 * 3)).save(filename, format="TIFF")
+    return filename
+
+
+def test_media_file():
+    blob = _png_bytes("red")
+    media_file = media.MediaFile(memoryview(blob), chunk_size=7)
+    assert media_file.read().obj is blob  # no copy
+    assert b"".join(media_file.iter_chunks()) == blob
+    assert media_file.sha1 == media.image_sha1(blob)
+    assert (media_file.ext, media_file.content_type, media_file.px_size, media_file.dpi) == \
+        ("png", "image/png", (40, 30), (150, 150))
+    with pytest.raises(Exception):
+        media.MediaFile(b"no image")
+
+
+def test_add_image_without_copy(tmpdir):
+    blob = _png_bytes("red")
+    path = os.path.join(str(tmpdir), "blue.png")
+    with open(path, "wb") as file:
+        file.write(_png_bytes("blue"))
+
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("media")
+    with PPTXInstrumentation() as instrumentation:
+        pictures = [creator.add_image(bytearray(blob), slide), creator.add_image(memoryview(blob), slide),
+                    creator.add_image(io.BytesIO(blob), slide), creator.add_image(media.MediaFile(path), slide)]
+    assert instrumentation.counters["media_bytes"] == 3 * len(blob) + os.path.getsize(path)
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        pictures.append(creator.add_image(mapped, slide))
+        assert pictures[0]._element.blip_rId == pictures[1]._element.blip_rId == pictures[2]._element.blip_rId
+        assert pictures[3]._element.blip_rId == pictures[4]._element.blip_rId != pictures[0]._element.blip_rId
+        assert pictures[3].width == pictures[0].width == 40 * 914400 // 150
+        filename = os.path.join(str(tmpdir), "media.pptx")
+        creator.save(filename)
+
+    prs = pptx.Presentation(filename)
+    pictures = [shape for shape in prs.slides[0].shapes if shape.shape_type == 13]
+    assert [picture.image.blob for picture in pictures] == [blob] * 3 + [_png_bytes("blue")] * 2
+    assert pictures[3]._element.nvPicPr.cNvPr.get("descr") == "blue.png"
+
+
+def test_streamed_media_memory(tmpdir, large_tiff):
+    size = os.path.getsize(large_tiff)
+    for cls in (PPTXCreator, StreamingPPTXCreator):
+        filename = os.path.join(str(tmpdir), f"{cls.__name__}.pptx")
+        creator = PPTXCreator(TemplateExample()) if cls is PPTXCreator else cls(filename, TemplateExample())
+        tracemalloc.start()
+        for index in range(3):
+            creator.add_image(media.MediaFile(large_tiff, chunk_size=1 << 18), creator.add_slide(f"scan {index}"))
+        creator.save(filename) if cls is PPTXCreator else creator.close()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < size / 3  # python-pptx: 2 copies per image
+
+        with zipfile.ZipFile(filename) as zip_file:
+            [name] = [name for name in zip_file.namelist() if name.endswith(".tiff")]
+            assert zip_file.getinfo(name).file_size == size
+        with open(large_tiff, "rb") as file:
+            assert pptx.Presentation(filename).slides[2].shapes[1].image.blob == file.read()
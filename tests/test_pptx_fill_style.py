@@ -0,0 +1,55 @@
+"""
+This file contains tests for PPTXFillStyle-methods.
+@author: Nathanael Jöhrmann
+"""
+import pytest
+from pptx.dml.color import RGBColor
+from pptx.enum.dml import MSO_FILL_TYPE, MSO_THEME_COLOR
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.fill_style import PPTXFillStyle, FillType, heat_map_fill_styles
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture(scope='class')
+def pptx_creator():
+    creator = PPTXCreator(TemplateExample())
+    yield creator
+
+
+@pytest.fixture(scope='function')
+def gradient_fill_style():
+    fill_style = PPTXFillStyle()
+    fill_style.set(fill_type=FillType.GRADIENT, gradient_angle=45,
+                   gradient_stops=[(0, (255, 0, 0)), (0.5, MSO_THEME_COLOR.ACCENT_2), (1, RGBColor(0, 0, 255))])
+    yield fill_style
+
+
+class TestPPTXFillStyle:
+    def test_write_fill__gradient(self, pptx_creator, gradient_fill_style):
+        slide = pptx_creator.add_slide("test_write_fill__gradient")
+        shape = pptx_creator.add_text_box(slide, "gradient")
+        table_shape = pptx_creator.add_table(slide, [[1, 2], [3, 4]])
+        fills = [shape.fill, shape.text_frame.paragraphs[0].runs[0].font.fill, table_shape.table.cell(0, 0).fill]
+
+        for fill in fills:
+            gradient_fill_style.write_fill(fill)
+            assert fill.type == MSO_FILL_TYPE.GRADIENT
+            assert fill.gradient_angle == 45
+            assert [stop.position for stop in fill.gradient_stops] == [0, 0.5, 1]
+            assert fill.gradient_stops[0].color.rgb == RGBColor(255, 0, 0)
+            assert fill.gradient_stops[1].color.theme_color == MSO_THEME_COLOR.ACCENT_2
+
+    def test_gradient_stops(self, gradient_fill_style):
+        assert gradient_fill_style.gradient_stops[0] == (0, RGBColor(255, 0, 0))
+        with pytest.raises(AssertionError):
+            gradient_fill_style.gradient_stops = [(0, (0, 0, 0))]
+
+
+def test_heat_map_fill_styles():
+    result = heat_map_fill_styles([[0, 1, 2], [2, 2, 4]], [(0, (0, 0, 0)), (1, (200, 100, 0))], v_max=2)
+    assert result[0][0].fore_color_rgb == RGBColor(0, 0, 0)
+    assert result[0][1].fore_color_rgb == RGBColor(100, 50, 0)
+    assert result[0][2].fore_color_rgb == RGBColor(200, 100, 0)
+    assert result[0][2] is result[1][0] is result[1][2]  # same color -> same fill style; values clipped to v_max
+    assert result[0][0].fill_type == FillType.SOLID
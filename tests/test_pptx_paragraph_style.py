@@ -0,0 +1,59 @@
+"""
+This file contains tests for PPTXParagraphStyle-methods.
+@author: Nathanael Jöhrmann
+"""
+import pytest
+from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT
+from pptx.util import Pt, Inches
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.paragraph_style import PPTXParagraphStyle
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture(scope='class')
+def pptx_creator():
+    creator = PPTXCreator(TemplateExample())
+    yield creator
+
+
+@pytest.fixture(scope='function')
+def paragraph_style():
+    result = PPTXParagraphStyle().set(alignment=PP_PARAGRAPH_ALIGNMENT.CENTER, line_spacing=1.5,
+                                      space_before=Pt(6), space_after=Pt(3),
+                                      margin_left=Inches(0.5), indent=Inches(-0.25), bullet="•")
+    result.font_style = PPTXFontStyle().set(size=20)
+    yield result
+
+
+def assert_paragraph_style(paragraph, expected: PPTXParagraphStyle):
+    result = PPTXParagraphStyle().read_paragraph(paragraph)
+    for attribute in ["alignment", "line_spacing", "space_before", "space_after", "margin_left", "indent", "bullet"]:
+        assert getattr(result, attribute) == getattr(expected, attribute)
+    assert result.font_style.size == expected.font_style.size
+
+
+class TestPPTXParagraphStyle:
+    def test_write_paragraph(self, pptx_creator, paragraph_style):
+        slide = pptx_creator.add_slide("test_write_paragraph")
+        paragraph = pptx_creator.add_text_box(slide, "text").text_frame.paragraphs[0]
+        paragraph_style.write_paragraph(paragraph)
+        assert_paragraph_style(paragraph, paragraph_style)
+
+        paragraph_style.bullet = False
+        paragraph_style.write_paragraph(paragraph)
+        assert PPTXParagraphStyle().read_paragraph(paragraph).bullet is False
+
+    def test_write_all_paragraphs(self, pptx_creator, paragraph_style):
+        slide = pptx_creator.add_slide("test_write_all_paragraphs")
+        text_frame = pptx_creator.add_text_box(slide, "first").text_frame
+        text_frame.add_paragraph().text = "second"
+        table = pptx_creator.add_table(slide, [[1, 2], [3, 4]]).table
+        bold_paragraph = table.cell(0, 0).text_frame.paragraphs[0]
+        PPTXFontStyle().set(bold=True).write_paragraph(bold_paragraph)
+
+        paragraph_style.write_all_paragraphs(slide)
+        for paragraph in list(text_frame.paragraphs) + [cell.text_frame.paragraphs[0] for cell in table.iter_cells()]:
+            assert_paragraph_style(paragraph, paragraph_style)
+        assert bold_paragraph.font.bold  # font attributes are merged
@@ -2,6 +2,7 @@
 @author: Nathanael Jöhrmann
 """
 import pytest
+from pptx.util import Inches
 
 from pptx_tools.creator import PPTXCreator
 from pptx_tools.templates import TemplateExample
@@ -36,3 +37,36 @@ class TestPPTXTableStyle:
 
     def test_set_width_as_fraction(self):
         assert False
+
+
+class TestPPTXTableStyleAutoSize:
+    def test_table_layout(self):
+        from pptx_tools.table_style import table_layout, MIN_COL_WIDTH
+        texts = [["a", "a much longer text"], ["b", "two\nlines"]]
+        col_widths, row_heights = table_layout(texts)
+        assert MIN_COL_WIDTH <= col_widths[0] < col_widths[1]
+        assert row_heights[1] > row_heights[0]
+
+        narrow_widths, narrow_heights = table_layout(texts, max_width=col_widths[0] + col_widths[1] // 2)
+        assert narrow_widths[0] == col_widths[0]  # narrow column is kept
+        assert narrow_widths[1] < col_widths[1]  # wide column wraps
+        assert narrow_heights[0] > row_heights[0]
+        assert table_layout([]) == ([], [])
+
+    def test_header_font(self):
+        from pptx_tools.font_style import PPTXFontStyle
+        from pptx_tools.table_style import table_layout
+        texts = [["header text"], ["header text"]]
+        col_widths, _ = table_layout(texts, PPTXFontStyle().set(size=10), PPTXFontStyle().set(size=20))
+        assert col_widths[0] == table_layout(texts[:1], PPTXFontStyle().set(size=20))[0][0]
+
+    def test_write_shape_auto_size(self, pptx_creator):
+        from pptx_tools.table_style import PPTXTableStyle
+        slide = pptx_creator.add_slide("auto size")
+        table_data = [["name", "value"], ["short", "a" * 200]]
+        shape = pptx_creator.add_table(slide, table_data, table_style=PPTXTableStyle().set(auto_size=True, width=8))
+        widths = [column.width for column in shape.table.columns]
+        assert widths[0] < widths[1]
+        assert sum(widths) == pytest.approx(Inches(8), abs=2)
+        assert shape.width == sum(widths)
+        assert shape.table.rows[1].height > shape.table.rows[0].height  # long text wraps
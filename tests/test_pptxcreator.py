@@ -5,11 +5,13 @@ folder, to also check functionality inside PowerPoint.
 """
 
 import glob
+import io
 import os
 
 import matplotlib.pyplot as plt
+import pptx
 import pytest
-from pptx.util import Inches
+from pptx.util import Inches, Pt
 
 from pptx_tools.creator import PPTXCreator
 from pptx_tools.position import PPTXPosition
@@ -207,3 +209,215 @@ class TestPPTXCreator:
         assert len(glob.glob(f"{tmpdir}\\*.png")) == 0
         assert pptx_creator.save_as_png(tmpdir.join("pngs"))  # create new folder, or set overwrite = True
         assert len(glob.glob(f"{tmpdir.join('pngs')}\\*.png")) == len(pptx_creator.prs.slides)
+
+
+@pytest.fixture(scope='module')
+def large_png():
+    figure = plt.figure(figsize=(6, 4), dpi=500)  # 3000 x 2000 pixel
+    figure.gca().plot([0, 1, 2], [0, 1, 0])
+    with io.BytesIO() as output:
+        figure.savefig(output, format="png")
+        plt.close(figure)
+        yield output.getvalue()
+
+
+class TestPPTXCreatorTargetDPI:
+    def test_add_image__target_dpi(self, pptx_creator, large_png):
+        slide = pptx_creator.add_slide("test_add_image__target_dpi")
+        original = pptx_creator.add_image(io.BytesIO(large_png), slide, zoom=0.5)
+        downsampled = pptx_creator.add_image(io.BytesIO(large_png), slide, zoom=0.5, target_dpi=150)
+        assert (downsampled.width, downsampled.height) == (original.width, original.height)  # same displayed size
+        assert downsampled.image.size == (round(downsampled.width.inches * 150), round(downsampled.height.inches * 150))
+        assert len(downsampled.image.blob) < len(original.image.blob)
+
+    def test_add_image__target_dpi_not_needed(self, pptx_creator, large_png):
+        slide = pptx_creator.add_slide("test_add_image__target_dpi_not_needed")
+        picture = pptx_creator.add_image(io.BytesIO(large_png), slide, target_dpi=4000, width=Inches(1))
+        assert picture.image.size == (3000, 2000)  # resolution is already below target_dpi
+        assert picture.width == Inches(1)
+
+
+class TestPPTXCreatorFork:
+    @pytest.fixture
+    def creator(self):
+        result = PPTXCreator(TemplateExample())
+        figure = plt.figure(figsize=(2, 1.5), dpi=50)
+        for index in range(3):
+            slide = result.add_slide(f"shared {index}")
+            result.add_matplotlib_figure(figure, slide)
+        plt.close(figure)
+        return result
+
+    @staticmethod
+    def titles(creator: PPTXCreator) -> list:
+        return [slide.shapes.title.text for slide in creator.prs.slides]
+
+    def test_fork(self, creator):
+        fork = creator.fork()
+        fork.add_slide("fork")
+        creator.add_slide("original")
+        assert self.titles(fork) == ["shared 0", "shared 1", "shared 2", "fork"]
+        assert self.titles(creator) == ["shared 0", "shared 1", "shared 2", "original"]
+        assert fork.default_layout.part is creator.default_layout.part  # layouts are shared
+        assert fork.prs.slides[0].part is not creator.prs.slides[0].part
+        assert fork.template is not creator.template and fork.template.prs is fork.prs
+        assert creator.template.prs is creator.prs
+        fork.add_slide("template layout", fork.template.title_layout)
+        assert len(creator.prs.slides) == 4
+
+        saved = io.BytesIO()
+        fork.prs.save(saved)
+        reloaded = pptx.Presentation(saved)
+        assert [slide.shapes.title.text for slide in reloaded.slides] == self.titles(fork)
+        assert len([shape for shape in reloaded.slides[0].shapes if shape.shape_type == 13]) == 1  # picture
+
+    def test_snapshot(self, creator):
+        snapshot = creator.snapshot()
+        creator.add_slide("after snapshot")
+        variants = [snapshot.fork() for _ in range(3)]
+        for index, variant in enumerate(variants):
+            variant.prs.slides[0].shapes.title.text = f"variant {index}"
+            variant.add_slide(f"tail {index}")
+        assert [self.titles(variant)[0] for variant in variants] == ["variant 0", "variant 1", "variant 2"]
+        assert self.titles(variants[1])[1:] == ["shared 1", "shared 2", "tail 1"]
+        assert self.titles(snapshot.fork()) == ["shared 0", "shared 1", "shared 2"]
+
+
+class TestPPTXCreatorImportSlides:
+    @staticmethod
+    def titles(prs) -> list:
+        return [slide.shapes.title.text for slide in prs.slides]
+
+    @pytest.fixture
+    def source(self):
+        result = PPTXCreator(TemplateExample())
+        figure = plt.figure(figsize=(2, 1.5), dpi=50)
+        for index in range(3):
+            result.add_matplotlib_figure(figure, result.add_slide(f"source {index}"))
+        plt.close(figure)
+        run = result.add_text_box(result.prs.slides[0], "link").text_frame.paragraphs[0].runs[0]
+        result.create_hyperlink(run, result.prs.slides[0].shapes[-1], result.prs.slides[2])
+        return result
+
+    def test_import_slides(self, source):
+        creator = PPTXCreator(TemplateExample())
+        creator.add_slide("own slide")
+        new_slides = creator.import_slides(source, [0, 2])
+        creator.import_slides(source, [1], index=0)
+        assert self.titles(creator.prs) == ["source 1", "own slide", "source 0", "source 2"]
+        assert new_slides[0].slide_layout.part is creator.default_layout.part  # identical layout reused
+        assert len(creator.prs.slide_masters) == len(source.prs.slide_masters)
+
+        saved = io.BytesIO()
+        creator.prs.save(saved)
+        reloaded = pptx.Presentation(saved)
+        assert self.titles(reloaded) == self.titles(creator.prs)
+        slide = reloaded.slides[2]
+        link_rId = slide.shapes[-1].text_frame.paragraphs[0].runs[0].hyperlink._hlinkClick.rId
+        assert slide.part.related_part(link_rId).slide.shapes.title.text == "source 2"
+
+        saved.seek(0)
+        from pptx_tools.deck_analyzer import analyze_deck
+        report = analyze_deck(saved)
+        assert report["duplicate_media"] == [] and report["missing_targets"] == []
+
+    def test_import_slides_new_master(self, source, tmpdir):
+        filename = str(tmpdir.join("source.pptx"))
+        source.prs.save(filename)
+        creator = PPTXCreator()  # default python-pptx template -> different slide master
+        new_slides = creator.import_slides(filename, [0, 1])
+        assert len(creator.prs.slide_masters) == 2
+        assert new_slides[0].slide_layout.part is new_slides[1].slide_layout.part
+        assert new_slides[0].shapes[-1].text_frame.paragraphs[0].runs[0].hyperlink._hlinkClick is None  # not imported
+        creator.import_slides(filename, [2])
+        assert len(creator.prs.slide_masters) == 2
+
+        saved = io.BytesIO()
+        creator.prs.save(saved)
+        assert self.titles(pptx.Presentation(saved)) == ["source 0", "source 1", "source 2"]
+
+
+    def test_import_slides_reused_importer(self, source):
+        from pptx_tools.slide_import import SlideImporter
+        creator = PPTXCreator(TemplateExample())
+        importer = SlideImporter(creator)
+        figure = plt.figure(figsize=(1, 1), dpi=50)
+        creator.add_matplotlib_figure(figure, creator.add_slide("own slide"))  # added after importer was created
+        plt.close(figure)
+        importer.import_slides(source, [0])
+        creator.add_slide("own slide 2")
+        importer.import_slides(source, [1])
+
+        partnames = [part.partname for part in creator.prs.part.package.iter_parts()]
+        assert len(partnames) == len(set(partnames))
+        saved = io.BytesIO()
+        creator.prs.save(saved)
+        assert self.titles(pptx.Presentation(saved)) == ["own slide", "source 0", "own slide 2", "source 1"]
+
+
+class TestPPTXCreatorPaginatedTable:
+    @staticmethod
+    def table_texts(shape) -> list:
+        return [[cell.text for cell in row.cells] for row in shape.table.rows]
+
+    def test_add_paginated_table(self):
+        from pptx_tools.font_style import PPTXFontStyle
+        from pptx_tools.table_style import PPTXTableStyle
+        creator = PPTXCreator(TemplateExample())
+        slides_while_reading = []
+
+        def rows():  # streaming rows; records number of slides when a row is read
+            yield ["id", "value"]
+            for index in range(300):
+                slides_while_reading.append(len(creator.prs.slides))
+                yield [index, "two\nlines" if index in (7, 150) else index * 2]
+
+        table_style = PPTXTableStyle().set(font_style=PPTXFontStyle().set(size=12), width=6)
+        shapes = creator.add_paginated_table("data", rows(), table_style=table_style)
+        assert len(shapes) == len(creator.prs.slides) > 5
+        assert slides_while_reading[-1] > slides_while_reading[0]  # rows are not read at once
+
+        body = []
+        for shape in shapes:
+            texts = self.table_texts(shape)
+            assert texts[0] == ["id", "value"]  # repeated header
+            body.extend(texts[1:])
+            assert shape.height <= creator.prs.slide_height - shape.top
+            assert [column.width for column in shape.table.columns] == [Inches(3), Inches(3)]
+            assert shape.table.cell(1, 0).text_frame.paragraphs[0].font.size == Pt(12)
+        assert body == [[f"{index}", "two\nlines" if index in (7, 150) else f"{index * 2}"] for index in range(300)]
+
+        saved = io.BytesIO()
+        creator.prs.save(saved)
+        reloaded = pptx.Presentation(saved)
+        assert [shape.shape_id for shape in reloaded.slides[-1].shapes if shape.has_table] == [shapes[-1].shape_id]
+
+    def test_add_paginated_table_rows_per_slide(self):
+        creator = PPTXCreator(TemplateExample())
+        shapes = creator.add_paginated_table("data", [[index] for index in range(10)], header_rows=0,
+                                             rows_per_slide=4)
+        assert [len(shape.table.rows) for shape in shapes] == [4, 4, 2]
+        assert self.table_texts(shapes[2]) == [["8"], ["9"]]
+
+        shapes = creator.add_paginated_table("header only", [["a", "b"]])
+        assert len(shapes) == 1 and self.table_texts(shapes[0]) == [["a", "b"]]
+        with pytest.raises(ValueError):
+            # number of columns is fixed by the rows of the first slide
+            creator.add_paginated_table("too many cells", [["a"], ["b"], ["c", "d"]], rows_per_slide=1)
+
+    def test_add_paginated_table_conditional_format(self):
+        from pptx.dml.color import RGBColor
+        from pptx_tools.conditional_format import ThresholdFormat
+        from pptx_tools.fill_style import PPTXFillStyle, FillType
+        from pptx_tools.table_style import PPTXTableStyle
+        red_fill = PPTXFillStyle()
+        red_fill.set(fill_type=FillType.SOLID, fore_color_rgb=(255, 0, 0))
+        table_style = PPTXTableStyle().set(conditional_formats=[ThresholdFormat(max_value=0, fill_style=red_fill),
+                                                                ThresholdFormat(min_value=25, fill_style=red_fill)])
+        creator = PPTXCreator(TemplateExample())
+        shapes = creator.add_paginated_table("data", [["id"]] + [[index] for index in range(30)],
+                                             table_style=table_style, rows_per_slide=10)
+        assert len(shapes) == 3
+        red = [int(row.cells[0].text) for shape in shapes for row in list(shape.table.rows)[1:]
+               if row.cells[0].fill.type is not None and row.cells[0].fill.fore_color.rgb == RGBColor(255, 0, 0)]
+        assert red == [0, 25, 26, 27, 28, 29]
@@ -0,0 +1,76 @@
+"""
+This file contains tests for streaming_creator.py.
+@author: Nathanael Jöhrmann
+"""
+import gc
+import io
+import zipfile
+
+import pptx
+import pytest
+from PIL import Image
+from pptx.parts.slide import SlidePart
+
+from pptx_tools.position import PPTXPosition
+from pptx_tools.streaming_creator import StreamingNotSupportedError, StreamingPPTXCreator
+from pptx_tools.templates import TemplateExample
+
+
+def _png(color) -> io.BytesIO:
+    file = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(file, format="PNG")
+    file.seek(0)
+    return file
+
+
+def _live_slide_parts(package) -> int:
+    gc.collect()
+    return sum(isinstance(item, SlidePart) and item.package is package for item in gc.get_objects())
+
+
+def test_streaming_creator():
+    output = io.BytesIO()
+    with StreamingPPTXCreator(output, TemplateExample()) as creator:
+        for index in range(30):
+            slide = creator.add_slide(f"slide {index}")
+            creator.add_table(slide, [["a", "b"], [index, "x"]])
+            creator.add_image(_png("red" if index % 2 else "blue"), slide, PPTXPosition(0.5, 0.5))
+            if index == 3:
+                creator.add_chart(slide, [1, 2, 3])
+                slide.notes_slide.notes_text_frame.text = "note"
+                text_box = creator.add_text_box(slide, "link")
+                text_box.text_frame.paragraphs[0].runs[0].hyperlink.address = "https://github.com"
+                del text_box
+            assert _live_slide_parts(creator.prs.part.package) == 1  # only the current slide is kept in memory
+        assert creator.slide_count == 29
+        assert creator._next_name_index["/ppt/slides/slide%d.xml"] == 30  # names are not searched from index 1
+
+    output.seek(0)
+    with zipfile.ZipFile(output) as zip_file:
+        names = zip_file.namelist()
+        assert len(names) == len(set(names))
+        assert len([name for name in names if name.startswith("ppt/slides/slide")]) == 30
+        media = [name for name in names if name.startswith("ppt/media/")]
+    prs = pptx.Presentation(output)
+    assert [slide.shapes.title.text for slide in prs.slides] == [f"slide {index}" for index in range(30)]
+    assert len({shape.image.sha1 for slide in prs.slides for shape in slide.shapes if shape.shape_type == 13}) == 2
+    template_parts = TemplateExample().prs.part.package.iter_parts()
+    assert len(media) == len([part for part in template_parts if part.partname.startswith("/ppt/media/")]) + 2
+    slide = prs.slides[3]
+    assert slide.notes_slide.notes_text_frame.text == "note"
+    assert [shape.has_chart for shape in slide.shapes].count(True) == 1
+    assert len(prs.slides[29].shapes) == 3
+
+
+def test_streaming_creator_closed():
+    output = io.BytesIO()
+    creator = StreamingPPTXCreator(output)
+    creator.add_slide("title")
+    for method, args in ((creator.save, ("test.pptx",)), (creator.replace_text, ("title", "new"))):
+        with pytest.raises(StreamingNotSupportedError):
+            method(*args)
+    creator.close()
+    creator.close()
+    with pytest.raises(ValueError):
+        creator.add_slide("closed")
+    assert len(pptx.Presentation(io.BytesIO(output.getvalue())).slides) == 1
@@ -0,0 +1,60 @@
+"""
+This file contains tests for style_inventory.py.
+@author: Nathanael Jöhrmann
+"""
+import pytest
+from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.paragraph_style import PPTXParagraphStyle
+from pptx_tools.style_inventory import font_style_inventory, paragraph_style_inventory
+from pptx_tools.templates import TemplateExample
+
+
+@pytest.fixture(scope='function')
+def pptx_creator():
+    creator = PPTXCreator(TemplateExample())
+    yield creator
+
+
+def test_font_style_inventory(pptx_creator):
+    slide = pptx_creator.add_slide("test_font_style_inventory")
+    bold_font = PPTXFontStyle().set(bold=True, size=20, color_rgb=(10, 20, 30))
+    for text in ["a", "b", "c"]:
+        shape = pptx_creator.add_text_box(slide, text)
+        bold_font.write_run(shape.text_frame.paragraphs[0].runs[0])
+    pptx_creator.add_table(slide, [[1, 2], [3, 4]])
+
+    inventory = font_style_inventory(pptx_creator.prs)
+    usages = [usage for usage in inventory.values() if usage.style.bold]
+    assert len(usages) == 1
+    assert len(usages[0]) == 3
+    assert usages[0].style.size == 20
+    assert usages[0].style.color_rgb == bold_font.color_rgb
+    assert usages[0].style.name == PPTXFontStyle.name
+    assert sum(len(usage) for usage in inventory.values()) == 3 + 4 + 1  # text boxes, table cells, title
+
+    for usage in inventory.values():  # compare with (slow) PPTXFontStyle.read_font
+        location = usage.locations[0]
+        shape = [s for s in pptx_creator.prs.slides[location.slide_index].shapes if s.shape_id == location.shape_id][0]
+        if shape.has_text_frame:
+            run = shape.text_frame.paragraphs[location.paragraph_index].runs[location.run_index]
+            expected = PPTXFontStyle().read_font(run.font)
+            assert (expected.bold, expected.italic, expected.size) == (usage.style.bold, usage.style.italic,
+                                                                      usage.style.size)
+
+
+def test_paragraph_style_inventory(pptx_creator):
+    slide = pptx_creator.add_slide("test_paragraph_style_inventory")
+    paragraph_style = PPTXParagraphStyle().set(alignment=PP_PARAGRAPH_ALIGNMENT.CENTER, line_spacing=1.5)
+    for text in ["a", "b"]:
+        shape = pptx_creator.add_text_box(slide, text)
+        paragraph_style.write_shape(shape)
+
+    inventory = paragraph_style_inventory(slide)
+    usages = [usage for usage in inventory.values() if usage.style.alignment == PP_PARAGRAPH_ALIGNMENT.CENTER]
+    assert len(usages) == 1
+    assert len(usages[0]) == 2
+    assert usages[0].style.line_spacing == 1.5
+    assert usages[0].locations[0].run_index is None
@@ -0,0 +1,49 @@
+"""
+This file contains tests for templates.py.
+@author: Nathanael Jöhrmann
+"""
+import pptx
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+from pptx_tools.templates import AbstractTemplate, TemplateExample
+
+
+class DefaultTemplate(AbstractTemplate):
+    """Template using the default presentation of python-pptx."""
+    TEMPLATE_FILE = None
+
+    def __init__(self):
+        self.prs = pptx.Presentation()
+        self.title_layout = self.prs.slide_layouts[0]
+        self.default_layout = self.prs.slide_layouts[1]
+
+
+def test_shape_index():
+    template = TemplateExample()
+    index = template.shape_index
+    assert index is template.shape_index  # built once
+    assert len(template.master_shapes_named("Rectangle 4")) == len(template.prs.slide_masters)
+    assert template.master_shapes_named("no such shape") == []
+    assert sum(len(shapes) for shapes in index.master_shapes.values()) == len(template.master_shapes)
+
+    template.write_text_to_master_shape("new website", "Rectangle 5")
+    assert [shape.text_frame.text for shape in template.master_shapes_named("Rectangle 5")] == ["new website"] * 2
+
+
+def test_shape_index_layouts():
+    template = DefaultTemplate()
+    index = template.shape_index
+    assert template.layout_named("Title Slide") is template.title_layout
+    assert template.layout_named("no such layout") is None
+    titles = [shape for layout in template.prs.slide_layouts for shape in layout.placeholders
+              if shape.placeholder_format.type == PP_PLACEHOLDER.TITLE]
+    assert [shape.shape_id for shape in index.layout_placeholders_by_type[PP_PLACEHOLDER.TITLE]] == \
+           [shape.shape_id for shape in titles]
+    title_placeholder = index.layout_placeholders_by_idx[0][0]
+    assert title_placeholder.name in index.layout_shapes
+
+    template.write_text_to_layout_shape("layout title", title_placeholder.name)
+    assert title_placeholder.text_frame.text == "layout title"
+
+    template.prs = pptx.Presentation()
+    assert template.shape_index is not index  # rebuilt for new presentation
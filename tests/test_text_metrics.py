@@ -0,0 +1,77 @@
+"""
+This file contains tests for text_metrics.py.
+@author: Nathanael Jöhrmann
+"""
+import os
+
+import matplotlib
+import pytest
+from pptx.util import Pt
+
+from pptx_tools import text_metrics
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.font_style import PPTXFontStyle
+from pptx_tools.templates import TemplateExample
+
+MATPLOTLIB_FONTS = os.path.join(os.path.dirname(matplotlib.__file__), "mpl-data", "fonts", "ttf")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_font():
+    text_metrics.register_font("Test Font", os.path.join(MATPLOTLIB_FONTS, "DejaVuSans.ttf"))
+    text_metrics.register_font("Test Font", os.path.join(MATPLOTLIB_FONTS, "DejaVuSans-Bold.ttf"), bold=True)
+
+
+def test_font_metrics():
+    metrics = text_metrics.get_font_metrics("Test Font")
+    assert metrics is text_metrics.get_font_metrics("Test Font")  # cached per font file
+    assert metrics.text_width("") == 0
+    assert metrics.text_width("ii") < metrics.text_width("MM")
+    assert metrics.text_width("abc") == pytest.approx(sum(metrics.text_width(char) for char in "abc"))
+    assert metrics.text_widths(["abc", "a", "abc"]) == [metrics.text_width("abc"), metrics.text_width("a"),
+                                                        metrics.text_width("abc")]
+    assert text_metrics.get_font_metrics("Test Font", bold=True).text_width("abc") > metrics.text_width("abc")
+
+
+def test_text_widths():
+    font_style = PPTXFontStyle().set(name="Test Font", size=10)
+    widths = text_metrics.text_widths(["a", "aa", "aa\na", "a\vaa"], font_style)
+    assert widths[1] == pytest.approx(2 * widths[0], abs=1)
+    assert widths[2] == widths[3] == widths[1]
+    assert text_metrics.text_widths(["aa"], font_style.set(size=20))[0] == pytest.approx(2 * widths[1], abs=1)
+
+
+def test_text_size():
+    font_style = PPTXFontStyle().set(name="Test Font", size=10)
+    width, height = text_metrics.text_size("line 1\nline 2", font_style)
+    assert height == pytest.approx(2 * text_metrics.text_size("line 1", font_style)[1], abs=1)
+    assert Pt(20) < height < Pt(30)
+    box_width, box_height = text_metrics.text_box_size("line 1\nline 2", font_style)
+    assert box_width == width + 2 * text_metrics.TEXT_FRAME_MARGIN_X
+    assert box_height == height + 2 * text_metrics.TEXT_FRAME_MARGIN_Y
+
+
+def test_unknown_font():
+    metrics = text_metrics.FontMetrics(None)
+    assert metrics.text_width("abcd") == pytest.approx(4 * text_metrics.AVERAGE_GLYPH_WIDTH)
+
+
+def test_add_text_box_size():
+    creator = PPTXCreator(TemplateExample())
+    slide = creator.add_slide("text box size")
+    font_style = PPTXFontStyle().set(name="Test Font", size=12)
+    short = creator.add_text_box(slide, "a", font=font_style)
+    long = creator.add_text_box(slide, "a much longer text\nwith two lines", font=font_style)
+    assert short.width < long.width
+    assert short.height < long.height
+    assert (long.width, long.height) == text_metrics.text_box_size("a much longer text\nwith two lines", font_style)
+
+
+def test_installed_fonts(tmpdir, monkeypatch):
+    with open(str(tmpdir.join("a_corrupt.ttf")), "wb") as file:
+        file.write(b"no font")
+    with open(os.path.join(MATPLOTLIB_FONTS, "DejaVuSans-Bold.ttf"), "rb") as source, \
+            open(str(tmpdir.join("b_bold.ttf")), "wb") as file:
+        file.write(source.read())
+    monkeypatch.setattr(text_metrics, "font_directories", lambda: [str(tmpdir), str(tmpdir.join("missing"))])
+    assert text_metrics._installed_fonts() == {("DejaVu Sans", True, False): str(tmpdir.join("b_bold.ttf"))}
@@ -0,0 +1,63 @@
+"""
+This file contains tests for text_replace.py.
+@author: Nathanael Jöhrmann
+"""
+import io
+import re
+import zipfile
+
+import pptx
+import pytest
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.templates import TemplateExample
+from pptx_tools.text_replace import replace_text_in_file
+
+
+@pytest.fixture
+def creator():
+    creator = PPTXCreator(TemplateExample())
+    creator.template.write_text_to_master_shape("www.acme.com", "Rectangle 5")
+    slide = creator.add_slide("ACME report")
+    creator.add_table(slide, [["company", "year"], ["ACME Corp.", "2019"]])
+    paragraph = creator.add_text_box(slide, "").text_frame.paragraphs[0]
+    for text in ["Welcome to AC", "ME ", "Co", "rp. in 2019"]:
+        paragraph.add_run().text = text
+    paragraph.runs[1].font.bold = True
+    paragraph.runs[3].font.italic = True
+    slide.notes_slide.notes_text_frame.text = "ACME\vACME"
+    return creator
+
+
+def test_replace_text(creator):
+    count = creator.replace_text(r"ACME( Corp\.)?", "Globex")
+    slide = creator.prs.slides[0]
+    assert slide.shapes.title.text_frame.text == "Globex report"
+    assert slide.shapes[-2].table.cell(1, 0).text == "Globex"
+    runs = slide.shapes[-1].text_frame.paragraphs[0].runs
+    assert [run.text for run in runs] == ["Welcome to Globex", "", "", " in 2019"]
+    assert not runs[0].font.bold and runs[3].font.italic  # formatting of each run is kept
+    assert slide.notes_slide.notes_text_frame.text == "Globex\vGlobex"
+    assert count == 1 + 1 + 1 + 2
+
+    assert creator.replace_text("acme", "Initech", flags=re.IGNORECASE, masters=False) == 0
+    assert creator.replace_text(r"www\.(\w+)", lambda match: match.group(1).upper()) == len(creator.prs.slide_masters)
+    assert creator.template.master_shapes_named("Rectangle 5")[0].text_frame.text == "ACME.com"
+
+
+def test_replace_text_empty_match(creator):
+    slide = creator.add_slide("ab")
+    assert creator.replace_text("x*", "-", layouts=False, masters=False, notes=False) > 0
+    assert slide.shapes.title.text_frame.text == "-a-b-"
+
+
+def test_replace_text_in_file(creator):
+    source = io.BytesIO()
+    creator.prs.save(source)
+    destination = io.BytesIO()
+    assert replace_text_in_file(source, destination, r"\b2019\b", "2021") == 2
+    slide = pptx.Presentation(destination).slides[0]
+    assert slide.shapes[-2].table.cell(1, 1).text == "2021"
+    assert slide.shapes[-1].text_frame.paragraphs[0].runs[3].text == "rp. in 2021"
+    with zipfile.ZipFile(destination) as zip_file:
+        assert zip_file.testzip() is None
@@ -0,0 +1,66 @@
+"""
+This file contains tests for text_search.py.
+@author: Nathanael Jöhrmann
+"""
+import os
+
+import pytest
+
+from pptx_tools.creator import PPTXCreator
+from pptx_tools.templates import TemplateExample
+from pptx_tools.text_search import TextIndex, iter_deck_text, main
+
+
+def _save_deck(filename: str, titles, table_text: str = "Revenue") -> str:
+    creator = PPTXCreator(TemplateExample())
+    for title in titles:
+        creator.add_slide(title)
+    creator.add_table(creator.prs.slides[0], [["Quarter", table_text], ["Q1", "1.5"]])
+    creator.move_slide(creator.prs.slides[-1], 0)
+    creator.prs.save(filename)
+    return filename
+
+
+@pytest.fixture
+def decks(tmpdir):
+    return [_save_deck(os.path.join(str(tmpdir), "a.pptx"), ["First slide", "Quarterly results"]),
+            _save_deck(os.path.join(str(tmpdir), "b.pptx"), ["Quarterly outlook"], "Costs")]
+
+
+def test_iter_deck_text(decks):
+    records = list(iter_deck_text(decks[0]))
+    assert [(record.slide_index, record.text) for record in records] == \
+           [(0, "Quarterly results"), (1, "First slide"), (1, "Quarter\nRevenue\nQ1\n1.5")]
+    assert records[2].shape_name.startswith("Table")
+    with open(decks[1], "rb") as file:
+        assert [record.text for record in iter_deck_text(file)][0] == "Quarterly outlook"
+
+
+def test_text_index(decks, tmpdir):
+    filename = os.path.join(str(tmpdir), "index.sqlite")
+    with TextIndex(filename) as index:
+        assert index.update(decks) == decks
+        assert index.update(decks) == []  # unchanged files are not indexed again
+        hits = index.search("quarter* REVENUE")
+        assert [(os.path.basename(hit.path), hit.slide_index) for hit in hits] == [("a.pptx", 1)]
+        assert len(index.search("quarterly")) == 2
+        assert index.search("quarterly", limit=1)[0].path == os.path.abspath(decks[0])
+        assert index.search("") == [] and index.search("missing") == []
+
+    _save_deck(decks[0], ["Annual report"])
+    os.utime(decks[0], (0, 0))
+    os.remove(decks[1])
+    with TextIndex(filename) as index:  # incremental update of the stored index
+        assert index.update(decks[:1]) == decks[:1]
+        assert index.paths == [os.path.abspath(decks[0])]
+        assert [hit.slide_index for hit in index.search("annual revenue")] == [0]
+        assert index.search("quarterly") == []
+        index.remove(decks[0])
+        assert index.paths == []
+
+
+def test_main(decks, tmpdir, capsys):
+    filename = os.path.join(str(tmpdir), "index.sqlite")
+    assert main([filename, "add"] + decks) == 0
+    assert main([filename, "search", "costs"]) == 0
+    assert "b.pptx [slide 1]" in capsys.readouterr().out